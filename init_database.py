@@ -99,7 +99,8 @@ def executar_migrations():
                         total_executados += 1
                     except Error as e:
                         # Ignorar erros de "já existe" que são esperados
-                        if 'already exists' not in str(e).lower():
+                        mensagem = str(e).lower()
+                        if 'already exists' not in mensagem and 'duplicate key name' not in mensagem:
                             print(f"⚠️  Aviso ao executar comando: {e}")
             
             connection.commit()
@@ -187,6 +188,22 @@ def inserir_dados_iniciais():
         print(f"❌ Erro ao inserir dados iniciais: {e}")
         return False
 
+def indexar_trigramas():
+    """Preenche as tabelas de trigramas da busca aproximada com os registros existentes"""
+    try:
+        from src.db.db_connection import DatabaseManager
+        
+        print("\n🔄 Indexando trigramas das descrições...")
+        manager = DatabaseManager()
+        for tabela in ('despesas', 'receitas'):
+            total = manager.reindexar_trigramas(tabela)
+            print(f"   ✅ {total} {tabela} indexadas")
+        return True
+        
+    except Error as e:
+        print(f"❌ Erro ao indexar trigramas: {e}")
+        return False
+
 def main():
     """Função principal de inicialização"""
     print("="*60)
@@ -226,6 +243,14 @@ def main():
     if not inserir_dados_iniciais():
         print("\n⚠️  Não foi possível inserir dados iniciais")
     
+    print()
+    
+    # Passo 5: Índice da busca aproximada
+    print("📋 PASSO 5: Indexando Busca Aproximada")
+    print("-"*60)
+    if not indexar_trigramas():
+        print("\n⚠️  Não foi possível indexar os trigramas (a busca aproximada ficará incompleta)")
+    
     print()
     print("="*60)
     print("  🎉 INICIALIZAÇÃO CONCLUÍDA COM SUCESSO!")
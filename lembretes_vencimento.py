@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Processo opcional de lembretes de vencimento
+Fica em execução e avisa das despesas não pagas com antecedência configurável
+
+Exemplos:
+    python lembretes_vencimento.py
+    python lembretes_vencimento.py --mysql --antecedencia 5,1,0 --hora 08:30
+    python lembretes_vencimento.py --log lembretes.log --comando notify-send
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from src.lembretes import (LembretesVencimento, FonteArquivoJson, FonteMySQL, notificar_terminal,
+                           NotificadorArquivo, NotificadorComando, ANTECEDENCIAS_PADRAO, HORA_AVISO_PADRAO)
+
+
+def interpretar_argumentos(argumentos=None):
+    """Lê as opções da linha de comando"""
+    parser = argparse.ArgumentParser(description="Lembretes de vencimento das despesas não pagas")
+    parser.add_argument('--mysql', action='store_true',
+                        help="lê as despesas do banco MySQL em vez do arquivo JSON")
+    parser.add_argument('--arquivo', default="dados_financeiros.json",
+                        help="arquivo JSON das despesas (padrão: %(default)s)")
+    parser.add_argument('--antecedencia', default=','.join(str(dias) for dias in ANTECEDENCIAS_PADRAO),
+                        help="dias de antecedência dos avisos, separados por vírgula (padrão: %(default)s)")
+    parser.add_argument('--hora', default=HORA_AVISO_PADRAO.strftime('%H:%M'),
+                        help="hora dos avisos no formato HH:MM (padrão: %(default)s)")
+    parser.add_argument('--intervalo', type=float, default=60.0,
+                        help="segundos entre verificações de alterações (padrão: %(default)s)")
+    parser.add_argument('--log', help="também acrescenta os avisos neste arquivo")
+    parser.add_argument('--comando',
+                        help="comando de notificação do sistema, chamado com título e texto (ex.: notify-send)")
+    parser.add_argument('--silencioso', action='store_true', help="não escreve os avisos no terminal")
+    parser.add_argument('--sem-vencidas', action='store_true', help="não avisa das despesas já vencidas")
+    return parser.parse_args(argumentos)
+
+
+def main(argumentos=None):
+    """Monta a fonte e os notificadores e executa os lembretes até Ctrl+C"""
+    opcoes = interpretar_argumentos(argumentos)
+    try:
+        antecedencias = [int(dias) for dias in opcoes.antecedencia.split(',') if dias.strip()]
+        hora_aviso = datetime.strptime(opcoes.hora, '%H:%M').time()
+    except ValueError:
+        print("❌ Use --antecedencia como 3,1,0 e --hora como HH:MM")
+        return 1
+    if any(dias < 0 for dias in antecedencias):
+        print("❌ As antecedências não podem ser negativas")
+        return 1
+
+    if opcoes.mysql:
+        from src.db.db_connection import DatabaseManager
+        fonte = FonteMySQL(DatabaseManager())
+    elif not os.path.exists(opcoes.arquivo):
+        print(f"❌ Arquivo '{opcoes.arquivo}' não encontrado (use --arquivo ou --mysql)")
+        return 1
+    else:
+        fonte = FonteArquivoJson(opcoes.arquivo)
+
+    notificadores = [] if opcoes.silencioso else [notificar_terminal]
+    if opcoes.log:
+        notificadores.append(NotificadorArquivo(opcoes.log))
+    if opcoes.comando:
+        notificadores.append(NotificadorComando(opcoes.comando))
+    if not notificadores:
+        print("❌ Nenhum destino para os avisos (use --log ou --comando com --silencioso)")
+        return 1
+
+    lembretes = LembretesVencimento(fonte, notificadores, antecedencias, hora_aviso,
+                                    opcoes.intervalo, avisar_vencidas=not opcoes.sem_vencidas)
+    print(f"🔔 Lembretes ativos ({fonte.descricao()}): avisos {opcoes.antecedencia} dia(s) antes, "
+          f"às {hora_aviso.strftime('%H:%M')}. Ctrl+C para sair.", flush=True)
+    try:
+        lembretes.executar()
+    except KeyboardInterrupt:
+        print("\n👋 Lembretes encerrados.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
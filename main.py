@@ -1,4 +1,5 @@
-from src.controllers.controle_gastos import ControleFinanceiro, Despesa, Receita
+from src.controllers.controle_gastos import ControleFinanceiro, Despesa, Receita, RegraRecorrencia
+from src.busca.autocompletar import ler_com_sugestoes
 from datetime import datetime, date
 import os
 
@@ -85,6 +86,7 @@ def menu_despesas():
     print("2️⃣  - Listar Despesas")
     print("3️⃣  - Marcar como Pago/Não Pago")
     print("4️⃣  - Remover Despesa")
+    print("5️⃣  - Despesas Fixas (Recorrentes)")
     print("0️⃣  - Voltar")
     print("-"*40)
 
@@ -105,10 +107,10 @@ def adicionar_despesa(controle: ControleFinanceiro):
         print("\n➕ ADICIONAR DESPESA")
         print("-"*30)
         
-        descricao = input("Descrição da despesa: ")
+        descricao = ler_com_sugestoes("Descrição da despesa (Tab sugere): ", controle.sugestoes, 'despesa', 'descricao')
         valor = obter_valor_valido("Valor (R$): ")
         data_despesa = obter_data_valida("Data da despesa (DD/MM/AAAA): ")
-        categoria = input("Categoria (opcional): ") or "Geral"
+        categoria = ler_com_sugestoes("Categoria (opcional): ", controle.sugestoes, 'despesa', 'categoria') or "Geral"
         
         # Perguntar se foi pago
         print("\n💰 Status do Pagamento:")
@@ -167,7 +169,7 @@ def listar_despesas(controle: ControleFinanceiro):
     print("Para qual mês deseja ver as despesas?")
     mes, ano = obter_mes_ano()
     
-    despesas = controle.obter_despesas_mes(mes, ano)
+    despesas = controle.obter_despesas_mes(mes, ano) + controle.obter_despesas_previstas(mes, ano)
     
     if not despesas:
         print(f"\n❌ Nenhuma despesa encontrada para {obter_mes_nome(mes)}/{ano}")
@@ -179,7 +181,7 @@ def listar_despesas(controle: ControleFinanceiro):
         total_pagas = 0
         
         for i, despesa in enumerate(despesas, 1):
-            status = "✅ PAGO" if despesa.pago else "❌ PENDENTE"
+            status = "✅ PAGO" if despesa.pago else ("🔁 PREVISTA (fixa)" if despesa.prevista else "❌ PENDENTE")
             data_pag = f" (Pago em: {despesa.data_pagamento.strftime('%d/%m/%Y')})" if despesa.data_pagamento else ""
             
             print(f"{i:2d}. {despesa.descricao}")
@@ -207,7 +209,7 @@ def marcar_pagamento_despesa(controle: ControleFinanceiro):
     print("Para qual mês?")
     mes, ano = obter_mes_ano()
     
-    despesas = controle.obter_despesas_mes(mes, ano)
+    despesas = controle.obter_despesas_mes(mes, ano) + controle.obter_despesas_previstas(mes, ano)
     
     if not despesas:
         print(f"\n❌ Nenhuma despesa encontrada para {obter_mes_nome(mes)}/{ano}")
@@ -216,7 +218,7 @@ def marcar_pagamento_despesa(controle: ControleFinanceiro):
     
     print(f"\n📋 DESPESAS DE {obter_mes_nome(mes).upper()}/{ano}:")
     for i, despesa in enumerate(despesas, 1):
-        status = "✅ PAGO" if despesa.pago else "❌ PENDENTE"
+        status = "✅ PAGO" if despesa.pago else ("🔁 PREVISTA" if despesa.prevista else "❌ PENDENTE")
         print(f"{i:2d}. {despesa.descricao} - R$ {despesa.valor:.2f} - {status}")
     
     try:
@@ -232,7 +234,7 @@ def marcar_pagamento_despesa(controle: ControleFinanceiro):
         despesa_selecionada = despesas[escolha - 1]
         
         if despesa_selecionada.pago:
-            despesa_selecionada.marcar_como_nao_pago()
+            controle.alterar_pagamento_despesa(despesa_selecionada, False)
             print(f"\n✅ Despesa '{despesa_selecionada.descricao}' marcada como NÃO PAGA!")
         else:
             data_pagamento = input("Data do pagamento (DD/MM/AAAA) ou Enter para hoje: ")
@@ -240,11 +242,9 @@ def marcar_pagamento_despesa(controle: ControleFinanceiro):
                 print("❌ Data inválida! Usando data de hoje.")
                 data_pagamento = None
             
-            despesa_selecionada.marcar_como_pago(data_pagamento)
+            controle.alterar_pagamento_despesa(despesa_selecionada, True, data_pagamento)
             print(f"\n✅ Despesa '{despesa_selecionada.descricao}' marcada como PAGA!")
         
-        controle.salvar_dados()
-        
     except ValueError:
         print("❌ Opção inválida!")
     
@@ -259,15 +259,16 @@ def remover_despesa(controle: ControleFinanceiro):
     mes, ano = obter_mes_ano()
     
     despesas = controle.obter_despesas_mes(mes, ano)
+    previstas = controle.obter_despesas_previstas(mes, ano)
     
-    if not despesas:
+    if not despesas and not previstas:
         print(f"\n❌ Nenhuma despesa encontrada para {obter_mes_nome(mes)}/{ano}")
         input("\nPressione Enter para continuar...")
         return
     
     print(f"\n📋 DESPESAS DE {obter_mes_nome(mes).upper()}/{ano}:")
-    for i, despesa in enumerate(despesas, 1):
-        status = "✅ PAGO" if despesa.pago else "❌ PENDENTE"
+    for i, despesa in enumerate(despesas + previstas, 1):
+        status = "✅ PAGO" if despesa.pago else ("🔁 PREVISTA" if despesa.prevista else "❌ PENDENTE")
         print(f"{i:2d}. {despesa.descricao} - R$ {despesa.valor:.2f} - {status}")
     
     try:
@@ -275,12 +276,21 @@ def remover_despesa(controle: ControleFinanceiro):
         if escolha == 0:
             return
         
-        if escolha < 1 or escolha > len(despesas):
+        if escolha < 1 or escolha > len(despesas) + len(previstas):
             print("❌ Opção inválida!")
             input("\nPressione Enter para continuar...")
             return
         
+        if escolha > len(despesas):
+            # Ocorrência prevista: some só deste mês, a regra continua nos demais
+            despesa_ignorada = previstas[escolha - len(despesas) - 1]
+            controle.ignorar_despesa_prevista(despesa_ignorada)
+            print(f"\n✅ '{despesa_ignorada.descricao}' não será cobrada em {obter_mes_nome(mes)}/{ano}!")
+            input("\nPressione Enter para continuar...")
+            return
+        
         despesa_removida = despesas.pop(escolha - 1)
+        controle.notificar_alteracao('despesa', mes, ano, despesa_removida, None)
         controle.salvar_dados()
         
         print(f"\n✅ Despesa '{despesa_removida.descricao}' removida com sucesso!")
@@ -296,10 +306,10 @@ def adicionar_receita(controle: ControleFinanceiro):
         print("\n➕ ADICIONAR RECEITA")
         print("-"*30)
         
-        descricao = input("Descrição da receita: ")
+        descricao = ler_com_sugestoes("Descrição da receita (Tab sugere): ", controle.sugestoes, 'receita', 'descricao')
         valor = obter_valor_valido("Valor (R$): ")
         data_recebimento = obter_data_valida("Data de recebimento (DD/MM/AAAA): ")
-        categoria = input("Categoria (opcional): ") or "Salário"
+        categoria = ler_com_sugestoes("Categoria (opcional): ", controle.sugestoes, 'receita', 'categoria') or "Salário"
         
         print("\nEm qual mês deseja adicionar esta receita?")
         mes, ano = obter_mes_ano()
@@ -380,6 +390,7 @@ def remover_receita(controle: ControleFinanceiro):
             return
         
         receita_removida = receitas.pop(escolha - 1)
+        controle.notificar_alteracao('receita', mes, ano, receita_removida, None)
         controle.salvar_dados()
         
         print(f"\n✅ Receita '{receita_removida.descricao}' removida com sucesso!")
@@ -435,8 +446,14 @@ def relatorio_mensal(controle: ControleFinanceiro):
     print(f"   ✅ Pagas: R$ {total_despesas_pagas:.2f}")
     print(f"   ❌ Pendentes: R$ {despesas_pendentes:.2f}")
     
+    # Despesas fixas previstas (ainda não lançadas) também saem do saldo final
+    total_previsto = controle.calcular_total_previsto(mes, ano)
+    if total_previsto:
+        print(f"   🔁 Fixas previstas: R$ {total_previsto:.2f}")
+        despesas_pendentes += total_previsto
+    
     # Saldo final
-    saldo_final = controle.calcular_saldo_final(mes, ano)
+    saldo_final = controle.calcular_saldo_final(mes, ano) - total_previsto
     saldo_disponivel = saldo_banco + total_receitas - total_despesas_pagas
     
     print("-"*60)
@@ -449,7 +466,7 @@ def relatorio_mensal(controle: ControleFinanceiro):
         print("⚠️  ATENÇÃO: Despesas pendentes excedem saldo disponível!")
     
     # Despesas próximas do vencimento
-    despesas = controle.obter_despesas_mes(mes, ano)
+    despesas = controle.obter_despesas_mes(mes, ano) + controle.obter_despesas_previstas(mes, ano)
     despesas_nao_pagas = [d for d in despesas if not d.pago]
     
     if despesas_nao_pagas:
@@ -466,7 +483,8 @@ def relatorio_mensal(controle: ControleFinanceiro):
             else:
                 status_venc = f"📅 Vence em {dias_vencimento} dias"
             
-            print(f"• {despesa.descricao} - R$ {despesa.valor:.2f} - {status_venc}")
+            prevista = " 🔁" if despesa.prevista else ""
+            print(f"• {despesa.descricao}{prevista} - R$ {despesa.valor:.2f} - {status_venc}")
     
     input("\nPressione Enter para continuar...")
 
@@ -486,7 +504,7 @@ def relatorio_anual(controle: ControleFinanceiro):
     
     for mes in range(1, 13):
         receitas_mes = controle.calcular_total_receitas(mes, ano)
-        despesas_mes = controle.calcular_total_despesas(mes, ano)
+        despesas_mes = controle.calcular_total_despesas(mes, ano) + controle.calcular_total_previsto(mes, ano)
         despesas_pagas_mes = controle.calcular_total_despesas_pagas(mes, ano)
         saldo_banco_mes = controle.obter_saldo_banco(mes, ano)
         
@@ -511,9 +529,89 @@ def relatorio_anual(controle: ControleFinanceiro):
     
     input("\nPressione Enter para continuar...")
 
+def gerenciar_despesas_fixas(controle: ControleFinanceiro):
+    """Cadastra, lista e encerra as regras de despesas fixas"""
+    while True:
+        print("\n🔁 DESPESAS FIXAS (RECORRENTES)")
+        print("-"*40)
+        regras = list(controle.regras_recorrencia.values())
+        if regras:
+            for i, regra in enumerate(regras, 1):
+                print(f"{i:2d}. {regra.descricao} - R$ {regra.valor:.2f} ({regra.categoria})")
+                print(f"    📅 {regra.descricao_periodicidade()}")
+        else:
+            print("Nenhuma despesa fixa cadastrada.")
+        
+        print("\n1️⃣  - Adicionar Despesa Fixa")
+        print("2️⃣  - Encerrar Despesa Fixa")
+        print("3️⃣  - Excluir Despesa Fixa")
+        print("0️⃣  - Voltar")
+        opcao = input("\nEscolha uma opção: ")
+        
+        if opcao == "1":
+            descricao = ler_com_sugestoes("Descrição (Tab sugere): ", controle.sugestoes, 'despesa', 'descricao')
+            valor = obter_valor_valido("Valor (R$): ")
+            primeiro = datetime.strptime(obter_data_valida("Primeiro vencimento (DD/MM/AAAA): "), "%d/%m/%Y")
+            categoria = ler_com_sugestoes("Categoria (opcional): ", controle.sugestoes, 'despesa', 'categoria') or "Geral"
+            try:
+                intervalo = int(input("Repetir a cada quantos meses? (padrão 1): ") or "1")
+            except ValueError:
+                intervalo = 1
+            data_fim = input("Até quando (DD/MM/AAAA) ou Enter para sem fim: ")
+            if data_fim and not validar_data(data_fim):
+                print("❌ Data inválida! A despesa fixa ficará sem data final.")
+                data_fim = None
+            
+            try:
+                regra = RegraRecorrencia(descricao, valor, primeiro.day, primeiro.month, primeiro.year,
+                                         categoria, intervalo, data_fim or None)
+                controle.adicionar_regra_recorrencia(regra)
+                print(f"\n✅ Despesa fixa '{descricao}' cadastrada: {regra.descricao_periodicidade()}")
+                print("💡 Cada mês aparece como prevista e é lançada quando for paga ou editada.")
+            except ValueError as e:
+                print(f"❌ {e}")
+            input("\nPressione Enter para continuar...")
+        
+        elif opcao in ("2", "3"):
+            if not regras:
+                continue
+            try:
+                escolha = int(input("Número da despesa fixa (0 para cancelar): "))
+            except ValueError:
+                escolha = -1
+            if escolha == 0:
+                continue
+            if escolha < 1 or escolha > len(regras):
+                print("❌ Opção inválida!")
+                input("\nPressione Enter para continuar...")
+                continue
+            regra = regras[escolha - 1]
+            
+            if opcao == "2":
+                data_fim = input("Último vencimento (DD/MM/AAAA) ou Enter para hoje: ")
+                if data_fim and not validar_data(data_fim):
+                    print("❌ Data inválida! Usando data de hoje.")
+                    data_fim = None
+                controle.encerrar_regra_recorrencia(regra.id, data_fim or None)
+                print(f"\n✅ Despesa fixa '{regra.descricao}' encerrada: {regra.descricao_periodicidade()}")
+            else:
+                confirmar = input(f"Excluir '{regra.descricao}'? As despesas já lançadas são mantidas (s/N): ").lower()
+                if confirmar == 's':
+                    controle.remover_regra_recorrencia(regra.id)
+                    print(f"\n✅ Despesa fixa '{regra.descricao}' excluída!")
+            input("\nPressione Enter para continuar...")
+        
+        elif opcao == "0":
+            break
+        else:
+            print("❌ Opção inválida!")
+            input("\nPressione Enter para continuar...")
+
 def main():
     """Função principal do programa"""
     controle = ControleFinanceiro()
+    # Sugestões de descrição/categoria montadas em segundo plano a partir do histórico
+    controle.sugestoes.iniciar_em_segundo_plano()
     
     while True:
         limpar_tela()
@@ -539,6 +637,8 @@ def main():
                         marcar_pagamento_despesa(controle)
                     elif opcao_despesa == "4":
                         remover_despesa(controle)
+                    elif opcao_despesa == "5":
+                        gerenciar_despesas_fixas(controle)
                     elif opcao_despesa == "0":
                         break
                     else:
@@ -2,8 +2,11 @@
 # Importar versão MySQL do controle financeiro
 from src.controllers.controle_avancado_mysql import ControleFinanceiroAvancado, ContaBancaria, MetaGasto
 from src.controllers.controle_gastos import Despesa, Receita
+from src.busca.consulta import AJUDA_CONSULTA, interpretar_consulta
+from src.busca.autocompletar import ler_com_sugestoes
 from datetime import datetime, date
 import os
+import time
 import sys
 
 def limpar_tela():
@@ -111,6 +114,7 @@ def menu_despesas():
     print("3️⃣  - Pagar Despesa (Saldo Automático)")
     print("4️⃣  - Marcar como Pago/Não Pago")
     print("5️⃣  - Remover Despesa")
+    print("6️⃣  - Despesas Fixas (Recorrentes)")
     print("0️⃣  - Voltar")
     print("-"*40)
 
@@ -141,6 +145,10 @@ def menu_relatorios():
     print("3️⃣  - Gráfico Comparativo Mensal")
     print("4️⃣  - Análise por Categoria")
     print("5️⃣  - Relatório de Contas")
+    print("6️⃣  - Previsão de Fluxo de Caixa")
+    print("7️⃣  - Médias Móveis e Taxa de Poupança")
+    print("8️⃣  - Simulação de Orçamento (Monte Carlo)")
+    print("9️⃣  - Desempenho do Banco de Dados")
     print("0️⃣  - Voltar")
     print("-"*40)
 
@@ -307,7 +315,7 @@ def pagar_despesa_automatico(controle: ControleFinanceiroAvancado):
     print("Para qual mês?")
     mes, ano = obter_mes_ano()
     
-    despesas = controle.obter_despesas_mes(mes, ano)
+    despesas = controle.obter_despesas_mes(mes, ano) + controle.obter_despesas_previstas(mes, ano)
     despesas_nao_pagas = [d for d in despesas if not d.pago]
     
     if not despesas_nao_pagas:
@@ -317,7 +325,8 @@ def pagar_despesa_automatico(controle: ControleFinanceiroAvancado):
     
     print(f"\n💸 DESPESAS PENDENTES - {obter_mes_nome(mes).upper()}/{ano}:")
     for i, despesa in enumerate(despesas_nao_pagas, 1):
-        print(f"{i:2d}. {despesa.descricao} - R$ {despesa.valor:.2f}")
+        prevista = " 🔁 (fixa prevista)" if despesa.prevista else ""
+        print(f"{i:2d}. {despesa.descricao} - R$ {despesa.valor:.2f}{prevista}")
         print(f"    📅 Vencimento: {despesa.data_vencimento.strftime('%d/%m/%Y')}")
     
     try:
@@ -389,10 +398,10 @@ def processar_receita_automatico(controle: ControleFinanceiroAvancado):
     print("\n💰 PROCESSAR RECEITA (SALDO AUTOMÁTICO)")
     print("-"*50)
     
-    descricao = input("Descrição da receita: ")
+    descricao = ler_com_sugestoes("Descrição da receita (Tab sugere): ", controle.sugestoes, 'receita', 'descricao')
     valor = obter_valor_valido("Valor (R$): ")
     data_recebimento = obter_data_valida("Data de recebimento (DD/MM/AAAA): ")
-    categoria = input("Categoria (opcional): ") or "Receita"
+    categoria = ler_com_sugestoes("Categoria (opcional): ", controle.sugestoes, 'receita', 'categoria') or "Receita"
     
     print("\nEm qual mês deseja adicionar esta receita?")
     mes, ano = obter_mes_ano()
@@ -440,69 +449,150 @@ def processar_receita_automatico(controle: ControleFinanceiroAvancado):
     
     input("\nPressione Enter para continuar...")
 
+def paginar_resultados(resultados, exibir, total: int, por_pagina: int = 10) -> int:
+    """Exibe os resultados conforme chegam, pausando a cada página; retorna quantos foram exibidos"""
+    exibidos = 0
+    for item in resultados:
+        exibidos += 1
+        exibir(exibidos, item)
+        if exibidos % por_pagina == 0 and exibidos < total:
+            resposta = input(f"📄 {exibidos}/{total} - Enter para a próxima página, 's' para sair: ")
+            if resposta.strip().lower() == 's':
+                break
+    return exibidos
+
+def mostrar_resultados_aproximados(resultados, termo: str):
+    """Lista os registros parecidos com o termo (busca tolerante a erros de digitação)"""
+    if not resultados:
+        return
+    print(f"\n🔎 Você quis dizer... (parecidos com '{termo}'):")
+    for i, (registro, mes, ano, valor) in enumerate(resultados, 1):
+        print(f"{i:2d}. {registro.descricao} - R$ {registro.valor:.2f} "
+              f"({obter_mes_nome(mes)}/{ano}) - {valor * 100:.0f}% semelhante")
+
+def ler_consulta(tipo: str):
+    """
+    Lê a consulta em uma linha. Retorna (argumentos da busca, explicar, tempo de
+    interpretação), (None, False, 0) se o usuário preferir a busca guiada, ou
+    None se a consulta for inválida.
+    """
+    print("Consulta em uma linha (Enter para a busca guiada). Exemplo:")
+    print('  categoria:alimentação valor>100 desde:01/01/2024 pago:nao "mercado"')
+    print(AJUDA_CONSULTA)
+    linha = input("🔎 ").strip()
+    if not linha:
+        return None, False, 0.0
+    
+    try:
+        inicio = time.perf_counter()
+        consulta = interpretar_consulta(linha)
+        argumentos = consulta.argumentos(tipo)
+        return argumentos, consulta.explicar, time.perf_counter() - inicio
+    except ValueError as e:
+        print(f"❌ Consulta inválida: {e}")
+        return None
+
+def medir_primeiro_resultado(resultados, tempos: dict):
+    """Repassa os resultados anotando quanto tempo levou para chegar o primeiro"""
+    inicio = time.perf_counter()
+    for item in resultados:
+        tempos.setdefault('primeiro', time.perf_counter() - inicio)
+        yield item
+
+def mostrar_tempos_busca(tempos: dict):
+    """Tempos da busca para o --explain"""
+    print("\n⏱️ TEMPOS")
+    print(f"   Interpretação da consulta: {tempos.get('interpretacao', 0) * 1000:.2f} ms")
+    print(f"   Contagem e total: {tempos.get('resumo', 0) * 1000:.1f} ms")
+    if 'primeiro' in tempos:
+        print(f"   Primeiro resultado: {tempos['primeiro'] * 1000:.1f} ms")
+
 def buscar_despesas_avancado(controle: ControleFinanceiroAvancado):
     """Busca avançada de despesas"""
     print("\n🔍 BUSCA AVANÇADA DE DESPESAS")
     print("-"*40)
     
-    termo = input("Termo na descrição (opcional): ")
-    categoria = input("Categoria (opcional): ")
-    
-    valor_min_str = input("Valor mínimo (opcional): ")
-    valor_min = float(valor_min_str.replace(',', '.')) if valor_min_str else 0
-    
-    valor_max_str = input("Valor máximo (opcional): ")
-    valor_max = float(valor_max_str.replace(',', '.')) if valor_max_str else float('inf')
-    
-    print("\nStatus de pagamento:")
-    print("1 - Apenas pagas")
-    print("2 - Apenas pendentes")
-    print("3 - Todas")
+    lida = ler_consulta('despesa')
+    if lida is None:
+        input("\nPressione Enter para continuar...")
+        return
+    filtros, explicar, tempo_interpretacao = lida
     
-    try:
-        status_opcao = int(input("Escolha (3 para todas): ") or "3")
-        if status_opcao == 1:
-            apenas_pagas = True
-        elif status_opcao == 2:
-            apenas_pagas = False
-        else:
+    if filtros is None:
+        termo = input("Termo na descrição (opcional): ")
+        categoria = ler_com_sugestoes("Categoria (opcional): ", controle.sugestoes, 'despesa', 'categoria')
+        
+        valor_min_str = input("Valor mínimo (opcional): ")
+        valor_min = float(valor_min_str.replace(',', '.')) if valor_min_str else 0
+        
+        valor_max_str = input("Valor máximo (opcional): ")
+        valor_max = float(valor_max_str.replace(',', '.')) if valor_max_str else float('inf')
+        
+        print("\nStatus de pagamento:")
+        print("1 - Apenas pagas")
+        print("2 - Apenas pendentes")
+        print("3 - Todas")
+        
+        try:
+            status_opcao = int(input("Escolha (3 para todas): ") or "3")
+            if status_opcao == 1:
+                apenas_pagas = True
+            elif status_opcao == 2:
+                apenas_pagas = False
+            else:
+                apenas_pagas = None
+        except ValueError:
             apenas_pagas = None
-    except ValueError:
-        apenas_pagas = None
-    
-    data_inicio = obter_data_valida("Data início (DD/MM/AAAA, opcional): ")
-    data_fim = obter_data_valida("Data fim (DD/MM/AAAA, opcional): ")
-    
-    # Realizar busca
-    resultados = controle.buscar_despesas(
-        termo=termo,
-        categoria=categoria,
-        valor_min=valor_min,
-        valor_max=valor_max,
-        apenas_pagas=apenas_pagas,
-        data_inicio=data_inicio,
-        data_fim=data_fim
-    )
-    
-    print(f"\n🔍 RESULTADOS DA BUSCA ({len(resultados)} encontrados):")
+        
+        data_inicio = obter_data_valida("Data início (DD/MM/AAAA, opcional): ")
+        data_fim = obter_data_valida("Data fim (DD/MM/AAAA, opcional): ")
+        
+        filtros = {
+            'termo': termo,
+            'categoria': categoria,
+            'valor_min': valor_min,
+            'valor_max': valor_max,
+            'apenas_pagas': apenas_pagas,
+            'data_inicio': data_inicio,
+            'data_fim': data_fim
+        }
+    
+    tempos = {'interpretacao': tempo_interpretacao}
+    if explicar:
+        print("\n🧭 " + controle.explicar_busca_despesas(**filtros))
+    
+    # Realizar busca: o resumo vem do banco e os registros chegam página a página
+    inicio = time.perf_counter()
+    resumo = controle.resumir_busca_despesas(**filtros)
+    tempos['resumo'] = time.perf_counter() - inicio
+    
+    print(f"\n🔍 RESULTADOS DA BUSCA ({resumo['quantidade']} encontrados):")
     print("="*60)
     
-    if not resultados:
+    if not resumo['quantidade']:
         print("❌ Nenhuma despesa encontrada com os critérios especificados.")
+        if filtros['termo']:
+            mostrar_resultados_aproximados(controle.buscar_despesas_aproximado(filtros['termo'], limite=10),
+                                           filtros['termo'])
     else:
-        total_valor = 0
-        for i, (despesa, mes, ano) in enumerate(resultados, 1):
+        def exibir_despesa(i, item):
+            despesa, mes, ano = item
             status = "✅ PAGO" if despesa.pago else "❌ PENDENTE"
-            print(f"{i:2d}. {despesa.descricao}")
+            prevista = " 🔁 (fixa prevista)" if despesa.prevista else ""
+            print(f"{i:2d}. {despesa.descricao}{prevista}")
             print(f"    💰 Valor: R$ {despesa.valor:.2f}")
             print(f"    📅 Vencimento: {despesa.data_vencimento.strftime('%d/%m/%Y')}")
             print(f"    📂 Categoria: {despesa.categoria}")
             print(f"    📆 Mês/Ano: {obter_mes_nome(mes)}/{ano}")
             print(f"    🔄 Status: {status}")
             print("-"*40)
-            total_valor += despesa.valor
         
-        print(f"\n💰 VALOR TOTAL: R$ {total_valor:.2f}")
+        resultados = medir_primeiro_resultado(controle.iterar_busca_despesas(**filtros), tempos)
+        paginar_resultados(resultados, exibir_despesa, resumo['quantidade'])
+        print(f"\n💰 VALOR TOTAL: R$ {resumo['total']:.2f}")
+    
+    if explicar:
+        mostrar_tempos_busca(tempos)
     
     input("\nPressione Enter para continuar...")
 
@@ -511,46 +601,68 @@ def buscar_receitas_avancado(controle: ControleFinanceiroAvancado):
     print("\n🔍 BUSCA AVANÇADA DE RECEITAS")
     print("-"*40)
     
-    termo = input("Termo na descrição (opcional): ")
-    categoria = input("Categoria (opcional): ")
-    
-    valor_min_str = input("Valor mínimo (opcional): ")
-    valor_min = float(valor_min_str.replace(',', '.')) if valor_min_str else 0
-    
-    valor_max_str = input("Valor máximo (opcional): ")
-    valor_max = float(valor_max_str.replace(',', '.')) if valor_max_str else float('inf')
+    lida = ler_consulta('receita')
+    if lida is None:
+        input("\nPressione Enter para continuar...")
+        return
+    filtros, explicar, tempo_interpretacao = lida
     
-    data_inicio = obter_data_valida("Data início (DD/MM/AAAA, opcional): ")
-    data_fim = obter_data_valida("Data fim (DD/MM/AAAA, opcional): ")
+    if filtros is None:
+        termo = input("Termo na descrição (opcional): ")
+        categoria = ler_com_sugestoes("Categoria (opcional): ", controle.sugestoes, 'receita', 'categoria')
+        
+        valor_min_str = input("Valor mínimo (opcional): ")
+        valor_min = float(valor_min_str.replace(',', '.')) if valor_min_str else 0
+        
+        valor_max_str = input("Valor máximo (opcional): ")
+        valor_max = float(valor_max_str.replace(',', '.')) if valor_max_str else float('inf')
+        
+        data_inicio = obter_data_valida("Data início (DD/MM/AAAA, opcional): ")
+        data_fim = obter_data_valida("Data fim (DD/MM/AAAA, opcional): ")
+        
+        filtros = {
+            'termo': termo,
+            'categoria': categoria,
+            'valor_min': valor_min,
+            'valor_max': valor_max,
+            'data_inicio': data_inicio,
+            'data_fim': data_fim
+        }
     
     # Realizar busca
     try:
-        resultados = controle.buscar_receitas(
-            termo=termo,
-            categoria=categoria,
-            valor_min=valor_min,
-            valor_max=valor_max,
-            data_inicio=data_inicio,
-            data_fim=data_fim
-        )
-        
-        print(f"\n🔍 RESULTADOS DA BUSCA ({len(resultados)} encontrados):")
+        tempos = {'interpretacao': tempo_interpretacao}
+        if explicar:
+            print("\n🧭 " + controle.explicar_busca_receitas(**filtros))
+        
+        inicio = time.perf_counter()
+        resumo = controle.resumir_busca_receitas(**filtros)
+        tempos['resumo'] = time.perf_counter() - inicio
+        
+        print(f"\n🔍 RESULTADOS DA BUSCA ({resumo['quantidade']} encontrados):")
         print("="*60)
         
-        if not resultados:
+        if not resumo['quantidade']:
             print("❌ Nenhuma receita encontrada com os critérios especificados.")
+            if filtros['termo']:
+                mostrar_resultados_aproximados(controle.buscar_receitas_aproximado(filtros['termo'], limite=10),
+                                               filtros['termo'])
         else:
-            total_valor = 0
-            for i, (receita, mes, ano) in enumerate(resultados, 1):
+            def exibir_receita(i, item):
+                receita, mes, ano = item
                 print(f"{i:2d}. {receita.descricao}")
                 print(f"    💰 Valor: R$ {receita.valor:.2f}")
                 print(f"    📅 Data de Recebimento: {receita.data_recebimento.strftime('%d/%m/%Y')}")
                 print(f"    📂 Categoria: {receita.categoria}")
                 print(f"    📆 Mês/Ano: {obter_mes_nome(mes)}/{ano}")
                 print("-"*40)
-                total_valor += receita.valor
             
-            print(f"\n💰 VALOR TOTAL: R$ {total_valor:.2f}")
+            resultados = medir_primeiro_resultado(controle.iterar_busca_receitas(**filtros), tempos)
+            paginar_resultados(resultados, exibir_receita, resumo['quantidade'])
+            print(f"\n💰 VALOR TOTAL: R$ {resumo['total']:.2f}")
+        
+        if explicar:
+            mostrar_tempos_busca(tempos)
     
     except Exception as e:
         print(f"\n❌ Erro inesperado: {e}")
@@ -1233,6 +1345,7 @@ def mostrar_alertas(controle: ControleFinanceiroAvancado):
     alertas_metas = controle.obter_alertas_metas(mes, ano)
     
     # Alertas de vencimento
+    despesas_vencidas = controle.obter_despesas_vencidas()
     despesas_vencendo = controle.obter_despesas_vencendo(7)
     
     # Alertas de saldo baixo
@@ -1242,7 +1355,7 @@ def mostrar_alertas(controle: ControleFinanceiroAvancado):
         if saldo < 100:  # Critério de saldo baixo
             alertas_saldo.append(f"💰 Saldo baixo na conta '{nome_conta}': R$ {saldo:.2f}")
     
-    total_alertas = len(alertas_metas) + len(despesas_vencendo) + len(alertas_saldo)
+    total_alertas = len(alertas_metas) + len(despesas_vencidas) + len(despesas_vencendo) + len(alertas_saldo)
     
     if total_alertas == 0:
         print("\n✅ Nenhum alerta no momento! Tudo sob controle.")
@@ -1256,6 +1369,13 @@ def mostrar_alertas(controle: ControleFinanceiroAvancado):
             for alerta in alertas_metas:
                 print(f"  {alerta}")
         
+        # Mostrar despesas vencidas
+        if despesas_vencidas:
+            print(f"\n❗ DESPESAS VENCIDAS ({len(despesas_vencidas)}):")
+            for despesa, mes_desp, ano_desp in despesas_vencidas[-5:]:  # As 5 mais recentes
+                dias = (date.today() - despesa.data_vencimento).days
+                print(f"  🔥 {despesa.descricao} - R$ {despesa.valor:.2f} (vencida há {dias} dias)")
+        
         # Mostrar alertas de vencimento
         if despesas_vencendo:
             print("\n⏰ DESPESAS VENCENDO (próximos 7 dias):")
@@ -1274,6 +1394,182 @@ def mostrar_alertas(controle: ControleFinanceiroAvancado):
     
     input("\nPressione Enter para continuar...")
 
+def mostrar_previsao_fluxo(controle: ControleFinanceiroAvancado):
+    """Mostra a projeção de saldo para os próximos meses"""
+    print("\n🔮 PREVISÃO DE FLUXO DE CAIXA")
+    print("-"*40)
+    
+    try:
+        meses = int(input("Projetar quantos meses? (padrão 3): ") or "3")
+    except ValueError:
+        meses = 3
+    
+    try:
+        from src.analise.previsao import PrevisaoFluxoCaixa
+        
+        previsao = PrevisaoFluxoCaixa(controle, meses)
+        resultado = previsao.calcular()
+        
+        print(f"\n📅 PROJEÇÃO ATÉ {previsao.data_final.strftime('%d/%m/%Y')}:")
+        print("="*60)
+        for item in previsao.resumo_mensal(resultado):
+            print(f"  {obter_mes_nome(item['mes'])}/{item['ano']}: "
+                  f"saldo final R$ {item['saldo_final']:.2f} | menor saldo R$ {item['saldo_minimo']:.2f}")
+        
+        print("\n🏦 CONTAS:")
+        for nome_conta in resultado['contas']:
+            data_negativo = resultado['primeiro_negativo'][nome_conta]
+            if data_negativo:
+                print(f"  ⚠️ {nome_conta}: fica negativa em {data_negativo.strftime('%d/%m/%Y')}")
+            else:
+                print(f"  ✅ {nome_conta}: permanece positiva")
+        
+        if resultado['primeiro_negativo_total']:
+            print(f"\n🚨 Saldo total negativo a partir de {resultado['primeiro_negativo_total'].strftime('%d/%m/%Y')}")
+    except Exception as e:
+        print(f"❌ Erro ao calcular previsão: {e}")
+    
+    input("\nPressione Enter para continuar...")
+
+def analise_por_categoria(controle: ControleFinanceiroAvancado):
+    """Mostra as estatísticas de gastos por categoria e os desvios do mês"""
+    print("\n📊 ANÁLISE POR CATEGORIA")
+    print("-"*40)
+    
+    estatisticas = controle.obter_estatisticas_categorias()
+    if not estatisticas:
+        print("📭 Nenhuma despesa paga para analisar.")
+        input("\nPressione Enter para continuar...")
+        return
+    
+    print(f"\n{'Categoria':<18}{'Qtd':>5}{'Mediana':>12}{'P90':>12}{'Média':>12}{'Desvio':>12}{'Média/mês':>12}")
+    print("="*83)
+    for item in estatisticas:
+        print(f"{item['categoria'][:17]:<18}{item['quantidade']:>5}"
+              f"{item['mediana']:>12.2f}{item['p90']:>12.2f}{item['media']:>12.2f}"
+              f"{item['desvio_padrao']:>12.2f}{item['media_mensal']:>12.2f}")
+    
+    print("\nVerificar gastos fora do padrão em qual mês?")
+    mes, ano = obter_mes_ano()
+    atipicas = controle.obter_categorias_atipicas(mes, ano)
+    
+    if atipicas:
+        print(f"\n⚠️ GASTOS FORA DO PADRÃO EM {obter_mes_nome(mes).upper()}/{ano}:")
+        for item in atipicas:
+            direcao = "acima" if item['z'] > 0 else "abaixo"
+            print(f"  • {item['categoria']}: R$ {item['total']:.2f} "
+                  f"({direcao} da média de R$ {item['media_mensal']:.2f}, z = {item['z']:.1f})")
+    else:
+        print(f"\n✅ Nenhuma categoria fora do padrão em {obter_mes_nome(mes)}/{ano}.")
+    
+    input("\nPressione Enter para continuar...")
+
+def mostrar_medias_moveis(controle: ControleFinanceiroAvancado):
+    """Mostra as médias móveis de 3, 6 e 12 meses terminadas no mês escolhido"""
+    print("\n📈 MÉDIAS MÓVEIS E TAXA DE POUPANÇA")
+    print("-"*40)
+    
+    print("Médias terminadas em qual mês?")
+    mes, ano = obter_mes_ano()
+    resumo = controle.janelas_moveis.resumo_mes(mes, ano)
+    
+    if not resumo['categorias']:
+        print("📭 Nenhum lançamento registrado até este mês.")
+        input("\nPressione Enter para continuar...")
+        return
+    
+    print(f"\n📊 MÉDIA MENSAL DE GASTOS ATÉ {obter_mes_nome(mes).upper()}/{ano}")
+    print(f"{'Categoria':<20}{'3 meses':>14}{'6 meses':>14}{'12 meses':>14}")
+    print("="*62)
+    for categoria, janelas in sorted(resumo['categorias'].items(), key=lambda item: -item[1][12]['soma']):
+        if janelas[12]['soma'] == 0:
+            continue
+        print(f"{categoria[:19]:<20}{janelas[3]['media']:>14.2f}{janelas[6]['media']:>14.2f}{janelas[12]['media']:>14.2f}")
+    print("-"*62)
+    total = resumo['total']
+    print(f"{'TOTAL':<20}{total[3]['media']:>14.2f}{total[6]['media']:>14.2f}{total[12]['media']:>14.2f}")
+    
+    print("\n💰 TAXA DE POUPANÇA:")
+    for tamanho, taxa in resumo['taxa_poupanca'].items():
+        if taxa != taxa:  # NaN: sem receitas na janela
+            print(f"  {tamanho:>2} meses: sem receitas no período")
+        else:
+            print(f"  {tamanho:>2} meses: {taxa * 100:.1f}%")
+    
+    input("\nPressione Enter para continuar...")
+
+def mostrar_desempenho_banco(controle: ControleFinanceiroAvancado):
+    """Mostra as métricas do pool de conexões com o MySQL"""
+    print("\n🗄️ DESEMPENHO DO BANCO DE DADOS")
+    print("-"*40)
+    
+    estatisticas = controle.db.estatisticas_pool()
+    print(f"🔌 Pool: {estatisticas['tamanho_pool']} conexões | "
+          f"reset de sessão: {'sim' if estatisticas['reset_sessao'] else 'não'} | "
+          f"espera máxima: {estatisticas['timeout_aquisicao']:g}s")
+    print(f"📥 Retiradas: {estatisticas['retiradas']} | Em uso: {estatisticas['em_uso']} | "
+          f"Pico de uso: {estatisticas['pico_em_uso']}")
+    print(f"❌ Erros: {estatisticas['erros']} (pool esgotado: {estatisticas['timeouts']})")
+    carga = controle.estatisticas_carga
+    print(f"🚀 Carga inicial: mês atual em {carga['tempo_mes_atual']:.2f}s | "
+          f"completa: {carga['consultas']} consultas em {carga['tempo']:.2f}s"
+          f"{'' if carga['concluida'] else ' (em andamento)'}")
+    print(f"⏱️ Espera por conexão: média {estatisticas['espera_media_ms']:.2f} ms | "
+          f"máxima {estatisticas['espera_maxima_ms']:.2f} ms")
+    
+    print("\n📊 HISTOGRAMA DE ESPERA:")
+    maior = max(estatisticas['histograma_espera'].values()) or 1
+    for faixa, quantidade in estatisticas['histograma_espera'].items():
+        print(f"  {faixa:>11}: {'█' * round(quantidade / maior * 30):<30} {quantidade}")
+    
+    consultas = controle.db.estatisticas_consultas_preparadas()
+    print("\n⚡ CONSULTAS PREPARADAS:" + ("" if estatisticas['cache_consultas'] else " (desativadas: DB_CACHE_CONSULTAS=false)"))
+    print(f"  Acertos: {consultas['acertos']} | Preparações: {consultas['preparos']} | "
+          f"Taxa de acerto: {consultas['taxa_acerto'] * 100:.1f}%")
+    for nome, dados in consultas['por_consulta'].items():
+        print(f"  {nome:<28} {dados['acertos']:>6} / {dados['preparos']:<4} {dados['taxa_acerto'] * 100:>6.1f}%")
+    
+    input("\nPressione Enter para continuar...")
+
+def mostrar_simulacao_orcamento(controle: ControleFinanceiroAvancado):
+    """Mostra a distribuição do saldo simulado e o risco de estourar as metas"""
+    print("\n🎲 SIMULAÇÃO DE ORÇAMENTO (MONTE CARLO)")
+    print("-"*40)
+    
+    try:
+        meses = int(input("Simular quantos meses? (padrão 12): ") or "12")
+    except ValueError:
+        meses = 12
+    
+    try:
+        inicio = time.time()
+        resultado = controle.simular_orcamento(meses=meses)
+        duracao = time.time() - inicio
+        
+        print(f"\n📊 {len(resultado['saldos_finais'])} CENÁRIOS EM {duracao:.2f}s "
+              f"({resultado['meses_historico']} meses de histórico)")
+        print("="*60)
+        print(f"💰 Saldo atual:            R$ {resultado['saldo_inicial']:.2f}")
+        print(f"📅 Lançamentos conhecidos: R$ {resultado['fluxo_conhecido']:.2f}")
+        print(f"\n📈 SALDO AO FIM DE {meses} MESES:")
+        for percentil, saldo in resultado['percentis'].items():
+            print(f"  P{percentil:<3} R$ {saldo:.2f}")
+        print(f"  Média R$ {resultado['media']:.2f}")
+        
+        if resultado['probabilidade_negativo'] > 0:
+            print(f"\n⚠️ Chance de terminar negativo: {resultado['probabilidade_negativo'] * 100:.1f}%")
+        
+        if resultado['metas']:
+            print("\n🎯 RISCO DE ESTOURAR AS METAS:")
+            for meta in resultado['metas']:
+                print(f"  • {meta['categoria']} ({meta['mes']:02d}/{meta['ano']}): "
+                      f"{meta['probabilidade_estouro'] * 100:.1f}% "
+                      f"(limite R$ {meta['limite']:.2f}, gasto mediano R$ {meta['gasto_mediano']:.2f})")
+    except Exception as e:
+        print(f"❌ Erro na simulação: {e}")
+    
+    input("\nPressione Enter para continuar...")
+
 def relatorio_mensal_avancado(controle: ControleFinanceiroAvancado):
     """Mostra o relatório mensal completo com saldo total de todas as contas"""
     print("\n📊 RELATÓRIO MENSAL AVANÇADO")
@@ -1317,8 +1613,14 @@ def relatorio_mensal_avancado(controle: ControleFinanceiroAvancado):
     print(f"   ✅ Pagas: R$ {total_despesas_pagas:.2f}")
     print(f"   ❌ Pendentes: R$ {despesas_pendentes:.2f}")
     
+    # Despesas fixas previstas (ainda não lançadas) também saem do saldo final
+    total_previsto = controle.calcular_total_previsto(mes, ano)
+    if total_previsto:
+        print(f"   🔁 Fixas previstas: R$ {total_previsto:.2f}")
+        despesas_pendentes += total_previsto
+    
     # Saldo final
-    saldo_final = controle.calcular_saldo_final(mes, ano)
+    saldo_final = controle.calcular_saldo_final(mes, ano) - total_previsto
     saldo_disponivel = saldo_total_contas + total_receitas - total_despesas_pagas
     
     print("-"*60)
@@ -1347,7 +1649,7 @@ def relatorio_mensal_avancado(controle: ControleFinanceiroAvancado):
         print(f"💵 Saldo positivo: R$ {saldo_final:.2f}")
     
     # Mostrar apenas despesas próximas do vencimento (próximos 7 dias)
-    despesas = controle.obter_despesas_mes(mes, ano)
+    despesas = controle.obter_despesas_mes(mes, ano) + controle.obter_despesas_previstas(mes, ano)
     despesas_nao_pagas = [d for d in despesas if not d.pago]
     hoje = date.today()
     
@@ -1484,7 +1786,7 @@ def remover_despesa_mysql(controle: ControleFinanceiroAvancado):
     print("De qual mês?")
     mes, ano = obter_mes_ano()
     
-    despesas = controle.obter_despesas_mes(mes, ano)
+    despesas = controle.obter_despesas_mes(mes, ano) + controle.obter_despesas_previstas(mes, ano)
     
     if not despesas:
         print(f"\n❌ Nenhuma despesa encontrada para {obter_mes_nome(mes)}/{ano}")
@@ -1493,7 +1795,7 @@ def remover_despesa_mysql(controle: ControleFinanceiroAvancado):
     
     print(f"\n📋 DESPESAS DE {obter_mes_nome(mes).upper()}/{ano}:")
     for i, despesa in enumerate(despesas, 1):
-        status = "✅ PAGO" if despesa.pago else "❌ PENDENTE"
+        status = "✅ PAGO" if despesa.pago else ("🔁 PREVISTA" if despesa.prevista else "❌ PENDENTE")
         print(f"{i:2d}. {despesa.descricao} - R$ {despesa.valor:.2f} - {status}")
     
     try:
@@ -1508,8 +1810,12 @@ def remover_despesa_mysql(controle: ControleFinanceiroAvancado):
         
         despesa_selecionada = despesas[escolha - 1]
         
-        # Usar o método específico do MySQL
-        sucesso = controle.remover_despesa(despesa_selecionada, mes, ano)
+        if despesa_selecionada.prevista:
+            # Ocorrência prevista: some só deste mês, a regra continua nos demais
+            sucesso = controle.ignorar_despesa_prevista(despesa_selecionada)
+        else:
+            # Usar o método específico do MySQL
+            sucesso = controle.remover_despesa(despesa_selecionada, mes, ano)
         
         if sucesso:
             print(f"\n✅ Despesa '{despesa_selecionada.descricao}' removida com sucesso!")
@@ -1591,6 +1897,8 @@ def main():
         input()
     
     controle = ControleFinanceiroAvancado()
+    # Sugestões de descrição/categoria montadas em segundo plano a partir do histórico
+    controle.sugestoes.iniciar_em_segundo_plano()
     
     # Migrar conta padrão para Carteira se necessário
     migrar_conta_padrao_para_carteira(controle)
@@ -1609,6 +1917,8 @@ def main():
         
         try:
             opcao = input("Escolha uma opção: ")
+            # Demais meses carregados em segundo plano enquanto o menu esperava
+            controle.concluir_carga()
             
             if opcao == "1":
                 # Gerenciar Contas Bancárias
@@ -1662,7 +1972,7 @@ def main():
             
             elif opcao == "2":
                 # Gerenciar Despesas (usando funções adaptadas para MySQL)
-                from main import adicionar_despesa, listar_despesas, marcar_pagamento_despesa
+                from main import adicionar_despesa, listar_despesas, marcar_pagamento_despesa, gerenciar_despesas_fixas
                 
                 while True:
                     limpar_tela()
@@ -1681,6 +1991,8 @@ def main():
                         marcar_pagamento_despesa(controle)
                     elif opcao_despesa == "5":
                         remover_despesa_mysql(controle)
+                    elif opcao_despesa == "6":
+                        gerenciar_despesas_fixas(controle)
                     elif opcao_despesa == "0":
                         break
                     else:
@@ -1749,10 +2061,17 @@ def main():
                     elif opcao_relatorio == "3":
                         gerar_grafico_comparativo(controle)
                     elif opcao_relatorio == "4":
-                        print("📊 Análise por categoria disponível nos gráficos")
-                        input("\nPressione Enter para continuar...")
+                        analise_por_categoria(controle)
                     elif opcao_relatorio == "5":
                         listar_contas(controle)
+                    elif opcao_relatorio == "6":
+                        mostrar_previsao_fluxo(controle)
+                    elif opcao_relatorio == "7":
+                        mostrar_medias_moveis(controle)
+                    elif opcao_relatorio == "8":
+                        mostrar_simulacao_orcamento(controle)
+                    elif opcao_relatorio == "9":
+                        mostrar_desempenho_banco(controle)
                     elif opcao_relatorio == "0":
                         break
                     else:
@@ -0,0 +1,12 @@
+"""
+Módulo de análises e projeções financeiras
+"""
+from .previsao import PrevisaoFluxoCaixa
+from .cubo import CuboGastos
+from .estatisticas import EstatisticasGastos
+from .janelas import JanelasMoveis
+from .recorrencia import RegraRecorrencia
+from .simulacao import SimulacaoOrcamento
+
+__all__ = ['PrevisaoFluxoCaixa', 'CuboGastos', 'EstatisticasGastos', 'JanelasMoveis', 'RegraRecorrencia',
+           'SimulacaoOrcamento']
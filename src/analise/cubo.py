@@ -0,0 +1,139 @@
+"""
+Cubo de agregação de gastos por (ano, mês, categoria, pago, conta)
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Linha entregue pelo carregador: (ano, mes, categoria, pago, conta, total, quantidade)
+LinhaCubo = Tuple[int, int, str, bool, Optional[str], float, int]
+
+DIMENSOES = ('ano', 'mes', 'trimestre', 'categoria', 'pago', 'conta')
+
+
+class CuboGastos:
+    """
+    Mantém em memória os totais de despesas agregados por
+    (ano, mês, categoria, pago, conta).
+
+    As células são agrupadas por mês: uma alteração invalida apenas o mês
+    afetado, que é recalculado na próxima consulta através do carregador
+    (varredura em memória na versão JSON, GROUP BY no MySQL).
+    """
+
+    def __init__(self, carregar_meses: Callable[[List[Tuple[int, int]]], Iterable[LinhaCubo]],
+                 listar_meses: Callable[[], Iterable[Tuple[int, int]]]):
+        self._carregar_meses = carregar_meses
+        self._listar_meses = listar_meses
+        # (ano, mes) -> {(categoria, pago, conta): [total, quantidade]}
+        self._celulas: Dict[Tuple[int, int], Dict[Tuple[str, bool, Optional[str]], List]] = {}
+
+    # ==================== INVALIDAÇÃO ====================
+
+    def invalidar(self, mes: int, ano: int):
+        """Descarta as células de um mês"""
+        self._celulas.pop((ano, mes), None)
+
+    def invalidar_tudo(self):
+        """Descarta todas as células"""
+        self._celulas.clear()
+
+    def ao_alterar(self, tipo: str, mes: Optional[int], ano: Optional[int], antes=None, depois=None):
+        """Ouvinte de alterações do controle financeiro"""
+        if tipo != 'despesa':
+            return
+        if mes is None or ano is None:
+            self.invalidar_tudo()
+        else:
+            self.invalidar(mes, ano)
+
+    # ==================== CARGA ====================
+
+    def _meses_consulta(self, ano: Optional[int], mes: Optional[int],
+                        trimestre: Optional[int]) -> List[Tuple[int, int]]:
+        """Determina quais meses (ano, mes) participam da consulta"""
+        if ano is None:
+            meses = [(a, m) for m, a in self._listar_meses()]
+            if mes is not None:
+                meses = [(a, m) for a, m in meses if m == mes]
+            if trimestre is not None:
+                meses = [(a, m) for a, m in meses if (m - 1) // 3 + 1 == trimestre]
+            return meses
+
+        if mes is not None:
+            return [(ano, mes)]
+        if trimestre is not None:
+            inicio = (trimestre - 1) * 3 + 1
+            return [(ano, m) for m in range(inicio, inicio + 3)]
+        return [(ano, m) for m in range(1, 13)]
+
+    def _garantir_meses(self, meses: List[Tuple[int, int]]):
+        """Carrega (em lote) os meses que ainda não estão no cubo"""
+        faltando = [(mes, ano) for ano, mes in meses if (ano, mes) not in self._celulas]
+        if not faltando:
+            return
+
+        for mes, ano in faltando:
+            self._celulas[(ano, mes)] = {}
+
+        for ano, mes, categoria, pago, conta, total, quantidade in self._carregar_meses(faltando):
+            celulas_mes = self._celulas.setdefault((int(ano), int(mes)), {})
+            chave = (categoria, bool(pago), conta)
+            celula = celulas_mes.setdefault(chave, [0.0, 0])
+            celula[0] += float(total)
+            celula[1] += int(quantidade)
+
+    # ==================== CONSULTAS ====================
+
+    def _iterar(self, ano=None, mes=None, trimestre=None, categoria=None, pago=None, conta=None):
+        """Percorre as células que atendem ao recorte informado"""
+        meses = self._meses_consulta(ano, mes, trimestre)
+        self._garantir_meses(meses)
+
+        categoria_lower = categoria.lower() if categoria else None
+        for ano_celula, mes_celula in meses:
+            for (cat, pago_celula, conta_celula), (total, quantidade) in self._celulas[(ano_celula, mes_celula)].items():
+                if categoria_lower is not None and cat.lower() != categoria_lower:
+                    continue
+                if pago is not None and pago_celula != pago:
+                    continue
+                if conta is not None and conta_celula != conta:
+                    continue
+                yield {
+                    'ano': ano_celula,
+                    'mes': mes_celula,
+                    'trimestre': (mes_celula - 1) // 3 + 1,
+                    'categoria': cat,
+                    'pago': pago_celula,
+                    'conta': conta_celula
+                }, total, quantidade
+
+    def total(self, ano: int = None, mes: int = None, trimestre: int = None,
+              categoria: str = None, pago: bool = None, conta: str = None) -> float:
+        """Soma dos valores no recorte"""
+        return sum(total for _, total, _ in self._iterar(ano, mes, trimestre, categoria, pago, conta))
+
+    def quantidade(self, ano: int = None, mes: int = None, trimestre: int = None,
+                   categoria: str = None, pago: bool = None, conta: str = None) -> int:
+        """Quantidade de despesas no recorte"""
+        return sum(qtd for _, _, qtd in self._iterar(ano, mes, trimestre, categoria, pago, conta))
+
+    def agrupar(self, por: Union[str, Tuple[str, ...]], ano: int = None, mes: int = None,
+                trimestre: int = None, categoria: str = None, pago: bool = None,
+                conta: str = None) -> Dict:
+        """
+        Consolida (roll-up) o recorte pelas dimensões informadas.
+
+        Exemplo: agrupar('categoria', ano=2024, mes=3, pago=True)
+        retorna {'Alimentação': 850.0, 'Moradia': 1200.0, ...}.
+        Com várias dimensões, a chave do dicionário é uma tupla.
+        """
+        dimensoes = (por,) if isinstance(por, str) else tuple(por)
+        for dimensao in dimensoes:
+            if dimensao not in DIMENSOES:
+                raise ValueError(f"Dimensão inválida: '{dimensao}'")
+
+        resultado: Dict = {}
+        for valores, total, _ in self._iterar(ano, mes, trimestre, categoria, pago, conta):
+            chave = valores[dimensoes[0]] if len(dimensoes) == 1 else tuple(valores[d] for d in dimensoes)
+            resultado[chave] = resultado.get(chave, 0.0) + total
+        return resultado
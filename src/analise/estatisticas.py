@@ -0,0 +1,249 @@
+"""
+Estatísticas incrementais de gastos por categoria (média, desvio, mediana, p90)
+"""
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Welford:
+    """Média e variância incrementais (algoritmo de Welford), com remoção"""
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+
+    def adicionar(self, valor: float):
+        """Inclui um valor"""
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+
+    def remover(self, valor: float):
+        """Retira um valor incluído anteriormente"""
+        if self.n <= 1:
+            self.n, self.media, self.m2 = 0, 0.0, 0.0
+            return
+        media_anterior = (self.n * self.media - valor) / (self.n - 1)
+        self.m2 -= (valor - self.media) * (valor - media_anterior)
+        self.media = media_anterior
+        self.n -= 1
+        self.m2 = max(self.m2, 0.0)
+
+    def variancia(self) -> float:
+        """Variância amostral"""
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def desvio_padrao(self) -> float:
+        """Desvio padrão amostral"""
+        return math.sqrt(self.variancia())
+
+
+class QuantilP2:
+    """
+    Estimador de quantil em fluxo (algoritmo P² de Jain e Chlamtac).
+    Usa memória constante (5 marcadores) em vez de guardar todos os valores.
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self._iniciais: List[float] = []
+        self._alturas: List[float] = []
+        self._posicoes: List[int] = []
+        self._desejadas: List[float] = []
+        self._incrementos = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def adicionar(self, valor: float):
+        """Inclui um valor na estimativa"""
+        if len(self._iniciais) < 5:
+            self._iniciais.append(valor)
+            if len(self._iniciais) == 5:
+                self._alturas = sorted(self._iniciais)
+                self._posicoes = [1, 2, 3, 4, 5]
+                p = self.p
+                self._desejadas = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+            return
+
+        q = self._alturas
+        # Localizar a célula do novo valor e ajustar os extremos
+        if valor < q[0]:
+            q[0] = valor
+            k = 0
+        elif valor >= q[4]:
+            q[4] = valor
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= valor < q[i + 1])
+
+        for i in range(k + 1, 5):
+            self._posicoes[i] += 1
+        for i in range(5):
+            self._desejadas[i] += self._incrementos[i]
+
+        # Ajustar os marcadores centrais
+        for i in range(1, 4):
+            d = self._desejadas[i] - self._posicoes[i]
+            if ((d >= 1 and self._posicoes[i + 1] - self._posicoes[i] > 1) or
+                    (d <= -1 and self._posicoes[i - 1] - self._posicoes[i] < -1)):
+                passo = 1 if d > 0 else -1
+                altura = self._parabolica(i, passo)
+                if not q[i - 1] < altura < q[i + 1]:
+                    altura = self._linear(i, passo)
+                q[i] = altura
+                self._posicoes[i] += passo
+
+    def _parabolica(self, i: int, d: int) -> float:
+        q, n = self._alturas, self._posicoes
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: int) -> float:
+        q, n = self._alturas, self._posicoes
+        return q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+
+    def valor(self) -> float:
+        """Estimativa atual do quantil"""
+        if len(self._iniciais) < 5:
+            if not self._iniciais:
+                return 0.0
+            ordenados = sorted(self._iniciais)
+            return ordenados[min(len(ordenados) - 1, int(round(self.p * (len(ordenados) - 1))))]
+        return self._alturas[2]
+
+
+class _EstatisticaCategoria:
+    """Acumuladores de uma categoria"""
+
+    def __init__(self):
+        self.valores = Welford()
+        self.mediana = QuantilP2(0.5)
+        self.p90 = QuantilP2(0.9)
+        self.totais_mes: Dict[Tuple[int, int], float] = {}
+        self.mensal = Welford()
+
+    def registrar(self, ano: int, mes: int, valor: float):
+        self.valores.adicionar(valor)
+        self.mediana.adicionar(valor)
+        self.p90.adicionar(valor)
+
+        # Total do mês muda: trocar o valor antigo pelo novo na série mensal
+        total_anterior = self.totais_mes.get((ano, mes))
+        if total_anterior is not None:
+            self.mensal.remover(total_anterior)
+        total = (total_anterior or 0.0) + valor
+        self.totais_mes[(ano, mes)] = total
+        self.mensal.adicionar(total)
+
+
+class EstatisticasGastos:
+    """
+    Estatísticas por categoria sobre as despesas pagas.
+
+    Para cada categoria mantém média/desvio (Welford) e mediana/p90 (P²) dos
+    valores individuais, além de média/desvio dos totais mensais. É atualizada
+    quando uma despesa é incluída já paga ou é paga; remoções e edições marcam
+    as estatísticas como desatualizadas e elas são reconstruídas em uma única
+    passada na próxima consulta.
+    """
+
+    def __init__(self, fonte_despesas: Callable[[], Dict[str, List]]):
+        self._fonte_despesas = fonte_despesas
+        self._categorias: Dict[str, _EstatisticaCategoria] = {}
+        self._desatualizado = True
+
+    def reconstruir(self):
+        """Reconstrói todas as estatísticas em uma única passada pelo histórico"""
+        self._categorias = {}
+        for mes_ano, despesas in self._fonte_despesas().items():
+            mes, ano = mes_ano.split('/')
+            mes, ano = int(mes), int(ano)
+            for despesa in despesas:
+                if despesa.pago:
+                    self._registrar(despesa.categoria, ano, mes, float(despesa.valor))
+        self._desatualizado = False
+
+    def _registrar(self, categoria: str, ano: int, mes: int, valor: float):
+        estatistica = self._categorias.get(categoria)
+        if estatistica is None:
+            estatistica = self._categorias[categoria] = _EstatisticaCategoria()
+        estatistica.registrar(ano, mes, valor)
+
+    def ao_alterar(self, tipo: str, mes: Optional[int], ano: Optional[int], antes=None, depois=None):
+        """Ouvinte de alterações do controle financeiro"""
+        if tipo != 'despesa' or self._desatualizado:
+            return
+
+        antes_pago = antes is not None and antes.pago
+        depois_pago = depois is not None and depois.pago
+
+        if antes is None and depois is None:
+            self._desatualizado = True
+        elif depois_pago and not antes_pago:
+            # Inclusão já paga ou pagamento: atualização incremental
+            self._registrar(depois.categoria, ano, mes, float(depois.valor))
+        elif antes_pago:
+            # Remoção, estorno ou edição de despesa paga
+            self._desatualizado = True
+
+    def _garantir_atualizado(self):
+        if self._desatualizado:
+            self.reconstruir()
+
+    def categorias(self) -> List[str]:
+        """Categorias com despesas pagas"""
+        self._garantir_atualizado()
+        return list(self._categorias.keys())
+
+    def resumo_categoria(self, categoria: str) -> Optional[Dict]:
+        """Resumo estatístico de uma categoria"""
+        self._garantir_atualizado()
+        estatistica = self._categorias.get(categoria)
+        if estatistica is None:
+            return None
+
+        return {
+            'categoria': categoria,
+            'quantidade': estatistica.valores.n,
+            'media': estatistica.valores.media,
+            'desvio_padrao': estatistica.valores.desvio_padrao(),
+            'mediana': estatistica.mediana.valor(),
+            'p90': estatistica.p90.valor(),
+            'meses': estatistica.mensal.n,
+            'media_mensal': estatistica.mensal.media,
+            'desvio_mensal': estatistica.mensal.desvio_padrao()
+        }
+
+    def meses_atipicos(self, mes: int, ano: int, limite_z: float = 2.0) -> List[Dict]:
+        """
+        Categorias cujo total no mês foge do padrão dos demais meses.
+        O mês analisado é retirado da série (em O(1)) antes de calcular o z-score.
+        """
+        self._garantir_atualizado()
+        atipicos = []
+
+        for categoria, estatistica in self._categorias.items():
+            total = estatistica.totais_mes.get((ano, mes))
+            if total is None:
+                continue
+
+            outros = Welford()
+            outros.n, outros.media, outros.m2 = estatistica.mensal.n, estatistica.mensal.media, estatistica.mensal.m2
+            outros.remover(total)
+
+            desvio = outros.desvio_padrao()
+            if outros.n < 2 or desvio == 0:
+                continue
+
+            z = (total - outros.media) / desvio
+            if abs(z) >= limite_z:
+                atipicos.append({
+                    'categoria': categoria,
+                    'total': total,
+                    'media_mensal': outros.media,
+                    'z': z
+                })
+
+        return sorted(atipicos, key=lambda item: -abs(item['z']))
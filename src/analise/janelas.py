@@ -0,0 +1,210 @@
+"""
+Médias e somas móveis (3, 6 e 12 meses) de gastos e taxa de poupança
+"""
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+import numpy as np
+
+
+JANELAS_PADRAO = (3, 6, 12)
+
+
+class JanelasMoveis:
+    """
+    Mantém os gastos por categoria e as receitas em arrays indexados por mês
+    (um mês por coluna, sem lacunas) junto com suas somas acumuladas.
+
+    As somas de qualquer janela saem da diferença entre duas posições do
+    acumulado. Quando um mês muda, apenas a coluna dele é recarregada e o
+    acumulado é refeito a partir dela até o fim, então incluir um mês novo
+    toca só a cauda dos arrays.
+    """
+
+    def __init__(self, carregar_mes: Callable[[int, int], Tuple[Dict[str, float], float]],
+                 listar_meses: Callable[[], Iterable[Tuple[int, int]]]):
+        self._carregar_mes = carregar_mes
+        self._listar_meses = listar_meses
+        self._inicio = 0  # índice absoluto (ano * 12 + mes - 1) da primeira coluna
+        self._categorias: List[str] = []
+        self._indice_categoria: Dict[str, int] = {}
+        self._gastos = np.zeros((0, 0))
+        self._receitas = np.zeros(0)
+        self._acum_gastos = np.zeros((0, 1))
+        self._acum_receitas = np.zeros(1)
+        self._pendentes: Set[int] = set()
+        self._reconstruir = True
+
+    # ==================== INVALIDAÇÃO ====================
+
+    def ao_alterar(self, tipo: str, mes=None, ano=None, antes=None, depois=None):
+        """Ouvinte de alterações do controle financeiro"""
+        if mes is None or ano is None:
+            self._reconstruir = True
+        else:
+            self._pendentes.add(ano * 12 + mes - 1)
+
+    # ==================== ATUALIZAÇÃO ====================
+
+    def _linha_categoria(self, categoria: str) -> int:
+        """Índice da linha da categoria, criando a linha se necessário"""
+        indice = self._indice_categoria.get(categoria)
+        if indice is None:
+            indice = len(self._categorias)
+            self._categorias.append(categoria)
+            self._indice_categoria[categoria] = indice
+            self._gastos = np.vstack([self._gastos, np.zeros((1, self._gastos.shape[1]))])
+            self._acum_gastos = np.vstack([self._acum_gastos, np.zeros((1, self._acum_gastos.shape[1]))])
+        return indice
+
+    def _carregar_coluna(self, indice: int):
+        """Recarrega os totais de um mês (índice absoluto)"""
+        ano, mes = divmod(indice, 12)
+        gastos, receitas = self._carregar_mes(mes + 1, ano)
+        coluna = indice - self._inicio
+        self._gastos[:, coluna] = 0.0
+        for categoria, valor in gastos.items():
+            linha = self._linha_categoria(categoria)
+            self._gastos[linha, coluna] = valor
+        self._receitas[coluna] = receitas
+
+    def _recalcular_acumulado(self, coluna: int):
+        """Refaz as somas acumuladas a partir da coluna informada"""
+        self._acum_gastos[:, coluna + 1:] = (self._acum_gastos[:, coluna:coluna + 1] +
+                                             np.cumsum(self._gastos[:, coluna:], axis=1))
+        self._acum_receitas[coluna + 1:] = self._acum_receitas[coluna] + np.cumsum(self._receitas[coluna:])
+
+    def _reconstruir_tudo(self):
+        """Monta os arrays a partir de todos os meses com lançamentos"""
+        indices = [ano * 12 + mes - 1 for mes, ano in self._listar_meses()]
+        self._categorias, self._indice_categoria = [], {}
+        self._inicio = min(indices) if indices else 0
+        total_meses = max(indices) - self._inicio + 1 if indices else 0
+        self._gastos = np.zeros((0, total_meses))
+        self._acum_gastos = np.zeros((0, total_meses + 1))
+        self._receitas = np.zeros(total_meses)
+        self._acum_receitas = np.zeros(total_meses + 1)
+
+        for indice in sorted(set(indices)):
+            self._carregar_coluna(indice)
+        self._recalcular_acumulado(0)
+        self._pendentes.clear()
+        self._reconstruir = False
+
+    def _estender_ate(self, indice: int):
+        """Acrescenta colunas vazias no fim até alcançar o mês informado"""
+        novas = indice - (self._inicio + len(self._receitas)) + 1
+        if novas <= 0:
+            return
+        self._gastos = np.hstack([self._gastos, np.zeros((self._gastos.shape[0], novas))])
+        self._receitas = np.concatenate([self._receitas, np.zeros(novas)])
+        ultimo_acum_gastos = np.repeat(self._acum_gastos[:, -1:], novas, axis=1)
+        self._acum_gastos = np.hstack([self._acum_gastos, ultimo_acum_gastos])
+        self._acum_receitas = np.concatenate([self._acum_receitas, np.repeat(self._acum_receitas[-1], novas)])
+
+    def atualizar(self):
+        """Aplica as alterações pendentes, recalculando só a partir do mês mais antigo alterado"""
+        if self._reconstruir or (self._pendentes and len(self._receitas) == 0):
+            self._reconstruir_tudo()
+            return
+        if not self._pendentes:
+            return
+        if min(self._pendentes) < self._inicio:
+            # Mês anterior ao início da série: mais simples remontar
+            self._reconstruir_tudo()
+            return
+
+        self._estender_ate(max(self._pendentes))
+        for indice in sorted(self._pendentes):
+            self._carregar_coluna(indice)
+        self._recalcular_acumulado(min(self._pendentes) - self._inicio)
+        self._pendentes.clear()
+
+    # ==================== CONSULTAS ====================
+
+    @staticmethod
+    def _janela(acumulado: np.ndarray, tamanho: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Soma móvel a partir do acumulado (último eixo) e quantidade de meses
+        efetivamente somados (janelas parciais no início da série).
+        """
+        total_meses = acumulado.shape[-1] - 1
+        fim = np.arange(1, total_meses + 1)
+        inicio = np.maximum(fim - tamanho, 0)
+        soma = acumulado[..., fim] - acumulado[..., inicio]
+        return soma, fim - inicio
+
+    @staticmethod
+    def _taxa_poupanca(receitas: np.ndarray, gastos: np.ndarray) -> np.ndarray:
+        """(receitas - gastos) / receitas, NaN quando não há receitas"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(receitas > 0, (receitas - gastos) / receitas, np.nan)
+
+    def calcular(self, janelas: Tuple[int, ...] = JANELAS_PADRAO) -> Dict:
+        """
+        Calcula as janelas móveis para toda a série.
+
+        Retorna um dicionário com:
+            meses: lista de (mes, ano), um por coluna
+            categorias: nomes das categorias (linhas das matrizes)
+            gastos, gastos_total, receitas, taxa_poupanca: valores mensais
+            janelas: {n: {'soma', 'media', 'soma_total', 'media_total', 'taxa_poupanca'}}
+        """
+        self.atualizar()
+        total_meses = len(self._receitas)
+        meses = [(indice % 12 + 1, indice // 12) for indice in range(self._inicio, self._inicio + total_meses)]
+        acum_total = self._acum_gastos.sum(axis=0)
+        gastos_total = self._gastos.sum(axis=0)
+
+        resultado_janelas = {}
+        for tamanho in janelas:
+            soma, quantidade = self._janela(self._acum_gastos, tamanho)
+            soma_total, _ = self._janela(acum_total, tamanho)
+            soma_receitas, _ = self._janela(self._acum_receitas, tamanho)
+            resultado_janelas[tamanho] = {
+                'soma': soma,
+                'media': soma / np.maximum(quantidade, 1),
+                'soma_total': soma_total,
+                'media_total': soma_total / np.maximum(quantidade, 1),
+                'taxa_poupanca': self._taxa_poupanca(soma_receitas, soma_total)
+            }
+
+        return {
+            'meses': meses,
+            'categorias': list(self._categorias),
+            'gastos': self._gastos.copy(),
+            'gastos_total': gastos_total,
+            'receitas': self._receitas.copy(),
+            'taxa_poupanca': self._taxa_poupanca(self._receitas, gastos_total),
+            'janelas': resultado_janelas
+        }
+
+    def resumo_mes(self, mes: int, ano: int, janelas: Tuple[int, ...] = JANELAS_PADRAO) -> Dict:
+        """Valores das janelas terminadas no mês informado, por categoria e no total"""
+        resultado = self.calcular(janelas)
+        coluna = ano * 12 + mes - 1 - self._inicio
+        if not 0 <= coluna < len(resultado['meses']):
+            return {'categorias': {}, 'total': {}, 'taxa_poupanca': {}}
+
+        categorias = {}
+        for linha, categoria in enumerate(resultado['categorias']):
+            categorias[categoria] = {
+                tamanho: {
+                    'soma': float(dados['soma'][linha, coluna]),
+                    'media': float(dados['media'][linha, coluna])
+                }
+                for tamanho, dados in resultado['janelas'].items()
+            }
+
+        return {
+            'categorias': categorias,
+            'total': {
+                tamanho: {
+                    'soma': float(dados['soma_total'][coluna]),
+                    'media': float(dados['media_total'][coluna])
+                }
+                for tamanho, dados in resultado['janelas'].items()
+            },
+            'taxa_poupanca': {
+                tamanho: float(dados['taxa_poupanca'][coluna])
+                for tamanho, dados in resultado['janelas'].items()
+            }
+        }
@@ -0,0 +1,224 @@
+"""
+Motor de previsão de fluxo de caixa para os próximos meses
+"""
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+import numpy as np
+
+
+class PrevisaoFluxoCaixa:
+    """
+    Projeta o saldo diário de cada conta para os próximos N meses.
+
+    Considera o saldo atual das contas, as despesas pendentes com vencimento,
+    as ocorrências previstas das regras de despesas fixas, os gastos fixos sem
+    regra (repetidos mensalmente a partir da última ocorrência) e as receitas
+    recorrentes (mesma descrição/categoria em pelo menos dois meses).
+    Despesas e receitas não possuem conta vinculada, então são lançadas na
+    conta padrão do controle, como acontece no pagamento automático.
+    """
+
+    def __init__(self, controle, meses: int = 3, data_inicial: Optional[date] = None):
+        self.controle = controle
+        self.meses = max(1, int(meses))
+        self.data_inicial = data_inicial or date.today()
+        self.data_final = self._somar_meses(self.data_inicial, self.meses)
+
+    @staticmethod
+    def _somar_meses(data: date, meses: int) -> date:
+        """Soma meses a uma data, ajustando o dia ao fim do mês quando necessário"""
+        mes_total = data.year * 12 + (data.month - 1) + meses
+        ano, mes = divmod(mes_total, 12)
+        inicio = np.datetime64(f"{ano:04d}-{mes + 1:02d}", 'M')
+        dias_mes = int(((inicio + 1).astype('datetime64[D]') - inicio.astype('datetime64[D]')).astype(int))
+        return date(ano, mes + 1, min(data.day, dias_mes))
+
+    def _obter_contas(self) -> Tuple[List[str], np.ndarray]:
+        """Retorna os nomes das contas e seus saldos atuais"""
+        contas_bancarias = getattr(self.controle, 'contas_bancarias', None)
+        if contas_bancarias:
+            nomes = list(contas_bancarias.keys())
+            saldos = np.array([float(contas_bancarias[n].saldo_atual) for n in nomes], dtype=float)
+        else:
+            # Controle simples: saldo único
+            nomes = ["Saldo"]
+            saldos = np.array([float(getattr(self.controle, 'saldo_atual', 0.0))], dtype=float)
+        return nomes, saldos
+
+    def _indice_conta_padrao(self, nomes: List[str]) -> int:
+        """Índice da conta usada para despesas e receitas projetadas"""
+        conta_padrao = getattr(self.controle, 'conta_padrao', None)
+        if conta_padrao in nomes:
+            return nomes.index(conta_padrao)
+        return 0
+
+    def _expandir_mensal(self, ultima_data: date) -> np.ndarray:
+        """
+        Gera as datas mensais seguintes a `ultima_data` (mesmo dia do mês)
+        até o fim do horizonte, de forma vetorizada.
+        """
+        primeiro_mes = max(np.datetime64(ultima_data, 'M') + 1, np.datetime64(self.data_inicial, 'M'))
+        ultimo_mes = np.datetime64(self.data_final, 'M')
+        meses = np.arange(primeiro_mes, ultimo_mes + 1)
+        inicio_mes = meses.astype('datetime64[D]')
+        dias_mes = ((meses + 1).astype('datetime64[D]') - inicio_mes).astype(int)
+        dias = np.minimum(ultima_data.day, dias_mes) - 1
+        datas = inicio_mes + dias
+        inicio = np.datetime64(self.data_inicial, 'D')
+        fim = np.datetime64(self.data_final, 'D')
+        return datas[(datas >= inicio) & (datas <= fim)]
+
+    def coletar_lancamentos(self, variaveis_pendentes: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Coleta os lançamentos futuros como arrays paralelos (datas, valores).
+        Valores negativos são saídas e positivos são entradas. Sem
+        variaveis_pendentes, as despesas pendentes que não são fixas ficam de
+        fora (a simulação as sorteia junto com os gastos variáveis do mês).
+        """
+        hoje = np.datetime64(self.data_inicial, 'D')
+        datas: List[np.ndarray] = []
+        valores: List[np.ndarray] = []
+
+        # Despesas pendentes e última ocorrência de cada gasto fixo
+        pendentes_datas = []
+        pendentes_valores = []
+        gastos_fixos: Dict[Tuple[str, str], object] = {}
+
+        for despesas in self.controle.despesas.values():
+            for despesa in despesas:
+                if despesa.data_vencimento is None:
+                    continue
+                if not despesa.pago and (variaveis_pendentes or despesa.is_gasto_fixo()
+                                         or despesa.regra_id is not None):
+                    pendentes_datas.append(despesa.data_vencimento)
+                    pendentes_valores.append(-float(despesa.valor))
+                # Gastos de uma regra de recorrência já entram pelas ocorrências previstas
+                if despesa.is_gasto_fixo() and despesa.regra_id is None:
+                    chave = (despesa.descricao.lower(), despesa.categoria)
+                    atual = gastos_fixos.get(chave)
+                    if atual is None or despesa.data_vencimento > atual.data_vencimento:
+                        gastos_fixos[chave] = despesa
+
+        # Ocorrências previstas (não gravadas) das despesas fixas até o fim do horizonte
+        for despesa, _, _ in self.controle.iterar_despesas_previstas(None, self.data_final):
+            pendentes_datas.append(despesa.data_vencimento)
+            pendentes_valores.append(-float(despesa.valor))
+
+        if pendentes_datas:
+            # Despesas vencidas entram no primeiro dia da projeção
+            datas.append(np.maximum(np.array(pendentes_datas, dtype='datetime64[D]'), hoje))
+            valores.append(np.array(pendentes_valores, dtype=float))
+
+        for despesa in gastos_fixos.values():
+            projetadas = self._expandir_mensal(despesa.data_vencimento)
+            datas.append(projetadas)
+            valores.append(np.full(len(projetadas), -float(despesa.valor)))
+
+        # Receitas futuras já lançadas e receitas recorrentes
+        futuras_datas = []
+        futuras_valores = []
+        ocorrencias = defaultdict(set)
+        ultimas_receitas: Dict[Tuple[str, str], object] = {}
+
+        for mes_ano, receitas in self.controle.receitas.items():
+            for receita in receitas:
+                # Receitas já creditadas numa conta estão no saldo inicial
+                if receita.data_recebimento > self.data_inicial and receita.conta is None:
+                    futuras_datas.append(receita.data_recebimento)
+                    futuras_valores.append(float(receita.valor))
+                chave = (receita.descricao.lower(), receita.categoria)
+                ocorrencias[chave].add(mes_ano)
+                atual = ultimas_receitas.get(chave)
+                if atual is None or receita.data_recebimento > atual.data_recebimento:
+                    ultimas_receitas[chave] = receita
+
+        if futuras_datas:
+            datas.append(np.array(futuras_datas, dtype='datetime64[D]'))
+            valores.append(np.array(futuras_valores, dtype=float))
+
+        for chave, receita in ultimas_receitas.items():
+            if len(ocorrencias[chave]) < 2:
+                continue
+            projetadas = self._expandir_mensal(receita.data_recebimento)
+            datas.append(projetadas)
+            valores.append(np.full(len(projetadas), float(receita.valor)))
+
+        if not datas:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=float)
+
+        return np.concatenate(datas), np.concatenate(valores)
+
+    def calcular(self) -> Dict:
+        """
+        Calcula a projeção dia a dia.
+
+        Retorna um dicionário com:
+            datas: array datetime64[D] com cada dia do horizonte
+            contas: nomes das contas (na ordem das linhas de `saldos`)
+            saldos: matriz (contas x dias) com o saldo projetado
+            saldo_total: saldo somado de todas as contas por dia
+            primeiro_negativo: {conta: date ou None}
+            primeiro_negativo_total: date ou None
+        """
+        nomes, saldos_iniciais = self._obter_contas()
+        inicio = np.datetime64(self.data_inicial, 'D')
+        total_dias = (self.data_final - self.data_inicial).days + 1
+        datas_grade = inicio + np.arange(total_dias)
+
+        datas, valores = self.coletar_lancamentos()
+        dias = (datas - inicio).astype(int)
+        dentro = (dias >= 0) & (dias < total_dias)
+
+        # Fluxo diário da conta padrão e saldo acumulado de todas as contas
+        fluxo_diario = np.bincount(dias[dentro], weights=valores[dentro], minlength=total_dias)
+        fluxos = np.zeros((len(nomes), total_dias))
+        fluxos[self._indice_conta_padrao(nomes)] = fluxo_diario
+        saldos = saldos_iniciais[:, None] + np.cumsum(fluxos, axis=1)
+        saldo_total = saldos.sum(axis=0)
+
+        return {
+            'datas': datas_grade,
+            'contas': nomes,
+            'saldos': saldos,
+            'saldo_total': saldo_total,
+            'primeiro_negativo': {
+                nome: self._primeiro_negativo(datas_grade, saldos[i])
+                for i, nome in enumerate(nomes)
+            },
+            'primeiro_negativo_total': self._primeiro_negativo(datas_grade, saldo_total)
+        }
+
+    @staticmethod
+    def _primeiro_negativo(datas: np.ndarray, saldos: np.ndarray) -> Optional[date]:
+        """Retorna a primeira data em que o saldo fica negativo"""
+        negativos = saldos < 0
+        if not negativos.any():
+            return None
+        return datas[int(negativos.argmax())].astype(date)
+
+    def resumo_mensal(self, resultado: Dict = None) -> List[Dict]:
+        """Resume a projeção com o saldo total no fim de cada mês e o menor saldo do mês"""
+        if resultado is None:
+            resultado = self.calcular()
+
+        datas = resultado['datas']
+        saldo_total = resultado['saldo_total']
+        meses = datas.astype('datetime64[M]')
+
+        # Fronteiras entre meses consecutivos na grade diária
+        cortes = np.flatnonzero(meses[1:] != meses[:-1]) + 1
+        inicios = np.concatenate(([0], cortes))
+        fins = np.concatenate((cortes, [len(datas)]))
+        minimos = np.minimum.reduceat(saldo_total, inicios)
+
+        resumo = []
+        for inicio, fim, minimo in zip(inicios, fins, minimos):
+            mes = meses[inicio].astype(date)
+            resumo.append({
+                'mes': mes.month,
+                'ano': mes.year,
+                'saldo_final': float(saldo_total[fim - 1]),
+                'saldo_minimo': float(minimo)
+            })
+        return resumo
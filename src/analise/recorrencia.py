@@ -0,0 +1,122 @@
+"""
+Regras de recorrência das despesas fixas, expandidas sob demanda
+"""
+import calendar
+import json
+from datetime import date, datetime
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+
+class RegraRecorrencia:
+    """
+    Regra de uma despesa fixa: vence no mesmo dia a cada `intervalo_meses`
+    meses a partir do mês inicial, até `data_fim` (opcional). As ocorrências
+    são geradas sob demanda; só viram despesas gravadas quando pagas ou
+    editadas, e esses meses (ou os ignorados) ficam em `excecoes`.
+    """
+
+    def __init__(self, descricao: str, valor: float, dia: int, mes_inicio: int, ano_inicio: int,
+                 categoria: str = "Geral", intervalo_meses: int = 1, data_fim: str = None):
+        if not 1 <= dia <= 31:
+            raise ValueError("O dia do vencimento deve estar entre 1 e 31")
+        if intervalo_meses < 1:
+            raise ValueError("O intervalo deve ser de pelo menos 1 mês")
+        self.id: Optional[int] = None
+        self.descricao = descricao
+        self.valor = valor
+        self.categoria = categoria
+        self.dia = dia
+        self.mes_inicio = mes_inicio
+        self.ano_inicio = ano_inicio
+        self.intervalo_meses = intervalo_meses
+        self.data_fim = datetime.strptime(data_fim, "%d/%m/%Y").date() if data_fim else None
+        self.excecoes: Set[str] = set()  # meses (MM/AAAA) sem ocorrência prevista
+
+    def vencimento_em(self, mes: int, ano: int) -> date:
+        """Vencimento no mês (o dia é limitado ao último dia do mês)"""
+        return date(ano, mes, min(self.dia, calendar.monthrange(ano, mes)[1]))
+
+    def ocorre_em(self, mes: int, ano: int) -> bool:
+        """Verifica se a regra tem ocorrência prevista no mês"""
+        deslocamento = ano * 12 + mes - 1 - (self.ano_inicio * 12 + self.mes_inicio - 1)
+        if deslocamento < 0 or deslocamento % self.intervalo_meses:
+            return False
+        if self.data_fim and self.vencimento_em(mes, ano) > self.data_fim:
+            return False
+        return f"{mes:02d}/{ano}" not in self.excecoes
+
+    def ocorrencias(self, inicio: Optional[date], fim: date) -> Iterator[Tuple[date, int, int]]:
+        """Ocorrências previstas (vencimento, mes, ano) de inicio a fim, em ordem; o custo é o das ocorrências da faixa"""
+        if self.data_fim and self.data_fim < fim:
+            fim = self.data_fim
+        indice = self.ano_inicio * 12 + self.mes_inicio - 1
+        if inicio is not None:
+            # Salta direto para o primeiro mês da sequência a partir do mês de `inicio`
+            alvo = inicio.year * 12 + inicio.month - 1
+            if alvo > indice:
+                indice += -(-(alvo - indice) // self.intervalo_meses) * self.intervalo_meses
+        while True:
+            ano, mes = divmod(indice, 12)
+            mes += 1
+            vencimento = self.vencimento_em(mes, ano)
+            if vencimento > fim:
+                return
+            if (inicio is None or vencimento >= inicio) and f"{mes:02d}/{ano}" not in self.excecoes:
+                yield vencimento, mes, ano
+            indice += self.intervalo_meses
+
+    def descricao_periodicidade(self) -> str:
+        """Periodicidade para exibição"""
+        if self.intervalo_meses == 1:
+            texto = f"Todo dia {self.dia}"
+        else:
+            texto = f"Dia {self.dia}, a cada {self.intervalo_meses} meses"
+        texto += f", desde {self.mes_inicio:02d}/{self.ano_inicio}"
+        if self.data_fim:
+            texto += f" até {self.data_fim.strftime('%d/%m/%Y')}"
+        return texto
+
+    def to_dict(self) -> Dict:
+        """Converte a regra para dicionário"""
+        return {
+            'id': self.id,
+            'descricao': self.descricao,
+            'valor': self.valor,
+            'categoria': self.categoria,
+            'dia': self.dia,
+            'mes_inicio': self.mes_inicio,
+            'ano_inicio': self.ano_inicio,
+            'intervalo_meses': self.intervalo_meses,
+            'data_fim': self.data_fim.strftime("%d/%m/%Y") if self.data_fim else None,
+            'excecoes': sorted(self.excecoes)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """Cria uma regra a partir de um dicionário"""
+        regra = cls(
+            data['descricao'],
+            data['valor'],
+            data['dia'],
+            data['mes_inicio'],
+            data['ano_inicio'],
+            data.get('categoria', 'Geral'),
+            data.get('intervalo_meses', 1),
+            data.get('data_fim')
+        )
+        regra.id = data.get('id')
+        regra.excecoes = set(data.get('excecoes') or [])
+        return regra
+
+    @classmethod
+    def from_db(cls, data: Dict):
+        """Cria uma regra a partir de uma linha de regras_recorrencia"""
+        excecoes = data.get('excecoes')
+        if isinstance(excecoes, (str, bytes)):  # coluna JSON chega como texto no conector
+            excecoes = json.loads(excecoes)
+        return cls.from_dict({
+            **data,
+            'valor': float(data['valor']),
+            'data_fim': data['data_fim'].strftime('%d/%m/%Y') if data.get('data_fim') else None,
+            'excecoes': excecoes
+        })
@@ -0,0 +1,191 @@
+"""
+Simulação de Monte Carlo do orçamento a partir do histórico de gastos
+"""
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from .previsao import PrevisaoFluxoCaixa
+
+
+PERCENTIS = (5, 25, 50, 75, 95)
+
+
+class SimulacaoOrcamento:
+    """
+    Simula milhares de cenários para os próximos meses.
+
+    Os gastos variáveis (despesas que não são fixas) de cada mês simulado são
+    sorteados entre os meses completos do histórico: o mês inteiro é sorteado,
+    preservando a relação entre as categorias, e nunca fica abaixo das
+    despesas variáveis já lançadas para aquele mês. No mês atual conta só o
+    que falta gastar (sorteado menos o já pago). Gastos fixos, ocorrências
+    das regras e receitas são conhecidos e vêm da previsão de fluxo de
+    caixa. Todos os cenários são calculados de uma vez como arrays
+    (cenários x meses), sem laços em Python por cenário.
+    """
+
+    def __init__(self, controle, caminhos: int = 10000, meses: int = 12,
+                 semente: Optional[int] = None, data_inicial: Optional[date] = None):
+        self.controle = controle
+        self.caminhos = max(1, int(caminhos))
+        self.meses = max(1, int(meses))
+        self.data_inicial = data_inicial or date.today()
+        self._rng = np.random.default_rng(semente)
+
+    def _indice_mes(self, mes: int, ano: int) -> int:
+        return ano * 12 + mes - 1
+
+    def historico_variavel(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Gastos variáveis por categoria em cada mês completo do histórico.
+        Retorna (categorias, matriz categorias x meses), em uma passada pelas despesas.
+        """
+        mes_atual = self._indice_mes(self.data_inicial.month, self.data_inicial.year)
+        categorias: Dict[str, int] = {}
+        celulas: Dict[Tuple[int, int], float] = {}
+        primeiro = None
+
+        for mes_ano, despesas in self.controle.despesas.items():
+            mes, ano = mes_ano.split('/')
+            indice = self._indice_mes(int(mes), int(ano))
+            if indice >= mes_atual:
+                continue
+            for despesa in despesas:
+                if despesa.is_gasto_fixo():
+                    continue
+                linha = categorias.setdefault(despesa.categoria, len(categorias))
+                celulas[(linha, indice)] = celulas.get((linha, indice), 0.0) + float(despesa.valor)
+                primeiro = indice if primeiro is None else min(primeiro, indice)
+
+        if primeiro is None:
+            return [], np.zeros((0, 0))
+
+        # Meses sem gasto no intervalo também contam (gasto zero)
+        historico = np.zeros((len(categorias), mes_atual - primeiro))
+        for (linha, indice), valor in celulas.items():
+            historico[linha, indice - primeiro] = valor
+        return list(categorias.keys()), historico
+
+    def _gastos_fixos_categoria(self) -> Dict[str, float]:
+        """Valor mensal dos gastos fixos por categoria (última ocorrência de cada um)"""
+        ultimos: Dict[Tuple[str, str], object] = {}
+        for despesas in self.controle.despesas.values():
+            for despesa in despesas:
+                if not despesa.is_gasto_fixo() or despesa.data_vencimento is None or despesa.regra_id is not None:
+                    continue
+                chave = (despesa.descricao.lower(), despesa.categoria)
+                atual = ultimos.get(chave)
+                if atual is None or despesa.data_vencimento > atual.data_vencimento:
+                    ultimos[chave] = despesa
+
+        fixos: Dict[str, float] = {}
+        for (_, categoria), despesa in ultimos.items():
+            fixos[categoria] = fixos.get(categoria, 0.0) + float(despesa.valor)
+        # Regras de recorrência ainda ativas entram pelo valor médio mensal
+        for regra in self.controle.regras_recorrencia.values():
+            if regra.data_fim is None or regra.data_fim >= self.data_inicial:
+                fixos[regra.categoria] = fixos.get(regra.categoria, 0.0) + float(regra.valor) / regra.intervalo_meses
+        return fixos
+
+    def _variaveis_lancadas(self) -> Tuple[np.ndarray, float]:
+        """
+        Despesas variáveis já lançadas: pendentes por mês do horizonte (as
+        vencidas contam no mês atual) e o total já pago no mês atual
+        """
+        mes_atual = self._indice_mes(self.data_inicial.month, self.data_inicial.year)
+        pendentes = np.zeros(self.meses + 1)
+        pago_mes_atual = 0.0
+        for mes_ano, despesas in self.controle.despesas.items():
+            mes, ano = mes_ano.split('/')
+            deslocamento = self._indice_mes(int(mes), int(ano)) - mes_atual
+            for despesa in despesas:
+                if despesa.is_gasto_fixo() or despesa.regra_id is not None:
+                    continue
+                if despesa.pago:
+                    if deslocamento == 0:
+                        pago_mes_atual += float(despesa.valor)
+                elif despesa.data_vencimento is not None and deslocamento <= self.meses:
+                    pendentes[max(deslocamento, 0)] += float(despesa.valor)
+        return pendentes, pago_mes_atual
+
+    def _metas_horizonte(self) -> List:
+        """Metas de gasto do mês atual em diante, dentro do horizonte simulado"""
+        mes_atual = self._indice_mes(self.data_inicial.month, self.data_inicial.year)
+        metas = []
+        for lista in getattr(self.controle, 'metas_gastos', {}).values():
+            for meta in lista:
+                deslocamento = self._indice_mes(meta.mes, meta.ano) - mes_atual
+                if 0 <= deslocamento <= self.meses:
+                    metas.append((deslocamento, meta))
+        return metas
+
+    def simular(self) -> Dict:
+        """
+        Executa a simulação.
+
+        Retorna um dicionário com:
+            saldo_inicial: soma dos saldos atuais
+            fluxo_conhecido: soma dos lançamentos conhecidos no horizonte (sem os variáveis)
+            saldos_finais: array com o saldo final de cada cenário
+            percentis: {p: saldo} para p em PERCENTIS
+            media, probabilidade_negativo
+            metas: lista com a probabilidade de estourar cada meta do horizonte
+        """
+        previsao = PrevisaoFluxoCaixa(self.controle, self.meses, self.data_inicial)
+        _, saldos = previsao._obter_contas()
+        saldo_inicial = float(saldos.sum())
+
+        # Lançamentos conhecidos (fixos, regras e receitas) no horizonte
+        datas, valores = previsao.coletar_lancamentos(variaveis_pendentes=False)
+        inicio = np.datetime64(self.data_inicial, 'D')
+        fim = np.datetime64(previsao.data_final, 'D')
+        dentro = (datas >= inicio) & (datas <= fim)
+        fluxo_conhecido = float(valores[dentro].sum())
+
+        # Gastos variáveis: sorteio de meses inteiros do histórico (cenários x meses,
+        # a coluna 0 é o mês atual), nunca abaixo do que já foi lançado em cada mês
+        categorias, historico = self.historico_variavel()
+        if historico.shape[1]:
+            sorteio = self._rng.integers(0, historico.shape[1], size=(self.caminhos, self.meses + 1))
+            sorteado = historico.sum(axis=0)[sorteio]
+        else:
+            sorteio = None
+            sorteado = np.zeros((self.caminhos, self.meses + 1))
+        pendentes, pago_mes_atual = self._variaveis_lancadas()
+        # Do mês atual só falta gastar o que ainda não foi pago
+        sorteado[:, 0] -= pago_mes_atual
+        gasto_variavel = np.maximum(sorteado, pendentes).sum(axis=1)
+
+        saldos_finais = saldo_inicial + fluxo_conhecido - gasto_variavel
+
+        # Metas: gasto do mês = fixos da categoria + variável sorteado para aquele mês,
+        # nunca abaixo do que já foi gasto
+        fixos = self._gastos_fixos_categoria()
+        indice_categoria = {nome: i for i, nome in enumerate(categorias)}
+        resultado_metas = []
+        for deslocamento, meta in self._metas_horizonte():
+            gasto_mes = np.full(self.caminhos, fixos.get(meta.categoria, 0.0))
+            linha = indice_categoria.get(meta.categoria)
+            if sorteio is not None and linha is not None:
+                gasto_mes = gasto_mes + historico[linha, sorteio[:, deslocamento]]
+            gasto_mes = np.maximum(gasto_mes, float(meta.gasto_atual))
+            resultado_metas.append({
+                'categoria': meta.categoria,
+                'mes': meta.mes,
+                'ano': meta.ano,
+                'limite': float(meta.limite_mensal),
+                'gasto_mediano': float(np.median(gasto_mes)),
+                'probabilidade_estouro': float((gasto_mes > meta.limite_mensal).mean())
+            })
+
+        return {
+            'saldo_inicial': saldo_inicial,
+            'fluxo_conhecido': fluxo_conhecido,
+            'meses_historico': int(historico.shape[1]),
+            'saldos_finais': saldos_finais,
+            'percentis': {p: float(v) for p, v in zip(PERCENTIS, np.percentile(saldos_finais, PERCENTIS))},
+            'media': float(saldos_finais.mean()),
+            'probabilidade_negativo': float((saldos_finais < 0).mean()),
+            'metas': sorted(resultado_metas, key=lambda item: -item['probabilidade_estouro'])
+        }
@@ -0,0 +1,15 @@
+"""
+Módulo de índices e busca sobre despesas e receitas
+"""
+from .base import IndiceRegistros
+from .indice_textual import IndiceInvertido, normalizar_texto, tokenizar
+from .indice_ordenado import IndiceOrdenado
+from .indice_bitmap import IndiceBitmap
+from .indice_trigramas import IndiceTrigramas, similaridade, trigramas
+from .consulta import ConsultaBusca, interpretar_consulta
+from .autocompletar import TrieSugestoes, SugestoesLancamentos, ler_com_sugestoes
+
+__all__ = ['IndiceRegistros', 'IndiceInvertido', 'IndiceOrdenado', 'IndiceBitmap', 'IndiceTrigramas',
+           'normalizar_texto', 'tokenizar', 'similaridade', 'trigramas',
+           'ConsultaBusca', 'interpretar_consulta',
+           'TrieSugestoes', 'SugestoesLancamentos', 'ler_com_sugestoes']
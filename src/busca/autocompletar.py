@@ -0,0 +1,219 @@
+"""
+Autocompletar de descrições e categorias: trie de prefixos ponderada por frequência e recência
+"""
+import threading
+from datetime import date
+from typing import Dict, List, Optional
+
+from .indice_textual import normalizar_texto
+
+try:
+    import readline
+except ImportError:  # Windows sem pyreadline3: a entrada funciona, só sem o Tab
+    readline = None
+
+
+# Em quantos dias o peso de um uso cai pela metade frente a um uso de hoje
+MEIA_VIDA_DIAS = 90
+
+# Sugestões guardadas em cada nó da trie (as melhores do prefixo)
+SUGESTOES_POR_PREFIXO = 8
+
+# Os pesos são 2 ** ((dia - ORIGEM) / MEIA_VIDA_DIAS): crescem com a data em vez de
+# decair com o tempo, então a ordem entre termos não muda com o passar dos dias e
+# um novo uso só soma ao peso do termo (não é preciso recalcular os outros)
+ORIGEM_PESOS = date(2000, 1, 1).toordinal()
+
+CAMPOS_SUGESTAO = ('descricao', 'categoria')
+
+
+def chave_sugestao(texto: str, prefixo: bool = False) -> str:
+    """Texto sem acentos, em minúsculas e com espaços simples (o prefixo mantém um espaço final)"""
+    chave = ' '.join(normalizar_texto(texto).split())
+    if prefixo and chave and texto[-1:].isspace():
+        chave += ' '
+    return chave
+
+
+class _NoTrie:
+    def __init__(self):
+        self.filhos: Dict[str, '_NoTrie'] = {}
+        self.melhores: List[str] = []  # chaves dos termos de maior peso com este prefixo
+
+
+class TrieSugestoes:
+    """
+    Trie de prefixos sobre textos digitados (descrições ou categorias).
+
+    Cada termo acumula um peso por uso, maior para usos mais recentes, e cada
+    nó guarda as chaves dos SUGESTOES_POR_PREFIXO termos mais pesados abaixo
+    dele: sugerir é descer pelos caracteres do prefixo, sem percorrer a
+    subárvore. Como os pesos só aumentam, a lista de cada nó se mantém exata
+    atualizando apenas os nós do caminho do termo inserido.
+    """
+
+    def __init__(self, tamanho_lista: int = SUGESTOES_POR_PREFIXO):
+        self.tamanho_lista = tamanho_lista
+        self._raiz = _NoTrie()
+        self._pesos: Dict[str, float] = {}
+        self._textos: Dict[str, str] = {}   # chave -> grafia do uso mais recente
+        self._ultimo_uso: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._pesos)
+
+    def inserir(self, texto: str, quando: Optional[date] = None):
+        """Registra um uso do texto na data informada (hoje se ausente)"""
+        chave = chave_sugestao(texto)
+        if not chave:
+            return
+        dia = (quando or date.today()).toordinal()
+        self._pesos[chave] = self._pesos.get(chave, 0.0) + 2.0 ** ((dia - ORIGEM_PESOS) / MEIA_VIDA_DIAS)
+        if dia >= self._ultimo_uso.get(chave, dia):
+            self._textos[chave] = ' '.join(texto.split())
+            self._ultimo_uso[chave] = dia
+
+        no = self._raiz
+        self._atualizar_melhores(no, chave)
+        for caractere in chave:
+            proximo = no.filhos.get(caractere)
+            if proximo is None:
+                proximo = no.filhos[caractere] = _NoTrie()
+            no = proximo
+            self._atualizar_melhores(no, chave)
+
+    def _atualizar_melhores(self, no: _NoTrie, chave: str):
+        melhores = no.melhores
+        if chave not in melhores:
+            if len(melhores) >= self.tamanho_lista and self._pesos[melhores[-1]] >= self._pesos[chave]:
+                return
+            melhores.append(chave)
+        melhores.sort(key=lambda termo: (-self._pesos[termo], termo))
+        del melhores[self.tamanho_lista:]
+
+    def sugerir(self, prefixo: str, limite: int = SUGESTOES_POR_PREFIXO) -> List[str]:
+        """Textos que começam com o prefixo (sem diferenciar acentos e maiúsculas), do mais relevante ao menos"""
+        no = self._raiz
+        for caractere in chave_sugestao(prefixo, prefixo=True):
+            no = no.filhos.get(caractere)
+            if no is None:
+                return []
+        return [self._textos[chave] for chave in no.melhores[:limite]]
+
+
+class SugestoesLancamentos:
+    """
+    Sugestões de descrição e categoria de despesas e receitas de um controle.
+
+    As tries são montadas a partir do histórico (iterar_despesas/iterar_receitas)
+    em uma thread em segundo plano, e as sugestões já respondem com o que foi
+    lido até o momento. Depois de iniciadas, as inclusões e edições chegam
+    pelas notificações do controle; uma recarga completa refaz as tries.
+    """
+
+    def __init__(self, controle):
+        self.controle = controle
+        self.pronto = threading.Event()
+        self._trava = threading.Lock()
+        self._iniciado = False
+        self._geracao = 0
+        self._tries = self._novas_tries()
+
+    @staticmethod
+    def _novas_tries() -> Dict[str, Dict[str, TrieSugestoes]]:
+        return {tipo: {campo: TrieSugestoes() for campo in CAMPOS_SUGESTAO} for tipo in ('despesa', 'receita')}
+
+    @staticmethod
+    def _data_uso(registro) -> Optional[date]:
+        """Data que mede a recência do registro (pagamento, vencimento ou recebimento)"""
+        return (getattr(registro, 'data_pagamento', None) or getattr(registro, 'data_vencimento', None)
+                or getattr(registro, 'data_recebimento', None))
+
+    def _inserir_registro(self, tipo: str, registro, campos=CAMPOS_SUGESTAO):
+        quando = self._data_uso(registro)
+        with self._trava:
+            tries = self._tries[tipo]
+            for campo in campos:
+                tries[campo].inserir(getattr(registro, campo), quando)
+
+    def iniciar_em_segundo_plano(self) -> threading.Thread:
+        """Começa a montar as tries a partir do histórico em uma thread daemon"""
+        with self._trava:
+            self._iniciado = True
+            self._geracao += 1
+            geracao = self._geracao
+            self._tries = self._novas_tries()
+            self.pronto.clear()
+        thread = threading.Thread(target=self._construir, args=(geracao,),
+                                  name='sugestoes-lancamentos', daemon=True)
+        thread.start()
+        return thread
+
+    def _construir(self, geracao: int):
+        try:
+            for tipo, iterar in (('despesa', self.controle.iterar_despesas),
+                                 ('receita', self.controle.iterar_receitas)):
+                for registro, _, _ in iterar():
+                    if geracao != self._geracao:  # uma recarga iniciou outra montagem
+                        return
+                    self._inserir_registro(tipo, registro)
+        except Exception as e:
+            print(f"\n⚠️ Não foi possível carregar as sugestões de preenchimento: {e}")
+            return
+        if geracao == self._geracao:
+            self.pronto.set()
+
+    def ao_alterar(self, tipo: str, mes: Optional[int], ano: Optional[int], antes=None, depois=None):
+        """Ouvinte de alterações do controle financeiro"""
+        if not self._iniciado or tipo not in self._tries:
+            return
+        if depois is not None:
+            # Inclusão conta um uso; edição (inclusive pagamento) só dos campos que mudaram
+            campos = CAMPOS_SUGESTAO if antes is None else \
+                [campo for campo in CAMPOS_SUGESTAO if getattr(antes, campo) != getattr(depois, campo)]
+            if campos:
+                self._inserir_registro(tipo, depois, campos)
+        elif antes is None and mes is None:
+            self.iniciar_em_segundo_plano()
+
+    def sugerir(self, tipo: str, campo: str, prefixo: str, limite: int = SUGESTOES_POR_PREFIXO) -> List[str]:
+        """Sugestões para o campo ('descricao' ou 'categoria') do tipo ('despesa' ou 'receita')"""
+        with self._trava:
+            return self._tries[tipo][campo].sugerir(prefixo, limite)
+
+
+_readline_configurado = False
+
+
+def _configurar_readline():
+    global _readline_configurado
+    if _readline_configurado:
+        return
+    if 'libedit' in (readline.__doc__ or ''):  # macOS
+        readline.parse_and_bind('bind ^I rl_complete')
+    else:
+        readline.parse_and_bind('tab: complete')
+    _readline_configurado = True
+
+
+def ler_com_sugestoes(mensagem: str, sugestoes: Optional[SugestoesLancamentos], tipo: str, campo: str) -> str:
+    """input() com Tab completando o campo pelas sugestões (sem readline, é um input() comum)"""
+    if readline is None or sugestoes is None:
+        return input(mensagem)
+
+    _configurar_readline()
+    encontrados: List[str] = []
+
+    def completar(texto: str, estado: int) -> Optional[str]:
+        if estado == 0:
+            encontrados[:] = sugestoes.sugerir(tipo, campo, texto)
+        return encontrados[estado] if estado < len(encontrados) else None
+
+    completar_anterior, delimitadores = readline.get_completer(), readline.get_completer_delims()
+    readline.set_completer(completar)
+    readline.set_completer_delims('')  # completa a linha inteira, não só a última palavra
+    try:
+        return input(mensagem)
+    finally:
+        readline.set_completer(completar_anterior)
+        readline.set_completer_delims(delimitadores)
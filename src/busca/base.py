@@ -0,0 +1,98 @@
+"""
+Base dos índices em memória mantidos pelas notificações do controle
+"""
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+class IndiceRegistros:
+    """
+    Índice secundário sobre os registros de um tipo ('despesa' ou 'receita').
+
+    Controla quais registros estão indexados e em que mês, reage às
+    notificações de alteração do controle (inclusão, edição, remoção e
+    recarga de mês) e se reconstrói em uma passada quando os dados são
+    recarregados por completo. As subclasses implementam `_indexar`,
+    `_desindexar` e `_limpar_estrutura`.
+    """
+
+    def __init__(self, tipo: str, fonte: Callable[[], Dict[str, List]],
+                 chave_mes: Callable[[int, int], str]):
+        self.tipo = tipo
+        self._fonte = fonte
+        self._chave_mes = chave_mes
+        self._membros: Dict[int, Tuple[object, str]] = {}  # id -> (registro, mes_ano)
+        self._membros_mes: Dict[str, Set[int]] = {}
+        self._desatualizado = True
+
+    # ==================== GANCHOS DAS SUBCLASSES ====================
+
+    def _indexar(self, chave: int, registro, mes_ano: str):
+        raise NotImplementedError
+
+    def _desindexar(self, chave: int, registro):
+        raise NotImplementedError
+
+    def _limpar_estrutura(self):
+        raise NotImplementedError
+
+    # ==================== MANUTENÇÃO ====================
+
+    def _limpar(self):
+        self._membros, self._membros_mes = {}, {}
+        self._limpar_estrutura()
+
+    def adicionar(self, registro, mes_ano: str):
+        """Indexa um registro (ou reindexa, se já estiver no índice)"""
+        chave = id(registro)
+        if chave in self._membros:
+            anterior = self._membros[chave][1]
+            self._membros_mes.get(anterior, set()).discard(chave)
+            self._desindexar(chave, registro)
+        self._membros[chave] = (registro, mes_ano)
+        self._membros_mes.setdefault(mes_ano, set()).add(chave)
+        self._indexar(chave, registro, mes_ano)
+
+    def remover(self, registro):
+        """Retira um registro do índice"""
+        chave = id(registro)
+        if chave not in self._membros:
+            return
+        _, mes_ano = self._membros.pop(chave)
+        self._membros_mes.get(mes_ano, set()).discard(chave)
+        self._desindexar(chave, registro)
+
+    def _recarregar_mes(self, mes_ano: str):
+        """Reindexa os registros de um mês"""
+        for chave in list(self._membros_mes.get(mes_ano, ())):
+            self.remover(self._membros[chave][0])
+        for registro in self._fonte().get(mes_ano, []):
+            self.adicionar(registro, mes_ano)
+
+    def reconstruir(self):
+        """Reconstrói o índice em uma única passada pelos registros"""
+        self._limpar()
+        for mes_ano, registros in self._fonte().items():
+            for registro in registros:
+                self.adicionar(registro, mes_ano)
+        self._desatualizado = False
+
+    def ao_alterar(self, tipo: str, mes: Optional[int], ano: Optional[int], antes=None, depois=None):
+        """Ouvinte de alterações do controle financeiro"""
+        if tipo != self.tipo or self._desatualizado:
+            return
+
+        if antes is None and depois is None:
+            if mes is None or ano is None:
+                self._desatualizado = True
+            else:
+                self._recarregar_mes(self._chave_mes(mes, ano))
+        elif depois is not None:
+            # Inclusão ou edição: `depois` é o próprio registro armazenado
+            self.adicionar(depois, self._chave_mes(mes, ano))
+        else:
+            # Remoção: `antes` é o registro retirado da lista
+            self.remover(antes)
+
+    def _garantir_atualizado(self):
+        if self._desatualizado:
+            self.reconstruir()
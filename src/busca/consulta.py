@@ -0,0 +1,152 @@
+"""
+Mini-linguagem de busca em uma linha (ex.: categoria:alimentação valor>100 desde:01/01/2024 pago:nao "mercado")
+"""
+import calendar
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from .indice_textual import normalizar_texto
+
+
+# campo, operador e valor (aspas permitem espaços) | frase entre aspas | palavra solta
+_PADRAO_PARTE = re.compile(r'(\w+)(>=|<=|:|>|<|=)("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+
+# Menor diferença entre valores (centavos): 'valor>100' vira 'valor >= 100.01'
+CENTAVO = 0.01
+
+FLAG_EXPLICAR = '--explain'
+
+AJUDA_CONSULTA = (
+    "Campos: categoria:<nome>  valor>100  valor<=500  valor=50  pago:sim|nao\n"
+    "        desde:DD/MM/AAAA  ate:DD/MM/AAAA  data:DD/MM/AAAA  mes:MM/AAAA\n"
+    "Texto:  palavras soltas ou \"frase entre aspas\" na descrição\n"
+    f"Opções: {FLAG_EXPLICAR} mostra o SQL/plano gerado e os tempos"
+)
+
+_VERDADEIRO = {'sim', 's', 'true', '1', 'pago', 'pagas'}
+_FALSO = {'nao', 'n', 'false', '0', 'pendente', 'pendentes'}
+
+
+class ConsultaBusca:
+    """Filtros de uma consulta em uma linha, já interpretados e validados"""
+
+    def __init__(self, texto: str = ""):
+        self.texto = texto
+        self.palavras: List[str] = []
+        self.categoria = ""
+        self.valor_min = 0.0
+        self.valor_max = float('inf')
+        self.pago: Optional[bool] = None
+        self.data_inicio: Optional[date] = None
+        self.data_fim: Optional[date] = None
+        self.explicar = False
+
+    @property
+    def termo(self) -> str:
+        return ' '.join(self.palavras)
+
+    def argumentos(self, tipo: str = 'despesa') -> Dict:
+        """Argumentos de buscar_*/planejar_busca_*/iterar_busca_* dos controles"""
+        argumentos = {
+            'termo': self.termo,
+            'categoria': self.categoria,
+            'valor_min': self.valor_min,
+            'valor_max': self.valor_max,
+            'data_inicio': self.data_inicio.strftime('%d/%m/%Y') if self.data_inicio else "",
+            'data_fim': self.data_fim.strftime('%d/%m/%Y') if self.data_fim else ""
+        }
+        if tipo == 'despesa':
+            argumentos['apenas_pagas'] = self.pago
+        elif self.pago is not None:
+            raise ValueError("O filtro 'pago' só se aplica a despesas")
+        return argumentos
+
+
+def _data(valor: str) -> date:
+    try:
+        return datetime.strptime(valor, "%d/%m/%Y").date()
+    except ValueError:
+        raise ValueError(f"Data inválida '{valor}' (use DD/MM/AAAA)")
+
+
+def _numero(valor: str) -> float:
+    try:
+        return float(valor.replace(',', '.'))
+    except ValueError:
+        raise ValueError(f"Valor inválido '{valor}'")
+
+
+def _aplicar_valor(consulta: ConsultaBusca, operador: str, valor: float):
+    """Estreita a faixa de valores (várias condições se combinam)"""
+    if operador in ('>', '>='):
+        minimo = valor + CENTAVO if operador == '>' else valor
+        consulta.valor_min = max(consulta.valor_min, minimo)
+    elif operador in ('<', '<='):
+        maximo = valor - CENTAVO if operador == '<' else valor
+        consulta.valor_max = min(consulta.valor_max, maximo)
+    else:
+        consulta.valor_min = max(consulta.valor_min, valor)
+        consulta.valor_max = min(consulta.valor_max, valor)
+
+
+def interpretar_consulta(texto: str) -> ConsultaBusca:
+    """
+    Interpreta a consulta em uma linha. Campos desconhecidos, datas e valores
+    inválidos geram ValueError com a explicação.
+    """
+    consulta = ConsultaBusca(texto)
+
+    for parte in _PADRAO_PARTE.finditer(texto or ""):
+        campo, operador, valor, frase, palavra = parte.groups()
+
+        if palavra is not None:
+            if palavra.lower() == FLAG_EXPLICAR:
+                consulta.explicar = True
+            else:
+                consulta.palavras.append(palavra)
+            continue
+        if frase is not None:
+            if frase.strip():
+                consulta.palavras.append(frase.strip())
+            continue
+
+        campo = normalizar_texto(campo)
+        valor = valor[1:-1] if valor.startswith('"') and valor.endswith('"') and len(valor) > 1 else valor
+
+        if campo == 'valor':
+            _aplicar_valor(consulta, operador, _numero(valor))
+        elif operador != ':':
+            raise ValueError(f"Operador '{operador}' não se aplica a '{campo}' (use {campo}:...)")
+        elif campo in ('categoria', 'cat'):
+            consulta.categoria = valor
+        elif campo == 'pago':
+            normalizado = normalizar_texto(valor)
+            if normalizado in _VERDADEIRO:
+                consulta.pago = True
+            elif normalizado in _FALSO:
+                consulta.pago = False
+            else:
+                raise ValueError(f"Valor inválido para pago: '{valor}' (use sim ou nao)")
+        elif campo == 'desde':
+            consulta.data_inicio = _data(valor)
+        elif campo == 'ate':
+            consulta.data_fim = _data(valor)
+        elif campo == 'data':
+            consulta.data_inicio = consulta.data_fim = _data(valor)
+        elif campo == 'mes':
+            try:
+                inicio = datetime.strptime(valor, "%m/%Y").date()
+            except ValueError:
+                raise ValueError(f"Mês inválido '{valor}' (use MM/AAAA)")
+            # Faixa de datas em vez de mes/ano: mantém o filtro sobre a coluna de data indexada
+            consulta.data_inicio = inicio
+            consulta.data_fim = inicio + timedelta(days=calendar.monthrange(inicio.year, inicio.month)[1] - 1)
+        else:
+            raise ValueError(f"Campo desconhecido '{campo}'")
+
+    if consulta.valor_min > consulta.valor_max:
+        raise ValueError("Faixa de valores vazia")
+    if consulta.data_inicio and consulta.data_fim and consulta.data_inicio > consulta.data_fim:
+        raise ValueError("A data inicial é posterior à final")
+    return consulta
@@ -0,0 +1,143 @@
+"""
+Índices bitmap sobre atributos de poucos valores (pago, tipo, categoria, conta...)
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from .base import IndiceRegistros
+
+
+def _categoria(registro) -> str:
+    return (registro.categoria or "").lower()
+
+
+# Atributo -> função que extrai o valor indexado do registro
+ATRIBUTOS_DESPESA: Dict[str, Callable] = {
+    'pago': lambda despesa: bool(despesa.pago),
+    'tipo': lambda despesa: despesa.tipo,
+    'despesa_fixa': lambda despesa: bool(despesa.despesa_fixa),
+    'categoria': _categoria,
+    'conta': lambda despesa: getattr(despesa, 'conta', None),
+}
+
+ATRIBUTOS_RECEITA: Dict[str, Callable] = {
+    'categoria': _categoria,
+}
+
+
+class IndiceBitmap(IndiceRegistros):
+    """
+    Um bitmap (inteiro do Python, bit i = registro na posição i) por valor de
+    cada atributo, além do mês e do ano de cada registro.
+
+    Filtros com vários atributos viram AND/OR de inteiros, e os registros só
+    são materializados no final. As posições de registros removidos são
+    reaproveitadas, para os bitmaps não crescerem com as edições.
+    """
+
+    def __init__(self, tipo: str, fonte: Callable[[], Dict[str, List]],
+                 chave_mes: Callable[[int, int], str], atributos: Dict[str, Callable]):
+        super().__init__(tipo, fonte, chave_mes)
+        self.atributos = dict(atributos)
+        self._limpar_estrutura()
+
+    # ==================== MANUTENÇÃO ====================
+
+    def _limpar_estrutura(self):
+        self._posicoes: Dict[int, int] = {}               # id -> posição
+        self._ocupantes: List[Optional[int]] = []         # posição -> id
+        self._livres: List[int] = []
+        self._vivos = 0
+        # atributo -> {valor: bitmap}; 'mes_ano' e 'ano' vêm do mês em que o registro está
+        self._bitmaps: Dict[str, Dict[Any, int]] = {nome: {} for nome in (*self.atributos, 'mes_ano', 'ano')}
+        self._valores: Dict[int, Tuple[Tuple[str, Any], ...]] = {}  # id -> valores indexados
+
+    def _indexar(self, chave: int, registro, mes_ano: str):
+        posicao = self._livres.pop() if self._livres else len(self._ocupantes)
+        if posicao == len(self._ocupantes):
+            self._ocupantes.append(chave)
+        else:
+            self._ocupantes[posicao] = chave
+        self._posicoes[chave] = posicao
+        bit = 1 << posicao
+        self._vivos |= bit
+
+        valores = [(nome, extrair(registro)) for nome, extrair in self.atributos.items()]
+        valores.append(('mes_ano', mes_ano))
+        valores.append(('ano', int(mes_ano.split('/')[1])))
+        for nome, valor in valores:
+            bitmaps = self._bitmaps[nome]
+            bitmaps[valor] = bitmaps.get(valor, 0) | bit
+        self._valores[chave] = tuple(valores)
+
+    def _desindexar(self, chave: int, registro):
+        # Usa os valores guardados: o registro pode já ter sido alterado (edição)
+        posicao = self._posicoes.pop(chave, None)
+        if posicao is None:
+            return
+        bit = 1 << posicao
+        for nome, valor in self._valores.pop(chave, ()):
+            bitmaps = self._bitmaps[nome]
+            restante = bitmaps[valor] ^ bit
+            if restante:
+                bitmaps[valor] = restante
+            else:
+                del bitmaps[valor]
+        self._vivos ^= bit
+        self._ocupantes[posicao] = None
+        self._livres.append(posicao)
+
+    # ==================== CONSULTAS ====================
+
+    def valores(self, atributo: str) -> List[Any]:
+        """Valores distintos presentes para o atributo"""
+        self._garantir_atualizado()
+        return list(self._bitmaps[atributo].keys())
+
+    def bitmap(self, atributo: str, valor) -> int:
+        """Bitmap dos registros com o atributo igual ao valor (uma lista/tupla/conjunto faz OR)"""
+        self._garantir_atualizado()
+        bitmaps = self._bitmaps[atributo]
+        if isinstance(valor, (list, tuple, set, frozenset)):
+            resultado = 0
+            for item in valor:
+                resultado |= bitmaps.get(item, 0)
+            return resultado
+        return bitmaps.get(valor, 0)
+
+    def filtrar(self, **criterios) -> int:
+        """
+        AND dos critérios (atributo=valor ou atributo=[valores], None ignora).
+        Retorna o bitmap; use contar() e materializar() sobre ele.
+        """
+        self._garantir_atualizado()
+        resultado = self._vivos
+        # Do critério mais seletivo para o menos: o AND zera cedo quando não há resultado
+        bitmaps = sorted((self.bitmap(atributo, valor) for atributo, valor in criterios.items()
+                          if valor is not None), key=self.contar)
+        for bitmap in bitmaps:
+            resultado &= bitmap
+            if not resultado:
+                break
+        return resultado
+
+    @staticmethod
+    def contar(bitmap: int) -> int:
+        """Quantidade de registros no bitmap"""
+        return bin(bitmap).count('1')
+
+    def posicoes(self, bitmap: int) -> np.ndarray:
+        """Posições ligadas no bitmap, em ordem crescente"""
+        if not bitmap:
+            return np.zeros(0, dtype=np.int64)
+        dados = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(dados, bitorder='little'))
+
+    def materializar(self, bitmap: int) -> List[Tuple[object, str]]:
+        """Registros (registro, mes_ano) do bitmap"""
+        self._garantir_atualizado()
+        return [self._membros[self._ocupantes[posicao]] for posicao in self.posicoes(bitmap & self._vivos)]
+
+    def bitmap_meses(self, meses: Iterable[str]) -> int:
+        """OR dos bitmaps dos meses (chaves 'MM/AAAA')"""
+        return self.bitmap('mes_ano', tuple(meses))
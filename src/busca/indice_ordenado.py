@@ -0,0 +1,103 @@
+"""
+Índice ordenado por um atributo (data ou valor) para consultas por faixa
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .base import IndiceRegistros
+
+
+class IndiceOrdenado(IndiceRegistros):
+    """
+    Mantém os registros ordenados por um atributo (ex.: data_vencimento, valor).
+
+    As chaves ficam em uma lista ordenada de (valor, sequência), paralela à lista
+    de registros, e uma consulta por faixa vira duas buscas binárias e uma
+    fatia. Registros sem valor no atributo (despesas instantâneas não têm
+    vencimento) ficam fora do índice, assim como os que não atendem à
+    `condicao` opcional (ex.: só despesas pendentes); como as notificações
+    reindexam o registro alterado, ele entra e sai do índice sozinho.
+    """
+
+    def __init__(self, tipo: str, campo: str, fonte: Callable[[], Dict[str, List]],
+                 chave_mes: Callable[[int, int], str], condicao: Optional[Callable[[object], bool]] = None):
+        super().__init__(tipo, fonte, chave_mes)
+        self.campo = campo
+        self.condicao = condicao
+        self._chaves: List[Tuple[Any, int]] = []
+        self._itens: List[int] = []
+        self._entradas: Dict[int, Tuple[Any, int]] = {}  # id -> chave usada na inserção
+        self._sequencia = 0
+
+    # ==================== MANUTENÇÃO ====================
+
+    def _limpar_estrutura(self):
+        self._chaves, self._itens, self._entradas = [], [], {}
+        self._sequencia = 0
+
+    def _nova_entrada(self, chave: int, registro) -> Optional[Tuple[Any, int]]:
+        valor = getattr(registro, self.campo, None)
+        if valor is None or (self.condicao is not None and not self.condicao(registro)):
+            return None
+        entrada = (valor, self._sequencia)
+        self._sequencia += 1
+        self._entradas[chave] = entrada
+        return entrada
+
+    def _indexar(self, chave: int, registro, mes_ano: str):
+        entrada = self._nova_entrada(chave, registro)
+        if entrada is None:
+            return
+        posicao = bisect_right(self._chaves, entrada)
+        self._chaves.insert(posicao, entrada)
+        self._itens.insert(posicao, chave)
+
+    def _desindexar(self, chave: int, registro):
+        # Usa a chave guardada: o atributo pode já ter sido alterado (edição)
+        entrada = self._entradas.pop(chave, None)
+        if entrada is None:
+            return
+        posicao = bisect_left(self._chaves, entrada)
+        del self._chaves[posicao]
+        del self._itens[posicao]
+
+    def reconstruir(self):
+        """Reconstrói o índice ordenando todos os registros de uma vez"""
+        self._limpar()
+        entradas = []
+        for mes_ano, registros in self._fonte().items():
+            for registro in registros:
+                chave = id(registro)
+                self._membros[chave] = (registro, mes_ano)
+                self._membros_mes.setdefault(mes_ano, set()).add(chave)
+                entrada = self._nova_entrada(chave, registro)
+                if entrada is not None:
+                    entradas.append((entrada, chave))
+
+        entradas.sort()
+        self._chaves = [entrada for entrada, _ in entradas]
+        self._itens = [chave for _, chave in entradas]
+        self._desatualizado = False
+
+    # ==================== CONSULTAS ====================
+
+    def _limites(self, minimo=None, maximo=None) -> Tuple[int, int]:
+        """Posições [inicio, fim) das chaves dentro da faixa (limites inclusivos)"""
+        inicio = 0 if minimo is None else bisect_left(self._chaves, (minimo,))
+        fim = len(self._chaves) if maximo is None else bisect_right(self._chaves, (maximo, float('inf')))
+        return inicio, max(inicio, fim)
+
+    def contar(self, minimo=None, maximo=None) -> int:
+        """Quantidade de registros na faixa, sem materializá-los"""
+        self._garantir_atualizado()
+        inicio, fim = self._limites(minimo, maximo)
+        return fim - inicio
+
+    def faixa(self, minimo=None, maximo=None, decrescente: bool = False) -> List[Tuple[object, str]]:
+        """Registros (registro, mes_ano) com o atributo entre minimo e maximo, em ordem"""
+        self._garantir_atualizado()
+        inicio, fim = self._limites(minimo, maximo)
+        chaves = self._itens[inicio:fim]
+        if decrescente:
+            chaves.reverse()
+        return [self._membros[chave] for chave in chaves]
@@ -0,0 +1,174 @@
+"""
+Índice invertido (token -> registros) sobre a descrição de despesas e receitas
+"""
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .base import IndiceRegistros
+
+
+_PADRAO_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas e sem acentos ('Padaria São João' -> 'padaria sao joao')"""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Quebra o texto normalizado em palavras"""
+    return _PADRAO_TOKEN.findall(normalizar_texto(texto))
+
+
+class IndiceInvertido(IndiceRegistros):
+    """
+    Índice invertido sobre `descricao` de um tipo de registro ('despesa' ou 'receita').
+
+    Cada token aponta para o conjunto de registros que o contém e o vocabulário
+    fica ordenado, de modo que a busca por prefixo é uma faixa encontrada com
+    bisect. Uma busca custa proporcionalmente aos registros encontrados, não ao
+    histórico inteiro.
+    """
+
+    def __init__(self, tipo: str, fonte: Callable[[], Dict[str, List]],
+                 chave_mes: Callable[[int, int], str]):
+        super().__init__(tipo, fonte, chave_mes)
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulario: List[str] = []
+        self._tokens_registro: Dict[int, Tuple[str, ...]] = {}
+        self._ordem: Dict[int, int] = {}  # ordem de inclusão, para devolver resultados estáveis
+        self._proxima_ordem = 0
+
+    # ==================== MANUTENÇÃO ====================
+
+    def _limpar_estrutura(self):
+        self._postings, self._vocabulario, self._tokens_registro = {}, [], {}
+        self._ordem, self._proxima_ordem = {}, 0
+
+    def _adicionar_tokens(self, chave: int, tokens: Tuple[str, ...]):
+        self._tokens_registro[chave] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                insort(self._vocabulario, token)
+            postings.add(chave)
+
+    def _indexar(self, chave: int, registro, mes_ano: str):
+        if chave not in self._ordem:
+            self._ordem[chave] = self._proxima_ordem
+            self._proxima_ordem += 1
+        self._adicionar_tokens(chave, tuple(set(tokenizar(registro.descricao))))
+
+    def _desindexar(self, chave: int, registro):
+        for token in self._tokens_registro.pop(chave, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(chave)
+            if not postings:
+                del self._postings[token]
+                posicao = bisect_left(self._vocabulario, token)
+                if posicao < len(self._vocabulario) and self._vocabulario[posicao] == token:
+                    self._vocabulario.pop(posicao)
+
+    def remover(self, registro):
+        """Retira um registro do índice"""
+        super().remover(registro)
+        self._ordem.pop(id(registro), None)
+
+    # ==================== BUSCA ====================
+
+    def _registros_prefixo(self, prefixo: str) -> Set[int]:
+        """União dos postings de todos os tokens que começam com o prefixo"""
+        encontrados: Set[int] = set()
+        posicao = bisect_left(self._vocabulario, prefixo)
+        while posicao < len(self._vocabulario) and self._vocabulario[posicao].startswith(prefixo):
+            encontrados |= self._postings[self._vocabulario[posicao]]
+            posicao += 1
+        return encontrados
+
+    def buscar(self, termo: str) -> Optional[List[Tuple[object, str]]]:
+        """
+        Registros cuja descrição tem, para cada palavra do termo, uma palavra
+        começando por ela (sem diferenciar acentos e maiúsculas).
+        Retorna lista de (registro, mes_ano) na ordem de inclusão, ou None se
+        o termo não tiver palavras indexáveis.
+        """
+        tokens = tokenizar(termo)
+        if not tokens:
+            return None
+        self._garantir_atualizado()
+
+        conjuntos = sorted((self._registros_prefixo(token) for token in set(tokens)), key=len)
+        resultado = conjuntos[0]
+        for conjunto in conjuntos[1:]:
+            if not resultado:
+                break
+            resultado = resultado & conjunto
+
+        return [self._membros[chave] for chave in sorted(resultado, key=self._ordem.__getitem__)]
+
+    # ==================== PERSISTÊNCIA ====================
+
+    def exportar(self) -> Dict:
+        """Serializa o índice como {token: {mes_ano: [posições]}} junto com o tamanho de cada mês"""
+        self._garantir_atualizado()
+        posicoes: Dict[int, Tuple[str, int]] = {}
+        meses: Dict[str, int] = {}
+        for mes_ano, registros in self._fonte().items():
+            meses[mes_ano] = len(registros)
+            for posicao, registro in enumerate(registros):
+                posicoes[id(registro)] = (mes_ano, posicao)
+
+        postings: Dict[str, Dict[str, List[int]]] = {}
+        for token in self._vocabulario:
+            por_mes = postings[token] = {}
+            for chave in self._postings[token]:
+                mes_ano, posicao = posicoes[chave]
+                por_mes.setdefault(mes_ano, []).append(posicao)
+        return {'meses': meses, 'postings': postings}
+
+    def restaurar(self, dados: Optional[Dict]) -> bool:
+        """
+        Restaura o índice salvo, sem retokenizar as descrições.
+        Se os dados salvos não baterem com os registros carregados, o índice
+        fica marcado para reconstrução e retorna False.
+        """
+        fonte = self._fonte()
+        if not dados or dados.get('meses') != {mes_ano: len(registros) for mes_ano, registros in fonte.items()}:
+            self._desatualizado = True
+            return False
+
+        self._limpar()
+        for mes_ano, registros in fonte.items():
+            for registro in registros:
+                chave = id(registro)
+                self._membros[chave] = (registro, mes_ano)
+                self._membros_mes.setdefault(mes_ano, set()).add(chave)
+                self._ordem[chave] = self._proxima_ordem
+                self._proxima_ordem += 1
+
+        tokens_registro: Dict[int, List[str]] = {}
+        try:
+            for token, por_mes in dados.get('postings', {}).items():
+                for mes_ano, posicoes in por_mes.items():
+                    for posicao in posicoes:
+                        tokens_registro.setdefault(id(fonte[mes_ano][posicao]), []).append(token)
+        except (KeyError, IndexError, TypeError):
+            self._desatualizado = True
+            return False
+
+        self._vocabulario = sorted(dados.get('postings', {}).keys())
+        for chave, tokens in tokens_registro.items():
+            self._tokens_registro[chave] = tuple(tokens)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(chave)
+        for chave in self._membros:
+            self._tokens_registro.setdefault(chave, ())
+
+        self._desatualizado = False
+        return True
@@ -0,0 +1,128 @@
+"""
+Índice de trigramas para busca aproximada (tolerante a erros de digitação) na descrição
+"""
+import math
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .base import IndiceRegistros
+from .indice_textual import tokenizar
+
+
+# Similaridade mínima para um registro entrar no resultado (0 a 1)
+LIMIAR_SIMILARIDADE = 0.3
+
+
+def trigramas_palavra(palavra: str) -> FrozenSet[str]:
+    """Trigramas de uma palavra já normalizada, com bordas ('sal' -> '  s', ' sa', 'sal', 'al ')"""
+    texto = f"  {palavra} "
+    return frozenset(texto[i:i + 3] for i in range(len(texto) - 2))
+
+
+def trigramas(texto: str) -> Set[str]:
+    """Trigramas de todas as palavras do texto (sem acentos e em minúsculas)"""
+    resultado: Set[str] = set()
+    for palavra in tokenizar(texto):
+        resultado |= trigramas_palavra(palavra)
+    return resultado
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    comuns = len(a & b)
+    return comuns / (len(a) + len(b) - comuns) if comuns else 0.0
+
+
+def _similaridade_palavras(consulta: List[FrozenSet[str]], palavras: Tuple[FrozenSet[str], ...]) -> float:
+    """Média, entre as palavras da consulta, da melhor semelhança com alguma palavra do texto"""
+    if not consulta or not palavras:
+        return 0.0
+    return sum(max(_jaccard(q, p) for p in palavras) for q in consulta) / len(consulta)
+
+
+def similaridade(termo: str, texto: str) -> float:
+    """Semelhança entre o termo buscado e um texto, de 0 (nada em comum) a 1"""
+    consulta = [trigramas_palavra(p) for p in dict.fromkeys(tokenizar(termo))]
+    palavras = tuple(trigramas_palavra(p) for p in dict.fromkeys(tokenizar(texto)))
+    return _similaridade_palavras(consulta, palavras)
+
+
+def minimo_trigramas_comuns(termo: str, limiar: float = LIMIAR_SIMILARIDADE) -> int:
+    """
+    Trigramas em comum que um texto precisa ter com o termo para poder
+    alcançar o limiar: alguma palavra do termo tem que atingir o limiar
+    sozinha, e a semelhança de uma palavra nunca passa de comuns / trigramas dela.
+    """
+    tamanhos = [len(trigramas_palavra(p)) for p in tokenizar(termo)]
+    if not tamanhos:
+        return 1
+    return max(1, math.ceil(limiar * min(tamanhos) - 1e-9))
+
+
+class IndiceTrigramas(IndiceRegistros):
+    """
+    Índice de trigramas sobre `descricao` de um tipo de registro.
+
+    Cada trigrama aponta para os registros que o contêm; uma busca soma, por
+    registro, os trigramas em comum com o termo e só calcula a semelhança dos
+    registros com trigramas suficientes, sem varrer o histórico. A comparação
+    ignora acentos e maiúsculas ('agua' encontra 'Água') e tolera erros de
+    digitação ('supermecado' encontra 'Supermercado').
+    """
+
+    def __init__(self, tipo: str, fonte: Callable[[], Dict[str, List]],
+                 chave_mes: Callable[[int, int], str]):
+        super().__init__(tipo, fonte, chave_mes)
+        self._postings: Dict[str, Set[int]] = {}
+        self._palavras_registro: Dict[int, Tuple[FrozenSet[str], ...]] = {}
+
+    # ==================== MANUTENÇÃO ====================
+
+    def _limpar_estrutura(self):
+        self._postings, self._palavras_registro = {}, {}
+
+    def _indexar(self, chave: int, registro, mes_ano: str):
+        palavras = tuple(trigramas_palavra(p) for p in dict.fromkeys(tokenizar(registro.descricao)))
+        self._palavras_registro[chave] = palavras
+        for trigrama in frozenset().union(*palavras):
+            self._postings.setdefault(trigrama, set()).add(chave)
+
+    def _desindexar(self, chave: int, registro):
+        palavras = self._palavras_registro.pop(chave, ())
+        for trigrama in frozenset().union(*palavras):
+            postings = self._postings.get(trigrama)
+            if postings is None:
+                continue
+            postings.discard(chave)
+            if not postings:
+                del self._postings[trigrama]
+
+    # ==================== BUSCA ====================
+
+    def buscar(self, termo: str, limiar: float = LIMIAR_SIMILARIDADE,
+               limite: Optional[int] = None) -> Optional[List[Tuple[object, str, float]]]:
+        """
+        Registros parecidos com o termo, do mais para o menos semelhante.
+        Retorna lista de (registro, mes_ano, similaridade), ou None se o termo
+        não tiver palavras.
+        """
+        consulta = [trigramas_palavra(p) for p in dict.fromkeys(tokenizar(termo))]
+        if not consulta:
+            return None
+        self._garantir_atualizado()
+
+        comuns: Counter = Counter()
+        for trigrama in frozenset().union(*consulta):
+            comuns.update(self._postings.get(trigrama, ()))
+
+        minimo = minimo_trigramas_comuns(termo, limiar)
+        resultados = []
+        for chave, quantidade in comuns.items():
+            if quantidade < minimo:
+                continue
+            valor = _similaridade_palavras(consulta, self._palavras_registro[chave])
+            if valor >= limiar:
+                registro, mes_ano = self._membros[chave]
+                resultados.append((registro, mes_ano, valor))
+
+        resultados.sort(key=lambda item: (-item[2], item[0].descricao.lower()))
+        return resultados[:limite] if limite is not None else resultados
@@ -0,0 +1,230 @@
+"""
+Planejador das buscas em memória: compila os filtros, poda meses e ordena os predicados
+"""
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seletividade estimada quando não há como medir (fração de registros que passam)
+SELETIVIDADE_TEXTO_SEM_INDICE = 0.3
+
+
+class PlanoBusca:
+    """Busca compilada: origem dos candidatos, meses podados e predicados em ordem"""
+
+    def __init__(self, tipo: str, descricao_filtros: List[str]):
+        self.tipo = tipo
+        self.descricao_filtros = descricao_filtros
+        self.total_meses = 0
+        self.meses: Optional[set] = None  # None = todos os meses
+        self.meses_podados: List[str] = []
+        self.origem = 'varredura'
+        self.estimativa_candidatos = 0
+        self.filtrar_meses = False  # origem por índice: descartar candidatos de meses podados
+        self._candidatos: Callable[[], List[Tuple[object, str]]] = list
+        self.predicados: List[Tuple[str, float, Callable]] = []  # (descrição, seletividade, função)
+
+    def executar(self) -> List[Tuple[object, int, int]]:
+        """Executa o plano e retorna (registro, mes, ano)"""
+        funcoes = [funcao for _, _, funcao in self.predicados]
+        meses = self.meses if self.filtrar_meses else None
+        chaves: Dict[str, Tuple[int, int]] = {}
+        resultados = []
+
+        for registro, mes_ano in self._candidatos():
+            if meses is not None and mes_ano not in meses:
+                continue
+            if not all(funcao(registro) for funcao in funcoes):
+                continue
+            mes_e_ano = chaves.get(mes_ano)
+            if mes_e_ano is None:
+                mes, ano = mes_ano.split('/')
+                mes_e_ano = chaves[mes_ano] = (int(mes), int(ano))
+            resultados.append((registro, mes_e_ano[0], mes_e_ano[1]))
+
+        return resultados
+
+    def explicar(self) -> str:
+        """Descrição legível do plano"""
+        linhas = [f"PLANO DE BUSCA ({self.tipo})"]
+        linhas.append(f"  Filtros: {', '.join(self.descricao_filtros) or 'nenhum'}")
+
+        if self.meses is None:
+            linhas.append(f"  Meses: {self.total_meses} de {self.total_meses} (sem filtro de período)")
+        else:
+            linhas.append(f"  Meses: {len(self.meses)} de {self.total_meses} considerados, "
+                          f"{len(self.meses_podados)} podados")
+            if self.meses_podados:
+                linhas.append(f"    Podados: {', '.join(self.meses_podados)}")
+
+        linhas.append(f"  Origem: {self.origem} (~{self.estimativa_candidatos} candidatos)")
+        if self.predicados:
+            linhas.append("  Predicados (ordem de avaliação):")
+            for posicao, (descricao, seletividade, _) in enumerate(self.predicados, 1):
+                linhas.append(f"    {posicao}. {descricao} (seletividade estimada {seletividade * 100:.0f}%)")
+        else:
+            linhas.append("  Predicados: nenhum (resolvido pela origem)")
+        return '\n'.join(linhas)
+
+
+class PlanejadorBusca:
+    """
+    Compila as buscas sobre despesas e receitas de um controle.
+
+    Os filtros são convertidos uma única vez, os meses cujo intervalo de datas
+    (mínima e máxima do mês, calculadas sob demanda e invalidadas pelas
+    notificações) não cruza o período pedido são podados, a origem dos
+    candidatos é a mais estreita entre a varredura dos meses restantes e os
+    índices (texto, data, valor, bitmaps de categoria/pago), e os predicados
+    restantes são ordenados pela seletividade estimada.
+    """
+
+    def __init__(self, controle):
+        self.controle = controle
+        # tipo -> {mes_ano: (data mínima, data máxima) ou None se o mês não tem datas}
+        self._faixas_mes: Dict[str, Dict[str, Optional[Tuple[date, date]]]] = {'despesa': {}, 'receita': {}}
+
+    def ao_alterar(self, tipo: str, mes: Optional[int], ano: Optional[int], antes=None, depois=None):
+        """Ouvinte de alterações do controle financeiro"""
+        faixas = self._faixas_mes.get(tipo)
+        if faixas is None:
+            return
+        if mes is None or ano is None:
+            faixas.clear()
+        else:
+            faixas.pop(self.controle.obter_mes_ano(mes, ano), None)
+
+    def _estruturas(self, tipo: str):
+        """Registros, campo de data e índices do tipo"""
+        c = self.controle
+        if tipo == 'despesa':
+            return (c.despesas, 'data_vencimento', c.indice_despesas, c.indice_vencimento,
+                    c.indice_valor_despesas, c.bitmap_despesas)
+        return (c.receitas, 'data_recebimento', c.indice_receitas, c.indice_recebimento,
+                c.indice_valor_receitas, c.bitmap_receitas)
+
+    def _faixa_mes(self, tipo: str, mes_ano: str, registros: List, campo_data: str) -> Optional[Tuple[date, date]]:
+        """Data mínima e máxima dos registros de um mês (calculada uma vez)"""
+        faixas = self._faixas_mes[tipo]
+        if mes_ano not in faixas:
+            datas = [getattr(registro, campo_data) for registro in registros
+                     if getattr(registro, campo_data) is not None]
+            faixas[mes_ano] = (min(datas), max(datas)) if datas else None
+        return faixas[mes_ano]
+
+    def compilar(self, tipo: str, termo: str = "", categoria: str = "", valor_min: float = 0,
+                 valor_max: float = float('inf'), apenas_pagas: Optional[bool] = None,
+                 data_inicio: Optional[date] = None, data_fim: Optional[date] = None) -> PlanoBusca:
+        """Compila os filtros em um plano de execução"""
+        registros, campo_data, indice_texto, indice_data, indice_valor, indice_bitmap = self._estruturas(tipo)
+        tem_valor = valor_min > 0 or valor_max != float('inf')
+        tem_data = data_inicio is not None or data_fim is not None
+
+        descricao = []
+        if termo:
+            descricao.append(f"termo '{termo}'")
+        if categoria:
+            descricao.append(f"categoria = '{categoria}'")
+        if apenas_pagas is not None:
+            descricao.append(f"pago = {apenas_pagas}")
+        if tem_valor:
+            descricao.append(f"valor entre {valor_min:.2f} e {valor_max:.2f}")
+        if tem_data:
+            descricao.append(f"{campo_data} entre {data_inicio or '-'} e {data_fim or '-'}")
+
+        plano = PlanoBusca(tipo, descricao)
+        plano.total_meses = len(registros)
+
+        # Poda de meses pelo período
+        total_registros = sum(len(lista) for lista in registros.values())
+        registros_meses = total_registros
+        if tem_data:
+            plano.meses = set()
+            registros_meses = 0
+            for mes_ano, lista in registros.items():
+                faixa = self._faixa_mes(tipo, mes_ano, lista, campo_data)
+                if (faixa is None or (data_inicio is not None and faixa[1] < data_inicio) or
+                        (data_fim is not None and faixa[0] > data_fim)):
+                    plano.meses_podados.append(mes_ano)
+                else:
+                    plano.meses.add(mes_ano)
+                    registros_meses += len(lista)
+
+        # Origens possíveis: (tamanho, nome, produtor dos candidatos, predicado que a origem resolve)
+        meses_varridos = len(plano.meses) if plano.meses is not None else len(registros)
+        origens = [(registros_meses, f"varredura de {meses_varridos} mês(es)",
+                    lambda: ((registro, mes_ano) for mes_ano, lista in registros.items()
+                             if plano.meses is None or mes_ano in plano.meses for registro in lista),
+                    None)]
+        if tem_data:
+            origens.append((indice_data.contar(data_inicio, data_fim), f"índice de {campo_data}",
+                            lambda: indice_data.faixa(data_inicio, data_fim), 'data'))
+        minimo_valor = valor_min if valor_min > 0 else None
+        maximo_valor = valor_max if valor_max != float('inf') else None
+        if tem_valor:
+            origens.append((indice_valor.contar(minimo_valor, maximo_valor), "índice de valor",
+                            lambda: indice_valor.faixa(minimo_valor, maximo_valor), 'valor'))
+
+        # Categoria e pago: AND dos bitmaps (restrito aos meses não podados)
+        categoria_lower = categoria.lower()
+        criterios = {}
+        if categoria:
+            criterios['categoria'] = categoria_lower
+        if apenas_pagas is not None:
+            criterios['pago'] = apenas_pagas
+        if criterios:
+            bitmap_filtro = indice_bitmap.filtrar(**criterios)
+            if plano.meses is not None:
+                bitmap_filtro &= indice_bitmap.bitmap_meses(plano.meses)
+            origens.append((indice_bitmap.contar(bitmap_filtro), f"índice bitmap ({', '.join(criterios)})",
+                            lambda: indice_bitmap.materializar(bitmap_filtro), 'bitmap'))
+
+        encontrados_texto = None
+        if termo:
+            encontrados_texto = indice_texto.buscar(termo)
+            if encontrados_texto is not None:
+                origens.append((len(encontrados_texto), "índice de texto", lambda: encontrados_texto, 'texto'))
+
+        tamanho, plano.origem, plano._candidatos, resolvido = min(origens, key=lambda origem: origem[0])
+        plano.estimativa_candidatos = tamanho
+        plano.filtrar_meses = resolvido is not None and plano.meses is not None
+
+        # Predicados restantes, com seletividade estimada
+        base = max(total_registros, 1)
+        predicados = []
+
+        if categoria and resolvido != 'bitmap':
+            predicados.append((f"categoria = '{categoria}'",
+                               indice_bitmap.contar(indice_bitmap.bitmap('categoria', categoria_lower)) / base,
+                               lambda r: r.categoria.lower() == categoria_lower))
+
+        if apenas_pagas is not None and resolvido != 'bitmap':
+            predicados.append((f"pago = {apenas_pagas}",
+                               indice_bitmap.contar(indice_bitmap.bitmap('pago', apenas_pagas)) / base,
+                               lambda r: r.pago == apenas_pagas))
+
+        if tem_valor and resolvido != 'valor':
+            predicados.append((f"valor entre {valor_min:.2f} e {valor_max:.2f}",
+                               indice_valor.contar(minimo_valor, maximo_valor) / base,
+                               lambda r: valor_min <= r.valor <= valor_max))
+
+        if tem_data and resolvido != 'data':
+            def filtro_data(registro):
+                valor = getattr(registro, campo_data)
+                return (valor is not None and (data_inicio is None or valor >= data_inicio) and
+                        (data_fim is None or valor <= data_fim))
+            predicados.append((f"{campo_data} no período", indice_data.contar(data_inicio, data_fim) / base,
+                               filtro_data))
+
+        if termo and resolvido != 'texto':
+            if encontrados_texto is not None:
+                ids_texto = {id(registro) for registro, _ in encontrados_texto}
+                predicados.append((f"termo '{termo}' (índice de texto)", len(ids_texto) / base,
+                                   lambda r: id(r) in ids_texto))
+            else:
+                termo_lower = termo.lower()
+                predicados.append((f"descrição contém '{termo}'", SELETIVIDADE_TEXTO_SEM_INDICE,
+                                   lambda r: termo_lower in r.descricao.lower()))
+
+        # Ordenação estável: empates mantêm a ordem categoria, pago, valor, data, texto
+        plano.predicados = sorted(predicados, key=lambda predicado: predicado[1])
+        return plano
@@ -1,14 +1,45 @@
 from datetime import datetime, date
+import copy
 import json
 import os
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 from controle_gastos import ControleFinanceiro, Despesa, Receita
+from src.busca.planejador import PlanoBusca
 import matplotlib.pyplot as plt
 import pandas as pd
 from collections import defaultdict
 import warnings
 warnings.filterwarnings('ignore')
 
+# Linhas convertidas em DataFrame de cada vez ao escrever uma aba do Excel
+LINHAS_POR_BLOCO_EXCEL = 1000
+
+
+def escrever_aba_excel(writer, nome_aba: str, linhas: Iterable[Dict],
+                       tamanho_bloco: int = LINHAS_POR_BLOCO_EXCEL) -> int:
+    """
+    Escreve as linhas (dicionários com as mesmas colunas) em uma aba, um bloco
+    por vez, sem montar a tabela inteira em memória. Retorna quantas linhas
+    foram escritas; sem linhas, a aba não é criada.
+    """
+    escritas = 0
+    bloco = []
+    
+    def descarregar():
+        pd.DataFrame(bloco).to_excel(writer, sheet_name=nome_aba, index=False,
+                                     startrow=escritas + 1 if escritas else 0, header=not escritas)
+    
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= tamanho_bloco:
+            descarregar()
+            escritas += len(bloco)
+            bloco = []
+    if bloco:
+        descarregar()
+        escritas += len(bloco)
+    return escritas
+
 class ContaBancaria:
     """Classe para representar uma conta bancária"""
     
@@ -107,6 +138,11 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         self.conta_padrao = "Carteira"  # Carteira como conta padrão
         self.arquivo_dados = "dados_financeiros_avancado.json"
         
+        # Metas indexadas por (mês/ano, categoria) e metas em alerta por mês
+        self._indice_metas: Dict[Tuple[str, str], MetaGasto] = {}
+        self._alertas_metas: Dict[str, Dict[str, MetaGasto]] = {}
+        self.adicionar_ouvinte_alteracao(self._atualizar_metas_incremental)
+        
         # Migrar dados antigos se existirem
         self.migrar_dados_antigos()
         self.carregar_dados()
@@ -148,6 +184,8 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
                 for mes_ano, lista_receitas in dados_antigos.get('receitas', {}).items():
                     self.receitas[mes_ano] = [Receita.from_dict(r) for r in lista_receitas]
                 
+                self.notificar_alteracao('despesa')
+                self.notificar_alteracao('receita')
                 self.salvar_dados()
                 print("✅ Dados migrados com sucesso para o novo formato!")
                 
@@ -256,11 +294,17 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         if not forcar_pagamento and conta.saldo_atual < despesa.valor:
             return False  # Saldo insuficiente
         
+        # Despesa fixa prevista: grava a ocorrência antes de pagar
+        self.materializar_despesa_prevista(despesa)
+        
         novo_saldo = conta.saldo_atual - despesa.valor
         conta.atualizar_saldo(novo_saldo, f"Pagamento: {despesa.descricao}", -despesa.valor)
         
         # Marcar despesa como paga com data/hora
+        antes = copy.copy(despesa)
         despesa.marcar_como_pago(data_pagamento)
+        despesa.conta = nome_conta
+        self._notificar_alteracao_registro('despesa', antes, despesa)
         
         # Atualizar saldo geral do sistema
         self.saldo_atual = sum(c.saldo_atual for c in self.contas_bancarias.values())
@@ -279,6 +323,7 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         conta = self.contas_bancarias[nome_conta]
         novo_saldo = conta.saldo_atual + receita.valor
         conta.atualizar_saldo(novo_saldo, f"Receita: {receita.descricao}", receita.valor)
+        receita.conta = nome_conta
         
         # Atualizar saldo geral do sistema
         self.saldo_atual = sum(c.saldo_atual for c in self.contas_bancarias.values())
@@ -382,50 +427,91 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             self.metas_gastos[mes_ano] = []
         
         # Verificar se já existe meta para esta categoria no mês
-        for meta in self.metas_gastos[mes_ano]:
-            if meta.categoria == categoria:
-                meta.limite_mensal = limite_mensal
-                self.salvar_dados()
-                return
+        meta = self._indice_metas.get((mes_ano, categoria))
+        if meta is not None:
+            meta.limite_mensal = limite_mensal
+            self._verificar_limites_meta(meta)
+            self.salvar_dados()
+            return
         
         # Criar nova meta
         nova_meta = MetaGasto(categoria, limite_mensal, mes, ano)
         self.metas_gastos[mes_ano].append(nova_meta)
+        self._indice_metas[(mes_ano, categoria)] = nova_meta
         self.atualizar_gastos_metas(mes, ano)
         self.salvar_dados()
     
     def atualizar_gastos_metas(self, mes: int, ano: int):
-        """Atualiza os gastos atuais das metas baseado nas despesas"""
+        """Recalcula os gastos atuais das metas do mês a partir das despesas"""
         mes_ano = self.obter_mes_ano(mes, ano)
         if mes_ano not in self.metas_gastos:
             return
         
-        # Resetar gastos atuais
-        for meta in self.metas_gastos[mes_ano]:
-            meta.gasto_atual = 0.0
-        
-        # Calcular gastos por categoria
-        despesas = self.obter_despesas_mes(mes, ano)
-        gastos_categoria = defaultdict(float)
-        
-        for despesa in despesas:
-            if despesa.pago:
-                gastos_categoria[despesa.categoria] += despesa.valor
+        # Gastos pagos por categoria a partir do cubo
+        gastos_categoria = self.cubo_gastos.agrupar('categoria', ano=ano, mes=mes, pago=True)
         
         # Atualizar metas
         for meta in self.metas_gastos[mes_ano]:
             meta.gasto_atual = gastos_categoria.get(meta.categoria, 0.0)
+            self._verificar_limites_meta(meta)
+    
+    def _reindexar_metas(self):
+        """Reconstrói o índice (mês/ano, categoria) -> meta e recalcula todas as metas"""
+        self._indice_metas = {}
+        self._alertas_metas = {}
+        for mes_ano, metas in self.metas_gastos.items():
+            for meta in metas:
+                self._indice_metas[(mes_ano, meta.categoria)] = meta
+            mes, ano = mes_ano.split('/')
+            self.atualizar_gastos_metas(int(mes), int(ano))
+    
+    def _atualizar_metas_incremental(self, tipo: str, mes: Optional[int], ano: Optional[int],
+                                     antes=None, depois=None):
+        """Ouvinte de alterações: ajusta em O(1) a meta da categoria afetada"""
+        if tipo != 'despesa':
+            return
+        
+        if antes is None and depois is None:
+            # Recarga de dados: recalcular o mês (ou tudo)
+            if mes is None or ano is None:
+                self._reindexar_metas()
+            else:
+                self.atualizar_gastos_metas(mes, ano)
+            return
+        
+        mes_ano = self.obter_mes_ano(mes, ano)
+        if antes is not None and antes.pago:
+            self._somar_gasto_meta(mes_ano, antes.categoria, -antes.valor)
+        if depois is not None and depois.pago:
+            self._somar_gasto_meta(mes_ano, depois.categoria, depois.valor)
+    
+    def _somar_gasto_meta(self, mes_ano: str, categoria: str, valor: float):
+        """Soma um valor ao gasto da meta (mês/ano, categoria), se existir"""
+        meta = self._indice_metas.get((mes_ano, categoria))
+        if meta is not None:
+            meta.atualizar_gasto(valor)
+            self._verificar_limites_meta(meta)
+    
+    def _verificar_limites_meta(self, meta: MetaGasto):
+        """Detecta o cruzamento dos limites de 80% e 100% no momento da alteração"""
+        mes_ano = self.obter_mes_ano(meta.mes, meta.ano)
+        alertas_mes = self._alertas_metas.setdefault(mes_ano, {})
+        percentual = meta.percentual_usado()
+        
+        if percentual >= 80:
+            nivel = '100%' if percentual >= 100 else '80%'
+            if nivel not in meta.alertas_enviados:
+                meta.alertas_enviados.append(nivel)
+            alertas_mes[meta.categoria] = meta
+        else:
+            alertas_mes.pop(meta.categoria, None)
     
     def obter_alertas_metas(self, mes: int, ano: int) -> List[str]:
         """Obtém alertas de metas excedidas ou próximas do limite"""
         mes_ano = self.obter_mes_ano(mes, ano)
-        if mes_ano not in self.metas_gastos:
-            return []
         
         alertas = []
-        self.atualizar_gastos_metas(mes, ano)
-        
-        for meta in self.metas_gastos[mes_ano]:
+        for meta in self._alertas_metas.get(mes_ano, {}).values():
             percentual = meta.percentual_usado()
             if percentual >= 100:
                 alertas.append(f"🚨 Meta EXCEDIDA para '{meta.categoria}': R$ {meta.gasto_atual:.2f} / R$ {meta.limite_mensal:.2f} ({percentual:.1f}%)")
@@ -434,126 +520,57 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         
         return alertas
     
+    def planejar_busca_despesas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                                valor_max: float = float('inf'), apenas_pagas: bool = None,
+                                data_inicio: str = "", data_fim: str = "") -> PlanoBusca:
+        """Compila a busca de despesas (use .executar() ou .explicar() no plano)"""
+        return self.planejador_busca.compilar(
+            'despesa', termo, categoria, valor_min, valor_max, apenas_pagas,
+            self._converter_data_filtro(data_inicio), self._converter_data_filtro(data_fim))
+    
+    def planejar_busca_receitas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                                valor_max: float = float('inf'), data_inicio: str = "",
+                                data_fim: str = "") -> PlanoBusca:
+        """Compila a busca de receitas (use .executar() ou .explicar() no plano)"""
+        return self.planejador_busca.compilar(
+            'receita', termo, categoria, valor_min, valor_max, None,
+            self._converter_data_filtro(data_inicio), self._converter_data_filtro(data_fim))
+    
+    def explicar_busca_despesas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                                valor_max: float = float('inf'), apenas_pagas: bool = None,
+                                data_inicio: str = "", data_fim: str = "") -> str:
+        """Plano da busca de despesas em memória, em texto"""
+        return self.planejar_busca_despesas(termo, categoria, valor_min, valor_max, apenas_pagas,
+                                            data_inicio, data_fim).explicar()
+    
+    def explicar_busca_receitas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                                valor_max: float = float('inf'), data_inicio: str = "",
+                                data_fim: str = "") -> str:
+        """Plano da busca de receitas em memória, em texto"""
+        return self.planejar_busca_receitas(termo, categoria, valor_min, valor_max,
+                                            data_inicio, data_fim).explicar()
+    
     def buscar_despesas(self, termo: str = "", categoria: str = "", valor_min: float = 0, 
                        valor_max: float = float('inf'), apenas_pagas: bool = None,
                        data_inicio: str = "", data_fim: str = "") -> List[Tuple[Despesa, int, int]]:
         """Busca despesas com filtros avançados"""
-        resultados = []
-        
-        for mes_ano, despesas in self.despesas.items():
-            mes, ano = mes_ano.split('/')
-            mes, ano = int(mes), int(ano)
-            
-            for despesa in despesas:
-                # Filtro por termo na descrição
-                if termo and termo.lower() not in despesa.descricao.lower():
-                    continue
-                
-                # Filtro por categoria
-                if categoria and categoria.lower() != despesa.categoria.lower():
-                    continue
-                
-                # Filtro por valor
-                if not (valor_min <= despesa.valor <= valor_max):
-                    continue
-                
-                # Filtro por status de pagamento
-                if apenas_pagas is not None and despesa.pago != apenas_pagas:
-                    continue
-                
-                # Filtro por data
-                if data_inicio:
-                    try:
-                        data_inicio_obj = datetime.strptime(data_inicio, "%d/%m/%Y").date()
-                        if despesa.data_vencimento < data_inicio_obj:
-                            continue
-                    except ValueError:
-                        pass
-                
-                if data_fim:
-                    try:
-                        data_fim_obj = datetime.strptime(data_fim, "%d/%m/%Y").date()
-                        if despesa.data_vencimento > data_fim_obj:
-                            continue
-                    except ValueError:
-                        pass
-                
-                resultados.append((despesa, mes, ano))
-        
-        return resultados
+        return self.planejar_busca_despesas(termo, categoria, valor_min, valor_max, apenas_pagas,
+                                            data_inicio, data_fim).executar()
     
     def buscar_receitas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
                        valor_max: float = float('inf'), data_inicio: str = "", 
                        data_fim: str = "") -> List[Tuple[Receita, int, int]]:
         """Busca receitas com filtros avançados"""
-        resultados = []
-        
-        for mes_ano, receitas in self.receitas.items():
-            mes, ano = mes_ano.split('/')
-            mes, ano = int(mes), int(ano)
-            
-            for receita in receitas:
-                # Filtro por termo na descrição
-                if termo and termo.lower() not in receita.descricao.lower():
-                    continue
-                
-                # Filtro por categoria
-                if categoria and categoria.lower() != receita.categoria.lower():
-                    continue
-                
-                # Filtro por valor
-                if not (valor_min <= receita.valor <= valor_max):
-                    continue
-                
-                # Filtro por data
-                if data_inicio:
-                    try:
-                        data_inicio_obj = datetime.strptime(data_inicio, "%d/%m/%Y").date()
-                        if receita.data_recebimento < data_inicio_obj:
-                            continue
-                    except ValueError:
-                        pass
-                
-                if data_fim:
-                    try:
-                        data_fim_obj = datetime.strptime(data_fim, "%d/%m/%Y").date()
-                        if receita.data_recebimento > data_fim_obj:
-                            continue
-                    except ValueError:
-                        pass
-                
-                resultados.append((receita, mes, ano))
-        
-        return resultados
-    
-    def obter_despesas_vencendo(self, dias: int = 7) -> List[Tuple[Despesa, int, int]]:
-        """Obtém despesas que vencem nos próximos X dias"""
-        hoje = date.today()
-        data_limite = date.fromordinal(hoje.toordinal() + dias)
-        
-        despesas_vencendo = []
-        
-        for mes_ano, despesas in self.despesas.items():
-            mes, ano = mes_ano.split('/')
-            mes, ano = int(mes), int(ano)
-            
-            for despesa in despesas:
-                if not despesa.pago and hoje <= despesa.data_vencimento <= data_limite:
-                    despesas_vencendo.append((despesa, mes, ano))
-        
-        return sorted(despesas_vencendo, key=lambda x: x[0].data_vencimento)
+        return self.planejar_busca_receitas(termo, categoria, valor_min, valor_max,
+                                            data_inicio, data_fim).executar()
     
     def gerar_grafico_gastos_categoria(self, mes: int, ano: int, salvar_arquivo: bool = True):
         """Gera gráfico de pizza dos gastos por categoria"""
-        despesas = self.obter_despesas_mes(mes, ano)
-        if not despesas:
+        if not self.cubo_gastos.quantidade(ano=ano, mes=mes):
             print("Nenhuma despesa encontrada para gerar gráfico.")
             return
         
-        gastos_categoria = defaultdict(float)
-        for despesa in despesas:
-            if despesa.pago:
-                gastos_categoria[despesa.categoria] += despesa.valor
+        gastos_categoria = self.cubo_gastos.agrupar('categoria', ano=ano, mes=mes, pago=True)
         
         if not gastos_categoria:
             print("Nenhuma despesa paga encontrada para gerar gráfico.")
@@ -639,7 +656,9 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             'receitas': {},
             'contas_bancarias': {},
             'metas_gastos': {},
-            'conta_padrao': self.conta_padrao
+            'conta_padrao': self.conta_padrao,
+            'regras_recorrencia': [regra.to_dict() for regra in self.regras_recorrencia.values()],
+            'indice_textual': self.exportar_indices_textuais()
         }
         
         # Converter despesas para dicionário
@@ -686,6 +705,9 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             for mes_ano, lista_metas in dados.get('metas_gastos', {}).items():
                 self.metas_gastos[mes_ano] = [MetaGasto.from_dict(m) for m in lista_metas]
             
+            # Carregar regras de despesas fixas
+            self.regras_recorrencia = self.carregar_regras_recorrencia(dados.get('regras_recorrencia', []))
+            
             # Carregar conta padrão (migrar para Carteira se for antigo)
             conta_padrao_salva = dados.get('conta_padrao', 'Carteira')
             if conta_padrao_salva == 'Conta Principal':
@@ -693,10 +715,22 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             else:
                 self.conta_padrao = conta_padrao_salva
             
+            # Dados recarregados: estruturas derivadas precisam ser refeitas
+            self.notificar_alteracao('despesa')
+            self.notificar_alteracao('receita')
+            self.restaurar_indices_textuais(dados.get('indice_textual'))
+            
         except (json.JSONDecodeError, KeyError) as e:
             print(f"Erro ao carregar dados: {e}")
             print("Iniciando com dados vazios.")
 
+    def iterar_movimentacoes(self, conta: Optional[str] = None) -> Iterator[Dict]:
+        """Itera sobre as movimentações de uma conta (da conta padrão se não informada), em ordem cronológica"""
+        nome_conta = conta or self.conta_padrao
+        if nome_conta not in self.contas_bancarias:
+            raise ValueError(f"Conta '{nome_conta}' não encontrada")
+        yield from self.contas_bancarias[nome_conta].historico_saldo
+    
     def exportar_backup_completo(self, nome_arquivo: str = None) -> bool:
         """Exporta backup completo dos dados em Excel"""
         try:
@@ -715,37 +749,27 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
                 nome_arquivo = f"backup_completo_{timestamp}.xlsx"
             
             with pd.ExcelWriter(nome_arquivo, engine='openpyxl') as writer:
-                # Exportar todas as despesas
-                todas_despesas = []
-                for mes_ano, despesas in self.despesas.items():
-                    for despesa in despesas:
-                        todas_despesas.append({
-                            'Mês/Ano': mes_ano,
-                            'Descrição': despesa.descricao,
-                            'Valor': despesa.valor,
-                            'Categoria': despesa.categoria,
-                            'Vencimento': despesa.data_vencimento.strftime('%d/%m/%Y'),
-                            'Pago': 'Sim' if despesa.pago else 'Não',
-                            'Data Pagamento': despesa.data_pagamento.strftime('%d/%m/%Y') if despesa.data_pagamento else ''
-                        })
-                
-                if todas_despesas:
-                    pd.DataFrame(todas_despesas).to_excel(writer, sheet_name='Todas as Despesas', index=False)
+                # Exportar todas as despesas (geradas mês a mês e escritas em blocos)
+                todas_despesas = ({
+                    'Mês/Ano': self.obter_mes_ano(mes, ano),
+                    'Descrição': despesa.descricao,
+                    'Valor': despesa.valor,
+                    'Categoria': despesa.categoria,
+                    'Vencimento': despesa.data_vencimento.strftime('%d/%m/%Y') if despesa.data_vencimento else '',
+                    'Pago': 'Sim' if despesa.pago else 'Não',
+                    'Data Pagamento': despesa.data_pagamento.strftime('%d/%m/%Y') if despesa.data_pagamento else ''
+                } for despesa, mes, ano in self.iterar_despesas())
+                escrever_aba_excel(writer, 'Todas as Despesas', todas_despesas)
                 
                 # Exportar todas as receitas
-                todas_receitas = []
-                for mes_ano, receitas in self.receitas.items():
-                    for receita in receitas:
-                        todas_receitas.append({
-                            'Mês/Ano': mes_ano,
-                            'Descrição': receita.descricao,
-                            'Valor': receita.valor,
-                            'Categoria': receita.categoria,
-                            'Data Recebimento': receita.data_recebimento.strftime('%d/%m/%Y')
-                        })
-                
-                if todas_receitas:
-                    pd.DataFrame(todas_receitas).to_excel(writer, sheet_name='Todas as Receitas', index=False)
+                todas_receitas = ({
+                    'Mês/Ano': self.obter_mes_ano(mes, ano),
+                    'Descrição': receita.descricao,
+                    'Valor': receita.valor,
+                    'Categoria': receita.categoria,
+                    'Data Recebimento': receita.data_recebimento.strftime('%d/%m/%Y')
+                } for receita, mes, ano in self.iterar_receitas())
+                escrever_aba_excel(writer, 'Todas as Receitas', todas_receitas)
                 
                 # Exportar contas
                 dados_contas = []
@@ -761,22 +785,16 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
                     pd.DataFrame(dados_contas).to_excel(writer, sheet_name='Contas Bancárias', index=False)
                 
                 # Exportar histórico completo das contas
-                for nome_conta, conta in self.contas_bancarias.items():
-                    if conta.historico_saldo:
-                        historico_dados = []
-                        for movimento in conta.historico_saldo:
-                            data = datetime.fromisoformat(movimento['data'])
-                            historico_dados.append({
-                                'Data': data.strftime('%d/%m/%Y %H:%M'),
-                                'Operação': movimento['operacao'],
-                                'Saldo Anterior': movimento['saldo_anterior'],
-                                'Saldo Novo': movimento['saldo_novo'],
-                                'Variação': movimento['valor']
-                            })
-                        
-                        if historico_dados:
-                            sheet_name = f"Histórico {nome_conta}"[:31]  # Limite do Excel
-                            pd.DataFrame(historico_dados).to_excel(writer, sheet_name=sheet_name, index=False)
+                for nome_conta in self.contas_bancarias:
+                    historico_dados = ({
+                        'Data': datetime.fromisoformat(movimento['data']).strftime('%d/%m/%Y %H:%M'),
+                        'Operação': movimento['operacao'],
+                        'Saldo Anterior': movimento['saldo_anterior'],
+                        'Saldo Novo': movimento['saldo_novo'],
+                        'Variação': movimento['valor']
+                    } for movimento in self.iterar_movimentacoes(nome_conta))
+                    sheet_name = f"Histórico {nome_conta}"[:31]  # Limite do Excel
+                    escrever_aba_excel(writer, sheet_name, historico_dados)
                 
                 # Exportar metas de gastos
                 todas_metas = []
@@ -815,7 +833,8 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
                 'receitas': {},
                 'contas_bancarias': {},
                 'metas_gastos': {},
-                'conta_padrao': self.conta_padrao
+                'conta_padrao': self.conta_padrao,
+                'regras_recorrencia': [regra.to_dict() for regra in self.regras_recorrencia.values()]
             }
             
             # Converter despesas
@@ -874,8 +893,12 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             self.despesas.clear()
             self.receitas.clear()
             
-            # Limpar metas de gastos
+            # Limpar metas de gastos e regras de despesas fixas
             self.metas_gastos.clear()
+            self.regras_recorrencia.clear()
+            
+            self.notificar_alteracao('despesa')
+            self.notificar_alteracao('receita')
             
             # Resetar contas bancárias (manter apenas a conta principal)
             conta_principal = ContaBancaria("Conta Principal", "Banco Principal", 0.0)
@@ -940,9 +963,15 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             for mes_ano, lista_metas in dados_backup.get('metas_gastos', {}).items():
                 self.metas_gastos[mes_ano] = [MetaGasto.from_dict(m) for m in lista_metas]
             
+            # Restaurar regras de despesas fixas
+            self.regras_recorrencia = self.carregar_regras_recorrencia(dados_backup.get('regras_recorrencia', []))
+            
             # Restaurar conta padrão
             self.conta_padrao = dados_backup.get('conta_padrao', 'Conta Principal')
             
+            self.notificar_alteracao('despesa')
+            self.notificar_alteracao('receita')
+            
             # Salvar dados restaurados
             self.salvar_dados()
             
@@ -1,15 +1,28 @@
 from datetime import datetime, date
-from typing import List, Dict, Optional, Tuple
-from src.controllers.controle_gastos import ControleFinanceiro, Despesa, Receita
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
+from src.controllers.controle_gastos import ControleFinanceiro, Despesa, Receita, RegraRecorrencia
 import matplotlib.pyplot as plt
 import pandas as pd
 from collections import defaultdict
 import warnings
 from src.db.db_connection import DatabaseManager
+from src.busca.indice_trigramas import LIMIAR_SIMILARIDADE, minimo_trigramas_comuns, similaridade
 from decimal import Decimal
 
 warnings.filterwarnings('ignore')
 
+# Candidatos lidos da tabela de trigramas para cada resultado da busca aproximada
+CANDIDATOS_POR_RESULTADO = 10
+
+# Movimentações mais recentes de cada conta carregadas na inicialização
+LIMITE_HISTORICO_CARGA = 100
+
+# Consultas da carga inicial executadas ao mesmo tempo (limitadas ao pool MySQL menos uma conexão)
+THREADS_CARGA = 4
+
 class ContaBancaria:
     """Classe para representar uma conta bancária"""
     
@@ -85,12 +98,16 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         self.receitas = {}
         self.contas_bancarias: Dict[str, ContaBancaria] = {}
         self.metas_gastos: Dict[str, List[MetaGasto]] = {}
+        self.regras_recorrencia: Dict[int, RegraRecorrencia] = {}
         self.conta_padrao = "Carteira"
         self.saldo_atual = 0.0
+        self.estatisticas_carga = {'consultas': 0, 'tempo': 0.0, 'tempo_mes_atual': 0.0, 'concluida': True}
+        self._carga_pendente = None
         
         # Inicializar gerenciador de banco de dados
         try:
             self.db = DatabaseManager()
+            self.inicializar_estruturas_derivadas()
             self.carregar_dados()
         except Exception as e:
             print(f"❌ Erro ao conectar ao banco de dados: {e}")
@@ -100,78 +117,161 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             raise
     
     def carregar_dados(self):
-        """Carrega dados do MySQL"""
+        """
+        Carrega dados do MySQL em consultas por conjunto, executadas em paralelo
+        por um pool de threads (cada uma com sua conexão do pool MySQL).
+
+        Contas, histórico, configuração, regras e o mês atual são esperados e
+        integrados aqui, para o menu aparecer logo; os demais meses dos últimos
+        2 anos continuam em segundo plano e entram em concluir_carga().
+        """
+        self.concluir_carga()
+        inicio = time.perf_counter()
+        consultas_antes = self.db.estatisticas_pool()['consultas']
+        hoje = date.today()
+        mes_atual = (hoje.month, hoje.year)
+        
+        # O pool MySQL fica com ao menos uma conexão livre para a interface
+        tamanho_pool = self.db.estatisticas_pool()['tamanho_pool'] or 1
+        executor = ThreadPoolExecutor(max_workers=max(1, min(THREADS_CARGA, tamanho_pool - 1)),
+                                      thread_name_prefix='carga-inicial')
+        # A fila do executor é FIFO: o que o menu precisa é enviado primeiro
+        prioritarias = {
+            'historicos': executor.submit(self.db.obter_historico_contas, LIMITE_HISTORICO_CARGA),
+            'contas': executor.submit(self.db.listar_contas_bancarias),
+            'conta_padrao': executor.submit(self.db.obter_configuracao, 'conta_padrao'),
+            'regras': executor.submit(self.db.listar_regras_recorrencia),
+            'despesas': executor.submit(self.db.obter_despesas_periodo, mes_atual, mes_atual),
+            'receitas': executor.submit(self.db.obter_receitas_periodo, mes_atual, mes_atual),
+            'metas': executor.submit(self.db.obter_metas_periodo, mes_atual, mes_atual),
+        }
+        restantes = [(tipo, executor.submit(carregar, inicio_faixa, fim_faixa))
+                     for inicio_faixa, fim_faixa in self._faixas_carga_segundo_plano(*mes_atual)
+                     for tipo, carregar in (('despesas', self.db.obter_despesas_periodo),
+                                            ('receitas', self.db.obter_receitas_periodo),
+                                            ('metas', self.db.obter_metas_periodo))]
+        executor.shutdown(wait=False)
+        self._carga_pendente = (restantes, inicio, consultas_antes)
+        
         try:
-            # Carregar contas bancárias
-            contas_db = self.db.listar_contas_bancarias()
-            for conta_data in contas_db:
+            resultados = {nome: futuro.result() for nome, futuro in prioritarias.items()}
+            
+            # Contas bancárias com as últimas movimentações de cada uma
+            for conta_data in resultados['contas']:
                 conta = ContaBancaria.from_db(conta_data)
+                conta.historico_saldo = resultados['historicos'].get(conta.id, [])
                 self.contas_bancarias[conta.nome] = conta
-                
-                # Carregar histórico da conta
-                historico = self.db.obter_historico_conta(conta.id, limite=100)
-                conta.historico_saldo = historico
             
-            # Carregar conta padrão
-            conta_padrao_db = self.db.obter_configuracao('conta_padrao')
-            if conta_padrao_db:
-                self.conta_padrao = conta_padrao_db
+            if resultados['conta_padrao']:
+                self.conta_padrao = resultados['conta_padrao']
             
             # Calcular saldo total
             self.saldo_atual = sum(c.saldo_atual for c in self.contas_bancarias.values())
             
-            # Carregar despesas (estrutura em memória para compatibilidade)
-            # Vamos carregar apenas dados dos últimos 2 anos para não sobrecarregar
-            ano_atual = date.today().year
-            for ano in range(ano_atual - 1, ano_atual + 1):
-                for mes in range(1, 13):
-                    despesas_db = self.db.obter_despesas_mes(mes, ano)
-                    if despesas_db:
-                        mes_ano = f"{mes}/{ano}"
-                        self.despesas[mes_ano] = []
-                        for desp_data in despesas_db:
-                            despesa = Despesa(
-                                descricao=desp_data['descricao'],
-                                valor=float(desp_data['valor']),
-                                data_vencimento=desp_data['data_vencimento'].strftime('%d/%m/%Y'),
-                                categoria=desp_data['categoria']
-                            )
-                            despesa.pago = bool(desp_data['pago'])
-                            if desp_data['data_pagamento']:
-                                despesa.data_pagamento = desp_data['data_pagamento']
-                            despesa.id = desp_data['id']  # Armazenar ID do banco
-                            self.despesas[mes_ano].append(despesa)
-            
-            # Carregar receitas
-            for ano in range(ano_atual - 1, ano_atual + 1):
-                for mes in range(1, 13):
-                    receitas_db = self.db.obter_receitas_mes(mes, ano)
-                    if receitas_db:
-                        mes_ano = f"{mes}/{ano}"
-                        self.receitas[mes_ano] = []
-                        for rec_data in receitas_db:
-                            receita = Receita(
-                                descricao=rec_data['descricao'],
-                                valor=float(rec_data['valor']),
-                                data_recebimento=rec_data['data_recebimento'].strftime('%d/%m/%Y'),
-                                categoria=rec_data['categoria']
-                            )
-                            receita.id = rec_data['id']  # Armazenar ID do banco
-                            self.receitas[mes_ano].append(receita)
-            
-            # Carregar metas
-            for ano in range(ano_atual - 1, ano_atual + 1):
-                for mes in range(1, 13):
-                    metas_db = self.db.obter_metas_mes(mes, ano)
-                    if metas_db:
-                        mes_ano = f"{mes}/{ano}"
-                        self.metas_gastos[mes_ano] = []
-                        for meta_data in metas_db:
-                            meta = MetaGasto.from_db(meta_data)
-                            self.metas_gastos[mes_ano].append(meta)
+            # Regras de despesas fixas
+            for regra_data in resultados['regras']:
+                regra = RegraRecorrencia.from_db(regra_data)
+                self.regras_recorrencia[regra.id] = regra
             
+            self._integrar_lancamentos(resultados['despesas'], resultados['receitas'], resultados['metas'])
         except Exception as e:
             print(f"⚠️  Erro ao carregar dados: {e}")
+        
+        self.estatisticas_carga = {
+            'consultas': self.db.estatisticas_pool()['consultas'] - consultas_antes,
+            'tempo': time.perf_counter() - inicio,
+            'tempo_mes_atual': time.perf_counter() - inicio,
+            'concluida': not restantes
+        }
+        print(f"✅ Mês atual carregado em {self.estatisticas_carga['tempo_mes_atual']:.2f}s "
+              f"(demais meses em segundo plano)")
+    
+    @staticmethod
+    def _faixas_carga_segundo_plano(mes: int, ano: int) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """Faixas ((mes, ano) inicial e final) dos últimos 2 anos fora do mês atual"""
+        anterior = (mes - 1, ano) if mes > 1 else (12, ano - 1)
+        faixas = [((1, ano - 1), anterior)]
+        if mes < 12:
+            faixas.append(((mes + 1, ano), (12, ano)))
+        return faixas
+    
+    def _integrar_lancamentos(self, despesas_db: List[Dict], receitas_db: List[Dict], metas_db: List[Dict]):
+        """Cria despesas, receitas e metas a partir das linhas do banco e avisa as estruturas derivadas"""
+        nomes_contas = self._nomes_contas()
+        
+        for desp_data in despesas_db:
+            despesa = Despesa(
+                descricao=desp_data['descricao'],
+                valor=float(desp_data['valor']),
+                data_vencimento=desp_data['data_vencimento'].strftime('%d/%m/%Y'),
+                categoria=desp_data['categoria']
+            )
+            despesa.pago = bool(desp_data['pago'])
+            if desp_data['data_pagamento']:
+                despesa.data_pagamento = desp_data['data_pagamento']
+            despesa.id = desp_data['id']  # Armazenar ID do banco
+            despesa.conta = nomes_contas.get(desp_data.get('conta_id'))
+            mes_ano = self.obter_mes_ano(desp_data['mes'], desp_data['ano'])
+            self.despesas.setdefault(mes_ano, []).append(despesa)
+        
+        for rec_data in receitas_db:
+            receita = Receita(
+                descricao=rec_data['descricao'],
+                valor=float(rec_data['valor']),
+                data_recebimento=rec_data['data_recebimento'].strftime('%d/%m/%Y'),
+                categoria=rec_data['categoria']
+            )
+            receita.id = rec_data['id']  # Armazenar ID do banco
+            receita.conta = nomes_contas.get(rec_data.get('conta_id'))
+            mes_ano = self.obter_mes_ano(rec_data['mes'], rec_data['ano'])
+            self.receitas.setdefault(mes_ano, []).append(receita)
+        
+        for meta_data in metas_db:
+            mes_ano = self.obter_mes_ano(meta_data['mes'], meta_data['ano'])
+            self.metas_gastos.setdefault(mes_ano, []).append(MetaGasto.from_db(meta_data))
+        
+        # Dados recarregados: estruturas derivadas precisam ser refeitas
+        self.notificar_alteracao('despesa')
+        self.notificar_alteracao('receita')
+    
+    def concluir_carga(self, esperar: bool = True) -> bool:
+        """
+        Integra os meses carregados em segundo plano. As threads só consultam o
+        banco; a integração acontece aqui, na thread que usa o controle, porque
+        índices e ouvintes não são protegidos contra acesso concorrente.
+        Sem esperar, só integra se tudo já chegou. Retorna se a carga terminou.
+        """
+        if self._carga_pendente is None:
+            return True
+        restantes, inicio, consultas_antes = self._carga_pendente
+        if not esperar and not all(futuro.done() for _, futuro in restantes):
+            return False
+        self._carga_pendente = None
+        
+        try:
+            linhas = {'despesas': [], 'receitas': [], 'metas': []}
+            for tipo, futuro in restantes:
+                linhas[tipo].extend(futuro.result())
+            self._integrar_lancamentos(linhas['despesas'], linhas['receitas'], linhas['metas'])
+        except Exception as e:
+            print(f"⚠️  Erro ao carregar os demais meses: {e}")
+        
+        self.estatisticas_carga.update({
+            'consultas': self.db.estatisticas_pool()['consultas'] - consultas_antes,
+            'tempo': time.perf_counter() - inicio,
+            'concluida': True
+        })
+        return True
+    
+    def _agregar_despesas_cubo(self, meses: List[Tuple[int, int]]):
+        """Carregador do cubo de gastos: agregação feita pelo MySQL (GROUP BY)"""
+        for linha in self.db.agregar_despesas(meses):
+            yield (linha['ano'], linha['mes'], linha['categoria'], bool(linha['pago']),
+                   linha['conta'], float(linha['total']), int(linha['quantidade']))
+    
+    def _listar_meses_despesas(self) -> List[Tuple[int, int]]:
+        """Lista os meses (mes, ano) que possuem despesas no banco"""
+        return [(linha['mes'], linha['ano']) for linha in self.db.listar_meses_despesas()]
     
     def salvar_dados(self):
         """Salva dados no MySQL - chamado automaticamente após operações"""
@@ -179,24 +279,25 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         # Este método mantém compatibilidade com a interface antiga
         # Sincronizar quaisquer alterações pendentes
         try:
-            # Atualizar status de despesas que foram marcadas como pagas/não pagas
-            for mes_ano, despesas in self.despesas.items():
-                for despesa in despesas:
-                    if hasattr(despesa, 'id'):
-                        # Verificar se precisa atualizar no banco
-                        despesas_db = self.db.obter_despesas_mes(
-                            int(mes_ano.split('/')[0]),
-                            int(mes_ano.split('/')[1])
-                        )
-                        desp_db = next((d for d in despesas_db if d['id'] == despesa.id), None)
-                        if desp_db:
-                            # Se o status mudou, atualizar no banco
-                            if despesa.pago != desp_db['pago']:
-                                if despesa.pago:
-                                    data_pag = despesa.data_pagamento.strftime('%Y-%m-%d %H:%M:%S') if despesa.data_pagamento else None
-                                    self.db.marcar_despesa_paga(despesa.id, data_pag)
-                                else:
-                                    self.db.marcar_despesa_nao_paga(despesa.id)
+            # Atualizar status de despesas que foram marcadas como pagas/não pagas (numa só transação)
+            with self.db.unidade_de_trabalho():
+                for mes_ano, despesas in self.despesas.items():
+                    for despesa in despesas:
+                        if hasattr(despesa, 'id'):
+                            # Verificar se precisa atualizar no banco
+                            despesas_db = self.db.obter_despesas_mes(
+                                int(mes_ano.split('/')[0]),
+                                int(mes_ano.split('/')[1])
+                            )
+                            desp_db = next((d for d in despesas_db if d['id'] == despesa.id), None)
+                            if desp_db:
+                                # Se o status mudou, atualizar no banco
+                                if despesa.pago != desp_db['pago']:
+                                    if despesa.pago:
+                                        data_pag = despesa.data_pagamento.strftime('%Y-%m-%d %H:%M:%S') if despesa.data_pagamento else None
+                                        self.db.marcar_despesa_paga(despesa.id, data_pag)
+                                    else:
+                                        self.db.marcar_despesa_nao_paga(despesa.id)
         except Exception as e:
             print(f"⚠️  Aviso ao sincronizar dados: {e}")
     
@@ -249,23 +350,28 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             return False
         
         conta = self.contas_bancarias[nome_conta]
+        renomear = bool(novo_nome) and novo_nome != nome_conta
+        if renomear and novo_nome in self.contas_bancarias:
+            return False
         
-        # Atualizar no banco
-        sucesso = self.db.editar_conta_bancaria(conta.id, novo_nome, novo_banco)
+        # Atualizar no banco (conta e, se ela for a padrão, a configuração) numa só transação
+        try:
+            with self.db.unidade_de_trabalho():
+                sucesso = self.db.editar_conta_bancaria(conta.id, novo_nome, novo_banco)
+                if sucesso and renomear and self.conta_padrao == nome_conta:
+                    self.db.salvar_configuracao('conta_padrao', novo_nome)
+        except Exception:
+            return False
         
         if sucesso:
             # Atualizar em memória
-            if novo_nome and novo_nome != nome_conta:
-                if novo_nome in self.contas_bancarias:
-                    return False
-                
+            if renomear:
                 conta.nome = novo_nome
                 self.contas_bancarias[novo_nome] = conta
                 del self.contas_bancarias[nome_conta]
                 
                 if self.conta_padrao == nome_conta:
                     self.conta_padrao = novo_nome
-                    self.db.salvar_configuracao('conta_padrao', novo_nome)
             
             if novo_banco:
                 conta.banco = novo_banco
@@ -283,18 +389,25 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             return False
         
         conta = self.contas_bancarias[nome_conta]
+        nova_padrao = self.conta_padrao
+        if self.conta_padrao == nome_conta:
+            nova_padrao = next(nome for nome in self.contas_bancarias if nome != nome_conta)
         
-        # Remover do banco
-        sucesso = self.db.remover_conta_bancaria(conta.id)
+        # Remover do banco (e trocar a conta padrão, se necessário) numa só transação
+        try:
+            with self.db.unidade_de_trabalho():
+                sucesso = self.db.remover_conta_bancaria(conta.id)
+                if sucesso and nova_padrao != self.conta_padrao:
+                    self.db.salvar_configuracao('conta_padrao', nova_padrao)
+        except Exception:
+            return False
         
         if sucesso:
             # Remover da memória
             del self.contas_bancarias[nome_conta]
             
             # Atualizar conta padrão se necessário
-            if self.conta_padrao == nome_conta:
-                self.conta_padrao = list(self.contas_bancarias.keys())[0]
-                self.db.salvar_configuracao('conta_padrao', self.conta_padrao)
+            self.conta_padrao = nova_padrao
             
             # Atualizar saldo total
             self.saldo_atual = sum(c.saldo_atual for c in self.contas_bancarias.values())
@@ -324,6 +437,8 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             if mes_ano not in self.despesas:
                 self.despesas[mes_ano] = []
             self.despesas[mes_ano].append(despesa)
+            self._mes_registro[id(despesa)] = mes_ano
+            self.notificar_alteracao('despesa', mes, ano, None, despesa)
     
     def adicionar_receita(self, receita: Receita, mes: int, ano: int):
         """Adiciona uma nova receita"""
@@ -346,6 +461,12 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             if mes_ano not in self.receitas:
                 self.receitas[mes_ano] = []
             self.receitas[mes_ano].append(receita)
+            self._mes_registro[id(receita)] = mes_ano
+            self.notificar_alteracao('receita', mes, ano, None, receita)
+    
+    def _nomes_contas(self) -> Dict[int, str]:
+        """Nome de cada conta pelo id do banco (conta_id das despesas e receitas)"""
+        return {conta.id: conta.nome for conta in self.contas_bancarias.values()}
     
     def obter_despesas_mes(self, mes: int, ano: int) -> List[Despesa]:
         """Obtém todas as despesas do mês (sempre recarrega do banco para garantir IDs)"""
@@ -356,6 +477,7 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         # Atualizar cache em memória
         if despesas_db:
             self.despesas[mes_ano] = []
+            nomes_contas = self._nomes_contas()
             for desp_data in despesas_db:
                 despesa = Despesa(
                     descricao=desp_data['descricao'],
@@ -367,7 +489,9 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
                 if desp_data['data_pagamento']:
                     despesa.data_pagamento = desp_data['data_pagamento']
                 despesa.id = desp_data['id']  # Garantir que o ID está presente
+                despesa.conta = nomes_contas.get(desp_data.get('conta_id'))
                 self.despesas[mes_ano].append(despesa)
+            self.notificar_alteracao('despesa', mes, ano)
         
         return self.despesas.get(mes_ano, [])
     
@@ -380,6 +504,7 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         # Atualizar cache em memória
         if receitas_db:
             self.receitas[mes_ano] = []
+            nomes_contas = self._nomes_contas()
             for rec_data in receitas_db:
                 receita = Receita(
                     descricao=rec_data['descricao'],
@@ -388,7 +513,9 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
                     categoria=rec_data['categoria']
                 )
                 receita.id = rec_data['id']  # Garantir que o ID está presente
+                receita.conta = nomes_contas.get(rec_data.get('conta_id'))
                 self.receitas[mes_ano].append(receita)
+            self.notificar_alteracao('receita', mes, ano)
         
         return self.receitas.get(mes_ano, [])
     
@@ -409,12 +536,6 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         if not forcar_pagamento and conta.saldo_atual < despesa.valor:
             return False
         
-        # Atualizar saldo da conta
-        novo_saldo = conta.saldo_atual - despesa.valor
-        self.db.atualizar_saldo_conta(conta.id, novo_saldo, f"Pagamento: {despesa.descricao}", -despesa.valor)
-        conta.saldo_atual = novo_saldo
-        
-        # Marcar despesa como paga no banco
         if data_pagamento is None:
             data_pagamento_db = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             data_pagamento_br = datetime.now().strftime('%d/%m/%Y')
@@ -431,14 +552,79 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
                 data_pagamento_db = data_pagamento
                 data_pagamento_br = dt.strftime('%d/%m/%Y')
         
-        self.db.marcar_despesa_paga(despesa.id, data_pagamento_db)
+        if despesa.prevista:
+            # Despesa fixa prevista: grava a ocorrência (e obtém o id) e paga numa só transação
+            try:
+                with self.db.unidade_de_trabalho():
+                    self.materializar_despesa_prevista(despesa)
+                    novo_saldo = self.db.pagar_despesa(despesa.id, conta.id, data_pagamento_db)
+            except Exception:
+                self._desfazer_materializacao(despesa)
+                raise
+        else:
+            # Débito, histórico e pagamento atômicos numa só chamada (sp_pagar_despesa)
+            novo_saldo = self.db.pagar_despesa(despesa.id, conta.id, data_pagamento_db)
+        conta.saldo_atual = novo_saldo
+        
+        antes = copy.copy(despesa)
         despesa.marcar_como_pago(data_pagamento_br)
+        despesa.conta = nome_conta
+        self._notificar_alteracao_registro('despesa', antes, despesa)
         
         # Atualizar saldo total
         self.saldo_atual = sum(c.saldo_atual for c in self.contas_bancarias.values())
         
         return True
     
+    def alterar_pagamento_despesa(self, despesa: Despesa, pago: bool, data_pagamento: str = None) -> bool:
+        """Marca uma despesa como paga/não paga sem movimentar o saldo"""
+        if despesa.pago == pago:
+            return False
+        
+        data_pagamento_db = None
+        if pago and data_pagamento:
+            data_pagamento_db = datetime.strptime(data_pagamento, '%d/%m/%Y').strftime('%Y-%m-%d %H:%M:%S')
+        
+        # Gravação da ocorrência prevista e mudança do status numa só transação
+        era_prevista = despesa.prevista
+        try:
+            with self.db.unidade_de_trabalho():
+                self.materializar_despesa_prevista(despesa)
+                if not getattr(despesa, 'id', None):
+                    return False
+                if pago:
+                    self.db.marcar_despesa_paga(despesa.id, data_pagamento_db)
+                else:
+                    self.db.marcar_despesa_nao_paga(despesa.id)
+        except Exception:
+            if era_prevista:
+                self._desfazer_materializacao(despesa)
+            return False
+        
+        antes = copy.copy(despesa)
+        if pago:
+            despesa.marcar_como_pago(data_pagamento)
+        else:
+            despesa.marcar_como_nao_pago()
+        
+        self._notificar_alteracao_registro('despesa', antes, despesa)
+        return True
+    
+    def _desfazer_materializacao(self, despesa: Despesa):
+        """Volta para prevista a ocorrência cuja gravação foi desfeita junto com a transação"""
+        localizacao = self.localizar_mes(despesa)
+        if localizacao is not None:
+            mes, ano = localizacao
+            mes_ano = self.obter_mes_ano(mes, ano)
+            self.despesas[mes_ano] = [d for d in self.despesas[mes_ano] if d is not despesa]
+            self._mes_registro.pop(id(despesa), None)
+            self.notificar_alteracao('despesa', mes, ano, despesa, None)
+            regra = self.regras_recorrencia.get(despesa.regra_id)
+            if regra:
+                regra.excecoes.discard(mes_ano)
+        despesa.id = None
+        despesa.prevista = True
+    
     def processar_receita(self, receita: Receita, nome_conta: str = None):
         """Processa uma receita atualizando o saldo automaticamente"""
         if nome_conta is None:
@@ -448,10 +634,15 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             raise ValueError(f"Conta '{nome_conta}' não encontrada")
         
         conta = self.contas_bancarias[nome_conta]
-        novo_saldo = conta.saldo_atual + receita.valor
         
-        self.db.atualizar_saldo_conta(conta.id, novo_saldo, f"Receita: {receita.descricao}", receita.valor)
+        if getattr(receita, 'id', None):
+            # Crédito, histórico e conta da receita atômicos numa só chamada (sp_registrar_receita)
+            novo_saldo = self.db.registrar_receita(receita.id, conta.id)
+        else:
+            novo_saldo = conta.saldo_atual + receita.valor
+            self.db.atualizar_saldo_conta(conta.id, novo_saldo, f"Receita: {receita.descricao}", receita.valor)
         conta.saldo_atual = novo_saldo
+        receita.conta = nome_conta
         
         # Atualizar saldo total
         self.saldo_atual = sum(c.saldo_atual for c in self.contas_bancarias.values())
@@ -491,6 +682,9 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             if despesa in self.despesas[mes_ano]:
                 self.despesas[mes_ano].remove(despesa)
         
+        if sucesso:
+            self.notificar_alteracao('despesa', mes, ano, despesa, None)
+        
         return sucesso
     
     def remover_receita(self, receita: Receita, mes: int, ano: int) -> bool:
@@ -510,6 +704,9 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             if receita in self.receitas[mes_ano]:
                 self.receitas[mes_ano].remove(receita)
         
+        if sucesso:
+            self.notificar_alteracao('receita', mes, ano, receita, None)
+        
         return sucesso
     
     # Métodos de carteira
@@ -560,15 +757,10 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         if conta_origem.saldo_atual < valor:
             return False
         
-        # Remover da conta origem
-        novo_saldo_origem = conta_origem.saldo_atual - valor
-        self.db.atualizar_saldo_conta(conta_origem.id, novo_saldo_origem, "Transferência para carteira", -valor)
-        conta_origem.saldo_atual = novo_saldo_origem
-        
-        # Adicionar à carteira
-        novo_saldo_carteira = carteira.saldo_atual + valor
-        self.db.atualizar_saldo_conta(carteira.id, novo_saldo_carteira, f"Transferência de {nome_conta_origem}", valor)
-        carteira.saldo_atual = novo_saldo_carteira
+        # Débito e crédito (com os históricos) atômicos numa só chamada (sp_transferir)
+        conta_origem.saldo_atual, carteira.saldo_atual = self.db.transferir(
+            conta_origem.id, carteira.id, valor, "Transferência para carteira", f"Transferência de {nome_conta_origem}"
+        )
         
         return True
     
@@ -583,15 +775,10 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         if carteira.saldo_atual < valor:
             return False
         
-        # Remover da carteira
-        novo_saldo_carteira = carteira.saldo_atual - valor
-        self.db.atualizar_saldo_conta(carteira.id, novo_saldo_carteira, f"Transferência para {nome_conta_destino}", -valor)
-        carteira.saldo_atual = novo_saldo_carteira
-        
-        # Adicionar à conta destino
-        novo_saldo_destino = conta_destino.saldo_atual + valor
-        self.db.atualizar_saldo_conta(conta_destino.id, novo_saldo_destino, "Transferência da carteira", valor)
-        conta_destino.saldo_atual = novo_saldo_destino
+        # Débito e crédito (com os históricos) atômicos numa só chamada (sp_transferir)
+        carteira.saldo_atual, conta_destino.saldo_atual = self.db.transferir(
+            carteira.id, conta_destino.id, valor, f"Transferência para {nome_conta_destino}", "Transferência da carteira"
+        )
         
         return True
     
@@ -609,15 +796,11 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         if conta_origem.saldo_atual < valor:
             return False
         
-        # Remover da conta origem
-        novo_saldo_origem = conta_origem.saldo_atual - valor
-        self.db.atualizar_saldo_conta(conta_origem.id, novo_saldo_origem, f"Transferência para {nome_conta_destino}", -valor)
-        conta_origem.saldo_atual = novo_saldo_origem
-        
-        # Adicionar à conta destino
-        novo_saldo_destino = conta_destino.saldo_atual + valor
-        self.db.atualizar_saldo_conta(conta_destino.id, novo_saldo_destino, f"Transferência de {nome_conta_origem}", valor)
-        conta_destino.saldo_atual = novo_saldo_destino
+        # Débito e crédito (com os históricos) atômicos numa só chamada (sp_transferir)
+        conta_origem.saldo_atual, conta_destino.saldo_atual = self.db.transferir(
+            conta_origem.id, conta_destino.id, valor,
+            f"Transferência para {nome_conta_destino}", f"Transferência de {nome_conta_origem}"
+        )
         
         return True
     
@@ -671,12 +854,14 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
         return alertas
     
     # Métodos de busca
-    def buscar_despesas(self, termo: str = "", categoria: str = "", valor_min: float = 0, 
-                       valor_max: float = float('inf'), apenas_pagas: bool = None,
-                       data_inicio: str = "", data_fim: str = "") -> List[Tuple[Despesa, int, int]]:
-        """Busca despesas com filtros avançados"""
-        filtros = {
+    @staticmethod
+    def _filtros_busca(termo: str, categoria: str, valor_min: float, valor_max: float,
+                       data_inicio: str, data_fim: str, modo_busca: str,
+                       apenas_pagas: bool = None) -> Dict:
+        """Filtros no formato esperado pelo DatabaseManager"""
+        return {
             'termo': termo,
+            'modo_busca': modo_busca,
             'categoria': categoria,
             'valor_min': valor_min,
             'valor_max': valor_max,
@@ -684,84 +869,248 @@ class ControleFinanceiroAvancado(ControleFinanceiro):
             'data_inicio': data_inicio,
             'data_fim': data_fim
         }
-        
-        resultados_db = self.db.buscar_despesas(filtros)
-        
-        resultados = []
-        for desp_data in resultados_db:
-            despesa = Despesa(
-                descricao=desp_data['descricao'],
-                valor=float(desp_data['valor']),
-                data_vencimento=desp_data['data_vencimento'].strftime('%d/%m/%Y'),
-                categoria=desp_data['categoria']
-            )
-            despesa.pago = bool(desp_data['pago'])
-            if desp_data['data_pagamento']:
-                despesa.data_pagamento = desp_data['data_pagamento']
-            despesa.id = desp_data['id']
-            
-            resultados.append((despesa, desp_data['mes'], desp_data['ano']))
-        
-        return resultados
+    
+    def _despesa_da_busca(self, desp_data: Dict) -> Tuple[Despesa, int, int]:
+        """Converte uma linha da busca em (Despesa, mes, ano)"""
+        despesa = Despesa(
+            descricao=desp_data['descricao'],
+            valor=float(desp_data['valor']),
+            data_vencimento=desp_data['data_vencimento'].strftime('%d/%m/%Y'),
+            categoria=desp_data['categoria']
+        )
+        despesa.pago = bool(desp_data['pago'])
+        if desp_data['data_pagamento']:
+            despesa.data_pagamento = desp_data['data_pagamento']
+        despesa.id = desp_data['id']
+        despesa.conta = self._nomes_contas().get(desp_data.get('conta_id'))
+        return despesa, desp_data['mes'], desp_data['ano']
+    
+    def _receita_da_busca(self, rec_data: Dict) -> Tuple[Receita, int, int]:
+        """Converte uma linha da busca em (Receita, mes, ano)"""
+        receita = Receita(
+            descricao=rec_data['descricao'],
+            valor=float(rec_data['valor']),
+            data_recebimento=rec_data['data_recebimento'].strftime('%d/%m/%Y'),
+            categoria=rec_data['categoria']
+        )
+        receita.id = rec_data['id']
+        receita.conta = self._nomes_contas().get(rec_data.get('conta_id'))
+        return receita, rec_data['mes'], rec_data['ano']
+    
+    def buscar_despesas(self, termo: str = "", categoria: str = "", valor_min: float = 0, 
+                       valor_max: float = float('inf'), apenas_pagas: bool = None,
+                       data_inicio: str = "", data_fim: str = "",
+                       modo_busca: str = 'booleano') -> List[Tuple[Despesa, int, int]]:
+        """Busca despesas com filtros avançados (modo_busca: 'natural', 'booleano', 'expressao' ou 'like')"""
+        filtros = self._filtros_busca(termo, categoria, valor_min, valor_max,
+                                      data_inicio, data_fim, modo_busca, apenas_pagas)
+        return [self._despesa_da_busca(desp_data) for desp_data in self.db.buscar_despesas(filtros)]
+    
+    def iterar_busca_despesas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                              valor_max: float = float('inf'), apenas_pagas: bool = None,
+                              data_inicio: str = "", data_fim: str = "", modo_busca: str = 'booleano',
+                              tamanho_pagina: int = 50) -> Iterator[Tuple[Despesa, int, int]]:
+        """
+        Percorre a busca de despesas da mais recente para a mais antiga, lendo
+        uma página do banco por vez (memória limitada ao tamanho da página)
+        """
+        filtros = self._filtros_busca(termo, categoria, valor_min, valor_max,
+                                      data_inicio, data_fim, modo_busca, apenas_pagas)
+        for desp_data in self.db.iterar_busca_despesas(filtros, tamanho_pagina):
+            yield self._despesa_da_busca(desp_data)
+    
+    def resumir_busca_despesas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                               valor_max: float = float('inf'), apenas_pagas: bool = None,
+                               data_inicio: str = "", data_fim: str = "",
+                               modo_busca: str = 'booleano') -> Dict:
+        """Quantidade e valor total da busca de despesas, sem carregar os registros"""
+        filtros = self._filtros_busca(termo, categoria, valor_min, valor_max,
+                                      data_inicio, data_fim, modo_busca, apenas_pagas)
+        return self.db.resumir_busca_despesas(filtros)
+    
+    def _explicar_busca(self, tabela: str, filtros: Dict, tamanho_pagina: int) -> str:
+        """SQL gerado para a primeira página da busca e o plano do MySQL para ele"""
+        query, params = self.db.sql_busca_pagina(tabela, filtros, tamanho_pagina)
+        linhas = [f"CONSULTA SQL ({tabela}, primeira página)", f"  {query}", f"  Parâmetros: {params}"]
+        try:
+            plano = self.db.explicar_sql(query, params)
+        except Exception as e:
+            linhas.append(f"  ⚠️ EXPLAIN indisponível: {e}")
+            return '\n'.join(linhas)
+        
+        linhas.append("  Plano do MySQL:")
+        for etapa in plano:
+            linhas.append(f"    {etapa.get('table')}: acesso={etapa.get('type')}, "
+                          f"índice={etapa.get('key') or 'nenhum'}, linhas≈{etapa.get('rows')}"
+                          + (f", {etapa['Extra']}" if etapa.get('Extra') else ""))
+        return '\n'.join(linhas)
+    
+    def explicar_busca_despesas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                                valor_max: float = float('inf'), apenas_pagas: bool = None,
+                                data_inicio: str = "", data_fim: str = "", modo_busca: str = 'booleano',
+                                tamanho_pagina: int = 50) -> str:
+        """Mostra o SQL que a busca paginada de despesas executa e como o MySQL vai resolvê-lo"""
+        filtros = self._filtros_busca(termo, categoria, valor_min, valor_max,
+                                      data_inicio, data_fim, modo_busca, apenas_pagas)
+        return self._explicar_busca('despesas', filtros, tamanho_pagina)
     
     def buscar_receitas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
                        valor_max: float = float('inf'), data_inicio: str = "", 
-                       data_fim: str = "") -> List[Tuple[Receita, int, int]]:
-        """Busca receitas com filtros avançados"""
-        filtros = {
-            'termo': termo,
-            'categoria': categoria,
-            'valor_min': valor_min,
-            'valor_max': valor_max,
-            'data_inicio': data_inicio,
-            'data_fim': data_fim
-        }
-        
-        resultados_db = self.db.buscar_receitas(filtros)
+                       data_fim: str = "", modo_busca: str = 'booleano') -> List[Tuple[Receita, int, int]]:
+        """Busca receitas com filtros avançados (modo_busca: 'natural', 'booleano', 'expressao' ou 'like')"""
+        filtros = self._filtros_busca(termo, categoria, valor_min, valor_max,
+                                      data_inicio, data_fim, modo_busca)
+        return [self._receita_da_busca(rec_data) for rec_data in self.db.buscar_receitas(filtros)]
+    
+    def iterar_busca_receitas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                              valor_max: float = float('inf'), data_inicio: str = "",
+                              data_fim: str = "", modo_busca: str = 'booleano',
+                              tamanho_pagina: int = 50) -> Iterator[Tuple[Receita, int, int]]:
+        """Percorre a busca de receitas da mais recente para a mais antiga, uma página por vez"""
+        filtros = self._filtros_busca(termo, categoria, valor_min, valor_max,
+                                      data_inicio, data_fim, modo_busca)
+        for rec_data in self.db.iterar_busca_receitas(filtros, tamanho_pagina):
+            yield self._receita_da_busca(rec_data)
+    
+    def resumir_busca_receitas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                               valor_max: float = float('inf'), data_inicio: str = "",
+                               data_fim: str = "", modo_busca: str = 'booleano') -> Dict:
+        """Quantidade e valor total da busca de receitas, sem carregar os registros"""
+        filtros = self._filtros_busca(termo, categoria, valor_min, valor_max,
+                                      data_inicio, data_fim, modo_busca)
+        return self.db.resumir_busca_receitas(filtros)
+    
+    def explicar_busca_receitas(self, termo: str = "", categoria: str = "", valor_min: float = 0,
+                                valor_max: float = float('inf'), data_inicio: str = "",
+                                data_fim: str = "", modo_busca: str = 'booleano',
+                                tamanho_pagina: int = 50) -> str:
+        """Mostra o SQL que a busca paginada de receitas executa e como o MySQL vai resolvê-lo"""
+        filtros = self._filtros_busca(termo, categoria, valor_min, valor_max,
+                                      data_inicio, data_fim, modo_busca)
+        return self._explicar_busca('receitas', filtros, tamanho_pagina)
+    
+    def _buscar_aproximado(self, tabela: str, converter, termo: str, limiar: float,
+                           limite: Optional[int]) -> List[tuple]:
+        """Candidatos pela tabela de trigramas, ordenados pela similaridade calculada aqui"""
+        # Os candidatos chegam ordenados por trigramas em comum; uma folga de
+        # CANDIDATOS_POR_RESULTADO por resultado pedido cobre as diferenças de ordem
+        limite_candidatos = None if limite is None else limite * CANDIDATOS_POR_RESULTADO
+        candidatos = self.db.candidatos_trigramas(tabela, termo, minimo_trigramas_comuns(termo, limiar),
+                                                  limite_candidatos)
         
         resultados = []
-        for rec_data in resultados_db:
-            receita = Receita(
-                descricao=rec_data['descricao'],
-                valor=float(rec_data['valor']),
-                data_recebimento=rec_data['data_recebimento'].strftime('%d/%m/%Y'),
-                categoria=rec_data['categoria']
-            )
-            receita.id = rec_data['id']
-            
-            resultados.append((receita, rec_data['mes'], rec_data['ano']))
+        for linha in candidatos:
+            valor = similaridade(termo, linha['descricao'])
+            if valor >= limiar:
+                resultados.append(converter(linha) + (valor,))
         
-        return resultados
+        resultados.sort(key=lambda item: (-item[3], item[0].descricao.lower()))
+        return resultados[:limite] if limite is not None else resultados
+    
+    def buscar_despesas_aproximado(self, termo: str, limiar: float = LIMIAR_SIMILARIDADE,
+                                   limite: Optional[int] = 20) -> List[tuple]:
+        """Busca tolerante a erros de digitação e acentos (tabela de trigramas no banco)"""
+        return self._buscar_aproximado('despesas', self._despesa_da_busca, termo, limiar, limite)
+    
+    def buscar_receitas_aproximado(self, termo: str, limiar: float = LIMIAR_SIMILARIDADE,
+                                   limite: Optional[int] = 20) -> List[tuple]:
+        """Busca de receitas tolerante a erros de digitação e acentos (tabela de trigramas no banco)"""
+        return self._buscar_aproximado('receitas', self._receita_da_busca, termo, limiar, limite)
+    
+    def _filtros_iteracao(self, tipo: str, filtros: Optional[Dict]) -> Dict:
+        """Filtros de iterar_despesas/iterar_receitas no formato do DatabaseManager"""
+        filtros = self._normalizar_filtros_iteracao(tipo, filtros)
+        filtros_db = self._filtros_busca(filtros['termo'], filtros['categoria'], filtros['valor_min'],
+                                         filtros['valor_max'], filtros['data_inicio'], filtros['data_fim'],
+                                         'booleano', filtros['apenas_pagas'])
+        filtros_db['mes'], filtros_db['ano'] = filtros['mes'], filtros['ano']
+        return filtros_db
+    
+    def iterar_despesas(self, filtros: Optional[Dict] = None,
+                        tamanho_pagina: int = 100) -> Iterator[Tuple[Despesa, int, int]]:
+        """
+        Itera sobre todas as despesas do banco (não só as carregadas em memória)
+        em ordem de vencimento, lendo uma página por vez. Filtros como no controle base.
+        """
+        filtros_db = self._filtros_iteracao('despesa', filtros)
+        for desp_data in self.db.iterar_busca_despesas(filtros_db, tamanho_pagina, crescente=True):
+            yield self._despesa_da_busca(desp_data)
+    
+    def iterar_receitas(self, filtros: Optional[Dict] = None,
+                        tamanho_pagina: int = 100) -> Iterator[Tuple[Receita, int, int]]:
+        """Itera sobre todas as receitas do banco em ordem de recebimento, uma página por vez"""
+        filtros_db = self._filtros_iteracao('receita', filtros)
+        for rec_data in self.db.iterar_busca_receitas(filtros_db, tamanho_pagina, crescente=True):
+            yield self._receita_da_busca(rec_data)
+    
+    def iterar_movimentacoes(self, conta: Optional[str] = None, tamanho_pagina: int = 100) -> Iterator[Dict]:
+        """
+        Itera sobre o histórico completo de uma conta (da conta padrão se não
+        informada), do mais antigo para o mais recente, no formato do controle JSON
+        """
+        nome_conta = conta or self.conta_padrao
+        if nome_conta not in self.contas_bancarias:
+            raise ValueError(f"Conta '{nome_conta}' não encontrada")
+        for movimento in self.db.iterar_historico_conta(self.contas_bancarias[nome_conta].id, tamanho_pagina):
+            yield {
+                'data': movimento['data_movimentacao'].isoformat(),
+                'saldo_anterior': float(movimento['saldo_anterior']),
+                'saldo_novo': float(movimento['saldo_novo']),
+                'operacao': movimento['operacao'],
+                'valor': float(movimento['valor_movimentacao'])
+            }
     
     def obter_despesas_vencendo(self, dias: int = 7) -> List[Tuple[Despesa, int, int]]:
-        """Obtém despesas que vencem nos próximos X dias"""
+        """Obtém despesas que vencem nos próximos X dias (v_despesas_vencendo, todo o histórico do banco)"""
         hoje = date.today()
-        data_limite = date.fromordinal(hoje.toordinal() + dias)
-        
-        despesas_vencendo = []
-        
-        for mes_ano, despesas in self.despesas.items():
-            mes, ano = mes_ano.split('/')
-            mes, ano = int(mes), int(ano)
-            
-            for despesa in despesas:
-                if not despesa.pago and hoje <= despesa.data_vencimento <= data_limite:
-                    despesas_vencendo.append((despesa, mes, ano))
-        
-        return sorted(despesas_vencendo, key=lambda x: x[0].data_vencimento)
+        resultados = [self._despesa_da_busca(desp_data) for desp_data in self.db.obter_despesas_vencendo(dias)]
+        return self._incluir_previstas(resultados, hoje, date.fromordinal(hoje.toordinal() + dias))
+    
+    def obter_despesas_vencidas(self) -> List[Tuple[Despesa, int, int]]:
+        """Obtém despesas não pagas com vencimento anterior a hoje (v_despesas_vencendo)"""
+        resultados = [self._despesa_da_busca(desp_data) for desp_data in self.db.obter_despesas_vencidas()]
+        return self._incluir_previstas(resultados, None, date.fromordinal(date.today().toordinal() - 1))
+    
+    def adicionar_regra_recorrencia(self, regra: RegraRecorrencia) -> RegraRecorrencia:
+        """Cadastra uma regra de despesa fixa no banco"""
+        regra_id = self.db.adicionar_regra_recorrencia(
+            descricao=regra.descricao,
+            valor=regra.valor,
+            categoria=regra.categoria,
+            dia=regra.dia,
+            intervalo_meses=regra.intervalo_meses,
+            mes_inicio=regra.mes_inicio,
+            ano_inicio=regra.ano_inicio,
+            data_fim=regra.data_fim.strftime('%Y-%m-%d') if regra.data_fim else None
+        )
+        if not regra_id:
+            raise ValueError(f"Não foi possível cadastrar a regra '{regra.descricao}'")
+        regra.id = regra_id
+        self.regras_recorrencia[regra.id] = regra
+        return regra
+    
+    def _salvar_regra_recorrencia(self, regra: RegraRecorrencia):
+        """Grava a data final e as exceções da regra"""
+        self.db.atualizar_regra_recorrencia(
+            regra.id, regra.data_fim.strftime('%Y-%m-%d') if regra.data_fim else None, list(regra.excecoes)
+        )
+    
+    def _excluir_regra_recorrencia(self, regra: RegraRecorrencia):
+        """Remove a regra do banco"""
+        self.db.remover_regra_recorrencia(regra.id)
+    
+    def _salvar_excecao_regra(self, regra: RegraRecorrencia):
+        """A despesa materializada já está no banco; falta a exceção na regra"""
+        self._salvar_regra_recorrencia(regra)
     
     # Métodos de gráficos (mantidos do original)
     def gerar_grafico_gastos_categoria(self, mes: int, ano: int, salvar_arquivo: bool = True):
         """Gera gráfico de pizza dos gastos por categoria"""
-        despesas = self.obter_despesas_mes(mes, ano)
-        if not despesas:
+        if not self.cubo_gastos.quantidade(ano=ano, mes=mes):
             print("Nenhuma despesa encontrada para gerar gráfico.")
             return
         
-        gastos_categoria = defaultdict(float)
-        for despesa in despesas:
-            if despesa.pago:
-                gastos_categoria[despesa.categoria] += despesa.valor
+        gastos_categoria = self.cubo_gastos.agrupar('categoria', ano=ano, mes=mes, pago=True)
         
         if not gastos_categoria:
             print("Nenhuma despesa paga encontrada para gerar gráfico.")
@@ -1,7 +1,23 @@
 from datetime import datetime, date
+import copy
+import heapq
 import json
 import os
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+from src.analise.cubo import CuboGastos
+from src.analise.estatisticas import EstatisticasGastos
+from src.analise.janelas import JanelasMoveis
+from src.analise.recorrencia import RegraRecorrencia
+from src.busca.indice_textual import IndiceInvertido
+from src.busca.indice_ordenado import IndiceOrdenado
+from src.busca.indice_trigramas import IndiceTrigramas, LIMIAR_SIMILARIDADE
+from src.busca.indice_bitmap import IndiceBitmap, ATRIBUTOS_DESPESA, ATRIBUTOS_RECEITA
+from src.busca.planejador import PlanejadorBusca
+from src.busca.autocompletar import SugestoesLancamentos
+
+# Filtros aceitos por iterar_despesas/iterar_receitas ('pago' é sinônimo de 'apenas_pagas')
+FILTROS_ITERACAO = frozenset({'termo', 'categoria', 'valor_min', 'valor_max', 'apenas_pagas', 'pago',
+                              'data_inicio', 'data_fim', 'mes', 'ano'})
 
 class Despesa:
     """Classe para representar uma despesa"""
@@ -26,6 +42,9 @@ class Despesa:
         self.despesa_fixa = despesa_fixa  # True para gastos fixos (luz, água, aluguel)
         self.tipo = tipo  # "normal", "fixa", "instantanea"
         self.pago_imediatamente = pago_imediatamente  # True para despesas pagas na hora
+        self.conta = None  # Conta bancária usada no pagamento
+        self.regra_id = None  # Regra de recorrência que gerou a despesa
+        self.prevista = False  # Ocorrência virtual de uma regra, ainda não gravada
     
     def marcar_como_pago(self, data_pagamento: str = None):
         """Marca a despesa como paga"""
@@ -74,7 +93,9 @@ class Despesa:
             'data_pagamento': self.data_pagamento.strftime("%d/%m/%Y") if self.data_pagamento else None,
             'despesa_fixa': self.despesa_fixa,
             'tipo': self.tipo,
-            'pago_imediatamente': self.pago_imediatamente
+            'pago_imediatamente': self.pago_imediatamente,
+            'conta': self.conta,
+            'regra_id': self.regra_id
         }
     
     @classmethod
@@ -98,6 +119,8 @@ class Despesa:
         
         if data.get('data_pagamento'):
             despesa.data_pagamento = datetime.strptime(data['data_pagamento'], "%d/%m/%Y").date()
+        despesa.conta = data.get('conta')
+        despesa.regra_id = data.get('regra_id')
         
         return despesa
 
@@ -109,6 +132,7 @@ class Receita:
         self.valor = valor
         self.data_recebimento = datetime.strptime(data_recebimento, "%d/%m/%Y").date()
         self.categoria = categoria
+        self.conta = None  # Conta em que a receita já foi creditada (None = ainda não processada)
     
     def to_dict(self) -> Dict:
         """Converte a receita para dicionário"""
@@ -116,18 +140,21 @@ class Receita:
             'descricao': self.descricao,
             'valor': self.valor,
             'data_recebimento': self.data_recebimento.strftime("%d/%m/%Y"),
-            'categoria': self.categoria
+            'categoria': self.categoria,
+            'conta': self.conta
         }
     
     @classmethod
     def from_dict(cls, data: Dict):
         """Cria uma receita a partir de um dicionário"""
-        return cls(
+        receita = cls(
             data['descricao'],
             data['valor'],
             data['data_recebimento'],
             data['categoria']
         )
+        receita.conta = data.get('conta')
+        return receita
 
 class ControleFinanceiro:
     """Classe principal para controle financeiro"""
@@ -138,9 +165,118 @@ class ControleFinanceiro:
         self.saldo_banco: Dict[str, float] = {}
         self.saldo_atual: float = 0.0  # Saldo automático atual
         self.historico_saldo: List[Dict] = []  # Histórico de movimentações
+        self.regras_recorrencia: Dict[int, RegraRecorrencia] = {}
         self.arquivo_dados = "dados_financeiros.json"
+        self.inicializar_estruturas_derivadas()
         self.carregar_dados()
     
+    def inicializar_estruturas_derivadas(self):
+        """Cria as estruturas mantidas a partir das despesas/receitas (cubo, índices)"""
+        self._ouvintes_alteracao: List[Callable] = []
+        self._mes_registro: Dict[int, str] = {}
+        self.cubo_gastos = CuboGastos(self._agregar_despesas_cubo, self._listar_meses_despesas)
+        self.adicionar_ouvinte_alteracao(self.cubo_gastos.ao_alterar)
+        self.estatisticas_gastos = EstatisticasGastos(lambda: self.despesas)
+        self.adicionar_ouvinte_alteracao(self.estatisticas_gastos.ao_alterar)
+        self.janelas_moveis = JanelasMoveis(self._totais_mes_janelas, self._listar_meses_lancamentos)
+        self.adicionar_ouvinte_alteracao(self.janelas_moveis.ao_alterar)
+        self.indice_despesas = IndiceInvertido('despesa', lambda: self.despesas, self.obter_mes_ano)
+        self.indice_receitas = IndiceInvertido('receita', lambda: self.receitas, self.obter_mes_ano)
+        self.indice_vencimento = IndiceOrdenado('despesa', 'data_vencimento', lambda: self.despesas, self.obter_mes_ano)
+        self.indice_vencimento_pendentes = IndiceOrdenado('despesa', 'data_vencimento', lambda: self.despesas,
+                                                          self.obter_mes_ano, condicao=lambda despesa: not despesa.pago)
+        self.indice_valor_despesas = IndiceOrdenado('despesa', 'valor', lambda: self.despesas, self.obter_mes_ano)
+        self.indice_recebimento = IndiceOrdenado('receita', 'data_recebimento', lambda: self.receitas, self.obter_mes_ano)
+        self.indice_valor_receitas = IndiceOrdenado('receita', 'valor', lambda: self.receitas, self.obter_mes_ano)
+        self.trigramas_despesas = IndiceTrigramas('despesa', lambda: self.despesas, self.obter_mes_ano)
+        self.trigramas_receitas = IndiceTrigramas('receita', lambda: self.receitas, self.obter_mes_ano)
+        self.bitmap_despesas = IndiceBitmap('despesa', lambda: self.despesas, self.obter_mes_ano, ATRIBUTOS_DESPESA)
+        self.bitmap_receitas = IndiceBitmap('receita', lambda: self.receitas, self.obter_mes_ano, ATRIBUTOS_RECEITA)
+        for indice in (self.indice_despesas, self.indice_receitas, self.indice_vencimento,
+                       self.indice_vencimento_pendentes, self.indice_valor_despesas,
+                       self.indice_recebimento, self.indice_valor_receitas,
+                       self.trigramas_despesas, self.trigramas_receitas,
+                       self.bitmap_despesas, self.bitmap_receitas):
+            self.adicionar_ouvinte_alteracao(indice.ao_alterar)
+        self.planejador_busca = PlanejadorBusca(self)
+        self.adicionar_ouvinte_alteracao(self.planejador_busca.ao_alterar)
+        self.sugestoes = SugestoesLancamentos(self)
+        self.adicionar_ouvinte_alteracao(self.sugestoes.ao_alterar)
+    
+    def adicionar_ouvinte_alteracao(self, ouvinte: Callable):
+        """Registra uma função chamada a cada alteração de despesa ou receita"""
+        self._ouvintes_alteracao.append(ouvinte)
+    
+    def notificar_alteracao(self, tipo: str, mes: Optional[int] = None, ano: Optional[int] = None,
+                            antes=None, depois=None):
+        """
+        Avisa as estruturas derivadas que um registro mudou.
+        
+        tipo: 'despesa' ou 'receita'
+        antes: cópia do registro antes da alteração (None em inclusões)
+        depois: o registro após a alteração (None em remoções)
+        Se antes e depois forem None, o mês inteiro foi recarregado
+        (ou todos os dados, quando mes/ano também forem None).
+        """
+        if antes is None and depois is None:
+            self._mapear_meses_registros(tipo, mes, ano)
+        
+        for ouvinte in self._ouvintes_alteracao:
+            ouvinte(tipo, mes, ano, antes, depois)
+    
+    def _mapear_meses_registros(self, tipo: str, mes: Optional[int] = None, ano: Optional[int] = None):
+        """Refaz o mapa registro -> mês após uma recarga"""
+        colecao = self.receitas if tipo == 'receita' else self.despesas
+        for mes_ano, registros in colecao.items():
+            if mes is not None and ano is not None:
+                mes_chave, ano_chave = mes_ano.split('/')
+                if (int(mes_chave), int(ano_chave)) != (mes, ano):
+                    continue
+            for registro in registros:
+                self._mes_registro[id(registro)] = mes_ano
+    
+    def localizar_mes(self, registro) -> Optional[Tuple[int, int]]:
+        """Retorna (mes, ano) da lista onde a despesa ou receita está armazenada"""
+        colecao = self.receitas if hasattr(registro, 'data_recebimento') else self.despesas
+        
+        mes_ano = self._mes_registro.get(id(registro))
+        if mes_ano is None or not any(r is registro for r in colecao.get(mes_ano, [])):
+            mes_ano = next((chave for chave, registros in colecao.items()
+                            if any(r is registro for r in registros)), None)
+            if mes_ano is None:
+                return None
+            self._mes_registro[id(registro)] = mes_ano
+        
+        mes, ano = mes_ano.split('/')
+        return int(mes), int(ano)
+    
+    def _agregar_despesas_cubo(self, meses: List[Tuple[int, int]]):
+        """Carregador do cubo de gastos: agrega as despesas em memória"""
+        for mes, ano in meses:
+            for despesa in self.despesas.get(self.obter_mes_ano(mes, ano), []):
+                yield (ano, mes, despesa.categoria, despesa.pago,
+                       getattr(despesa, 'conta', None), despesa.valor, 1)
+    
+    def _listar_meses_despesas(self) -> List[Tuple[int, int]]:
+        """Lista os meses (mes, ano) que possuem despesas"""
+        meses = []
+        for mes_ano in self.despesas:
+            mes, ano = mes_ano.split('/')
+            meses.append((int(mes), int(ano)))
+        return meses
+    
+    def _listar_meses_lancamentos(self) -> List[Tuple[int, int]]:
+        """Lista os meses (mes, ano) que possuem despesas ou receitas"""
+        meses = set(self._listar_meses_despesas())
+        for mes_ano in self.receitas:
+            mes, ano = mes_ano.split('/')
+            meses.add((int(mes), int(ano)))
+        return list(meses)
+    
+    def _totais_mes_janelas(self, mes: int, ano: int) -> Tuple[Dict[str, float], float]:
+        """Gastos por categoria e total de receitas de um mês, para as janelas móveis"""
+        return self.cubo_gastos.agrupar('categoria', ano=ano, mes=mes), self.calcular_total_receitas(mes, ano)
+    
     def obter_mes_ano(self, mes: int, ano: int) -> str:
         """Retorna string no formato MM/YYYY"""
         return f"{mes:02d}/{ano}"
@@ -151,6 +287,8 @@ class ControleFinanceiro:
         if mes_ano not in self.despesas:
             self.despesas[mes_ano] = []
         self.despesas[mes_ano].append(despesa)
+        self._mes_registro[id(despesa)] = mes_ano
+        self.notificar_alteracao('despesa', mes, ano, None, despesa)
         self.salvar_dados()
     
     def adicionar_receita(self, receita: Receita, mes: int, ano: int):
@@ -159,6 +297,8 @@ class ControleFinanceiro:
         if mes_ano not in self.receitas:
             self.receitas[mes_ano] = []
         self.receitas[mes_ano].append(receita)
+        self._mes_registro[id(receita)] = mes_ano
+        self.notificar_alteracao('receita', mes, ano, None, receita)
         self.salvar_dados()
     
     def definir_saldo_banco(self, saldo: float, mes: int, ano: int):
@@ -199,7 +339,31 @@ class ControleFinanceiro:
         total_receitas = self.calcular_total_receitas(mes, ano)
         total_despesas = self.calcular_total_despesas(mes, ano)
         return saldo_inicial + total_receitas - total_despesas
-    
+
+    def prever_fluxo_caixa(self, meses: int = 3) -> Dict:
+        """Projeta o saldo diário para os próximos meses (ver PrevisaoFluxoCaixa)"""
+        from src.analise.previsao import PrevisaoFluxoCaixa
+        return PrevisaoFluxoCaixa(self, meses).calcular()
+
+    def simular_orcamento(self, caminhos: int = 10000, meses: int = 12) -> Dict:
+        """Simulação de Monte Carlo do saldo e das metas (ver SimulacaoOrcamento)"""
+        from src.analise.simulacao import SimulacaoOrcamento
+        return SimulacaoOrcamento(self, caminhos, meses).simular()
+
+    def obter_estatisticas_categorias(self) -> List[Dict]:
+        """Média, desvio, mediana e p90 dos gastos pagos de cada categoria"""
+        resumos = [self.estatisticas_gastos.resumo_categoria(categoria)
+                   for categoria in self.estatisticas_gastos.categorias()]
+        return sorted(resumos, key=lambda resumo: -resumo['media_mensal'] * resumo['meses'])
+
+    def obter_janelas_moveis(self, janelas: Tuple[int, ...] = (3, 6, 12)) -> Dict:
+        """Somas e médias móveis de gastos e taxa de poupança (ver JanelasMoveis)"""
+        return self.janelas_moveis.calcular(janelas)
+
+    def obter_categorias_atipicas(self, mes: int, ano: int, limite_z: float = 2.0) -> List[Dict]:
+        """Categorias com gasto no mês fora do padrão histórico"""
+        return self.estatisticas_gastos.meses_atipicos(mes, ano, limite_z)
+
     def processar_pagamento_despesa(self, despesa: Despesa, data_pagamento: str = None) -> bool:
         """Processa o pagamento de uma despesa e atualiza o saldo automaticamente"""
         if despesa.pago:
@@ -210,7 +374,10 @@ class ControleFinanceiro:
             return False  # Saldo insuficiente
         
         # Marcar despesa como paga
+        self.materializar_despesa_prevista(despesa)
+        antes = copy.copy(despesa)
         despesa.marcar_como_pago(data_pagamento)
+        self._notificar_alteracao_registro('despesa', antes, despesa)
         
         # Atualizar saldo
         saldo_anterior = self.saldo_atual
@@ -234,6 +401,7 @@ class ControleFinanceiro:
         # Atualizar saldo
         saldo_anterior = self.saldo_atual
         self.saldo_atual += receita.valor
+        receita.conta = 'saldo'  # Sem contas bancárias: creditada no saldo geral
         
         # Registrar no histórico
         self.registrar_movimentacao(
@@ -248,6 +416,31 @@ class ControleFinanceiro:
         self.salvar_dados()
         return True
     
+    def alterar_pagamento_despesa(self, despesa: Despesa, pago: bool, data_pagamento: str = None) -> bool:
+        """Marca uma despesa como paga/não paga sem movimentar o saldo"""
+        if despesa.pago == pago:
+            return False
+        
+        self.materializar_despesa_prevista(despesa)
+        antes = copy.copy(despesa)
+        if pago:
+            despesa.marcar_como_pago(data_pagamento)
+        else:
+            despesa.marcar_como_nao_pago()
+        
+        if despesa.pago == antes.pago:
+            return False  # Despesas instantâneas não podem ser desmarcadas
+        
+        self._notificar_alteracao_registro('despesa', antes, despesa)
+        self.salvar_dados()
+        return True
+    
+    def _notificar_alteracao_registro(self, tipo: str, antes, depois):
+        """Notifica a alteração de um registro cujo mês não foi informado"""
+        local = self.localizar_mes(depois)
+        if local:
+            self.notificar_alteracao(tipo, local[0], local[1], antes, depois)
+    
     def registrar_movimentacao(self, tipo: str, descricao: str, valor: float, 
                               saldo_anterior: float, saldo_novo: float, data: str):
         """Registra uma movimentação no histórico"""
@@ -295,8 +488,11 @@ class ControleFinanceiro:
     def editar_despesa(self, despesa: Despesa, nova_descricao: str = None, 
                       novo_valor: float = None, nova_data_vencimento: str = None, 
                       nova_categoria: str = None) -> bool:
-        """Edita uma despesa existente"""
+        """Edita uma despesa existente (uma ocorrência prevista é gravada antes)"""
         try:
+            self.materializar_despesa_prevista(despesa)
+            antes = copy.copy(despesa)
+            
             if nova_descricao is not None:
                 despesa.descricao = nova_descricao
             
@@ -323,6 +519,7 @@ class ControleFinanceiro:
             if nova_categoria is not None:
                 despesa.categoria = nova_categoria
             
+            self._notificar_alteracao_registro('despesa', antes, despesa)
             self.salvar_dados()
             return True
         except Exception:
@@ -333,6 +530,8 @@ class ControleFinanceiro:
                       nova_categoria: str = None) -> bool:
         """Edita uma receita existente"""
         try:
+            antes = copy.copy(receita)
+            
             if nova_descricao is not None:
                 receita.descricao = nova_descricao
             
@@ -358,6 +557,7 @@ class ControleFinanceiro:
             if nova_categoria is not None:
                 receita.categoria = nova_categoria
             
+            self._notificar_alteracao_registro('receita', antes, receita)
             self.salvar_dados()
             return True
         except Exception:
@@ -382,6 +582,7 @@ class ControleFinanceiro:
                 )
             
             self.despesas[mes_ano].remove(despesa)
+            self.notificar_alteracao('despesa', mes, ano, despesa, None)
             self.salvar_dados()
             return True
         return False
@@ -404,6 +605,7 @@ class ControleFinanceiro:
             )
             
             self.receitas[mes_ano].remove(receita)
+            self.notificar_alteracao('receita', mes, ano, receita, None)
             self.salvar_dados()
             return True
         return False
@@ -411,54 +613,316 @@ class ControleFinanceiro:
     def buscar_despesas(self, termo: str = "", categoria: str = "", 
                        apenas_pagas: bool = None) -> List[tuple]:
         """Busca despesas com filtros"""
-        resultados = []
-        
-        for mes_ano, despesas in self.despesas.items():
-            mes, ano = mes_ano.split('/')
-            mes, ano = int(mes), int(ano)
-            
-            for despesa in despesas:
-                # Filtro por termo na descrição
-                if termo and termo.lower() not in despesa.descricao.lower():
-                    continue
-                
-                # Filtro por categoria
-                if categoria and categoria.lower() != despesa.categoria.lower():
-                    continue
-                
-                # Filtro por status de pagamento
-                if apenas_pagas is not None and despesa.pago != apenas_pagas:
-                    continue
-                
-                resultados.append((despesa, mes, ano))
-        
-        return resultados
+        return self.planejador_busca.compilar('despesa', termo=termo, categoria=categoria,
+                                              apenas_pagas=apenas_pagas).executar()
     
     def buscar_receitas(self, termo: str = "", categoria: str = "") -> List[tuple]:
         """Busca receitas com filtros"""
+        return self.planejador_busca.compilar('receita', termo=termo, categoria=categoria).executar()
+    
+    def _bitmap_filtro_despesas(self, categoria=None, **filtros) -> int:
+        """Bitmap das despesas que atendem aos filtros (categoria sem diferenciar maiúsculas)"""
+        if categoria is not None:
+            categoria = ([c.lower() for c in categoria] if isinstance(categoria, (list, tuple, set))
+                         else categoria.lower())
+        return self.bitmap_despesas.filtrar(categoria=categoria, **filtros)
+    
+    def filtrar_despesas(self, pago: Optional[bool] = None, tipo=None, despesa_fixa: Optional[bool] = None,
+                         categoria=None, conta=None, ano=None) -> List[tuple]:
+        """
+        Despesas que atendem a todos os filtros informados, resolvidos com os
+        índices bitmap. Cada filtro aceita um valor ou uma lista de valores
+        (qualquer um deles). Ex.: filtrar_despesas(pago=False) ou
+        filtrar_despesas(categoria='Alimentação', conta='Carteira', ano=2024).
+        """
+        bitmap = self._bitmap_filtro_despesas(pago=pago, tipo=tipo, despesa_fixa=despesa_fixa,
+                                              categoria=categoria, conta=conta, ano=ano)
+        resultados = []
+        for despesa, mes_ano in self.bitmap_despesas.materializar(bitmap):
+            mes, ano_despesa = mes_ano.split('/')
+            resultados.append((despesa, int(mes), int(ano_despesa)))
+        return resultados
+    
+    def contar_despesas(self, **filtros) -> int:
+        """Quantidade de despesas que atendem aos filtros de filtrar_despesas, sem materializá-las"""
+        return self.bitmap_despesas.contar(self._bitmap_filtro_despesas(**filtros))
+    
+    @staticmethod
+    def _resultados_aproximados(encontrados: Optional[List]) -> List[tuple]:
+        """Converte (registro, mes_ano, similaridade) em (registro, mes, ano, similaridade)"""
         resultados = []
+        for registro, mes_ano, valor in encontrados or []:
+            mes, ano = mes_ano.split('/')
+            resultados.append((registro, int(mes), int(ano), valor))
+        return resultados
+    
+    def buscar_despesas_aproximado(self, termo: str, limiar: float = LIMIAR_SIMILARIDADE,
+                                   limite: Optional[int] = 20) -> List[tuple]:
+        """Busca tolerante a erros de digitação e acentos, ordenada pela similaridade"""
+        return self._resultados_aproximados(self.trigramas_despesas.buscar(termo, limiar, limite))
+    
+    def buscar_receitas_aproximado(self, termo: str, limiar: float = LIMIAR_SIMILARIDADE,
+                                   limite: Optional[int] = 20) -> List[tuple]:
+        """Busca de receitas tolerante a erros de digitação e acentos"""
+        return self._resultados_aproximados(self.trigramas_receitas.buscar(termo, limiar, limite))
+    
+    @staticmethod
+    def _converter_data_filtro(data_texto: str) -> Optional[date]:
+        """Converte a data de um filtro (DD/MM/AAAA); vazia ou inválida vira None"""
+        if not data_texto:
+            return None
+        try:
+            return datetime.strptime(data_texto, "%d/%m/%Y").date()
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _normalizar_filtros_iteracao(tipo: str, filtros: Optional[Dict]) -> Dict:
+        """Valida os filtros de iteração e preenche os ausentes com valores neutros"""
+        filtros = dict(filtros or {})
+        desconhecidos = set(filtros) - FILTROS_ITERACAO
+        if desconhecidos:
+            raise ValueError(f"Filtros desconhecidos: {', '.join(sorted(desconhecidos))}")
+        
+        pago = filtros.pop('pago', None)
+        if filtros.get('apenas_pagas') is None:
+            filtros['apenas_pagas'] = pago
+        if tipo == 'receita' and filtros['apenas_pagas'] is not None:
+            raise ValueError("O filtro 'pago' só se aplica a despesas")
         
-        for mes_ano, receitas in self.receitas.items():
+        valor_max = filtros.get('valor_max')
+        return {
+            'termo': filtros.get('termo') or "",
+            'categoria': filtros.get('categoria') or "",
+            'valor_min': filtros.get('valor_min') or 0,
+            'valor_max': float('inf') if valor_max is None else valor_max,
+            'apenas_pagas': filtros['apenas_pagas'],
+            'data_inicio': filtros.get('data_inicio') or "",
+            'data_fim': filtros.get('data_fim') or "",
+            'mes': filtros.get('mes'),
+            'ano': filtros.get('ano')
+        }
+    
+    def _iterar_registros(self, tipo: str, filtros: Optional[Dict]) -> Iterator[tuple]:
+        """
+        Percorre os meses em ordem cronológica produzindo (registro, mes, ano)
+        dos registros que passam nos filtros. Só a lista do mês corrente é
+        copiada: a memória não cresce com o histórico, e incluir ou remover
+        registros durante a iteração não a interrompe.
+        """
+        filtros = self._normalizar_filtros_iteracao(tipo, filtros)
+        if tipo == 'receita':
+            colecao, campo_data, indice_texto = self.receitas, 'data_recebimento', self.indice_receitas
+        else:
+            colecao, campo_data, indice_texto = self.despesas, 'data_vencimento', self.indice_despesas
+        
+        termo, categoria = filtros['termo'], filtros['categoria'].lower()
+        valor_min, valor_max, pago = filtros['valor_min'], filtros['valor_max'], filtros['apenas_pagas']
+        data_inicio = self._converter_data_filtro(filtros['data_inicio'])
+        data_fim = self._converter_data_filtro(filtros['data_fim'])
+        
+        ids_texto = None
+        if termo:
+            encontrados = indice_texto.buscar(termo)
+            if encontrados is not None:
+                ids_texto = {id(registro) for registro, _ in encontrados}
+        termo_lower = termo.lower()
+        
+        def passa(registro) -> bool:
+            if categoria and registro.categoria.lower() != categoria:
+                return False
+            if pago is not None and registro.pago != pago:
+                return False
+            if not valor_min <= registro.valor <= valor_max:
+                return False
+            if data_inicio is not None or data_fim is not None:
+                data = getattr(registro, campo_data)
+                if (data is None or (data_inicio is not None and data < data_inicio) or
+                        (data_fim is not None and data > data_fim)):
+                    return False
+            if ids_texto is not None:
+                return id(registro) in ids_texto
+            return not termo or termo_lower in registro.descricao.lower()
+        
+        meses = []
+        for mes_ano in list(colecao):
             mes, ano = mes_ano.split('/')
             mes, ano = int(mes), int(ano)
-            
-            for receita in receitas:
-                # Filtro por termo na descrição
-                if termo and termo.lower() not in receita.descricao.lower():
-                    continue
-                
-                # Filtro por categoria
-                if categoria and categoria.lower() != receita.categoria.lower():
-                    continue
-                
-                resultados.append((receita, mes, ano))
+            if (filtros['mes'] is None or mes == filtros['mes']) and (filtros['ano'] is None or ano == filtros['ano']):
+                meses.append((ano, mes, mes_ano))
         
+        for ano, mes, mes_ano in sorted(meses):
+            for registro in list(colecao.get(mes_ano, ())):
+                if passa(registro):
+                    yield registro, mes, ano
+    
+    def _despesas_pendentes_entre(self, inicio: Optional[date], fim: Optional[date]) -> List[Tuple[Despesa, int, int]]:
+        """Despesas não pagas com vencimento na faixa, em ordem de vencimento (índice de pendentes)"""
+        resultados = []
+        for despesa, mes_ano in self.indice_vencimento_pendentes.faixa(inicio, fim):
+            mes, ano = mes_ano.split('/')
+            resultados.append((despesa, int(mes), int(ano)))
         return resultados
     
+    def obter_despesas_vencendo(self, dias: int = 7) -> List[Tuple[Despesa, int, int]]:
+        """Obtém despesas que vencem nos próximos X dias (inclui as fixas previstas)"""
+        hoje = date.today()
+        fim = date.fromordinal(hoje.toordinal() + dias)
+        return self._incluir_previstas(self._despesas_pendentes_entre(hoje, fim), hoje, fim)
+    
+    def obter_despesas_vencidas(self) -> List[Tuple[Despesa, int, int]]:
+        """Obtém despesas não pagas com vencimento anterior a hoje, da mais antiga para a mais recente"""
+        ontem = date.fromordinal(date.today().toordinal() - 1)
+        return self._incluir_previstas(self._despesas_pendentes_entre(None, ontem), None, ontem)
+    
+    def _incluir_previstas(self, resultados: List[Tuple[Despesa, int, int]], inicio: Optional[date],
+                           fim: date) -> List[Tuple[Despesa, int, int]]:
+        """Intercala, por vencimento, as ocorrências previstas da faixa em uma lista já ordenada"""
+        previstas = list(self.iterar_despesas_previstas(inicio, fim))
+        if not previstas:
+            return resultados
+        return list(heapq.merge(resultados, previstas, key=lambda item: item[0].data_vencimento))
+    
+    def adicionar_regra_recorrencia(self, regra: RegraRecorrencia) -> RegraRecorrencia:
+        """Cadastra uma regra de despesa fixa (nenhuma despesa é gravada até ser paga ou editada)"""
+        regra.id = max(self.regras_recorrencia, default=0) + 1
+        self.regras_recorrencia[regra.id] = regra
+        self._salvar_regra_recorrencia(regra)
+        return regra
+    
+    def encerrar_regra_recorrencia(self, regra_id: int, data_fim: str = None) -> bool:
+        """Encerra a regra na data (hoje se ausente); as ocorrências já gravadas são mantidas"""
+        regra = self.regras_recorrencia.get(regra_id)
+        if regra is None:
+            return False
+        regra.data_fim = datetime.strptime(data_fim, "%d/%m/%Y").date() if data_fim else date.today()
+        self._salvar_regra_recorrencia(regra)
+        return True
+    
+    def remover_regra_recorrencia(self, regra_id: int) -> bool:
+        """Remove a regra e suas ocorrências previstas; as despesas já gravadas são mantidas"""
+        regra = self.regras_recorrencia.pop(regra_id, None)
+        if regra is None:
+            return False
+        self._excluir_regra_recorrencia(regra)
+        return True
+    
+    def _salvar_regra_recorrencia(self, regra: RegraRecorrencia):
+        """Persiste uma regra alterada (no JSON, as regras são salvas com os demais dados)"""
+        self.salvar_dados()
+    
+    def _excluir_regra_recorrencia(self, regra: RegraRecorrencia):
+        """Persiste a remoção de uma regra"""
+        self.salvar_dados()
+    
+    def _salvar_excecao_regra(self, regra: RegraRecorrencia):
+        """Persiste a exceção de uma ocorrência materializada (no JSON, já salva junto com a despesa)"""
+    
+    @staticmethod
+    def _despesa_prevista(regra: RegraRecorrencia, mes: int, ano: int) -> Despesa:
+        """Despesa virtual (não gravada) da ocorrência da regra no mês"""
+        despesa = Despesa(regra.descricao, regra.valor, regra.vencimento_em(mes, ano).strftime("%d/%m/%Y"),
+                          False, regra.categoria, despesa_fixa=True, tipo="fixa")
+        despesa.regra_id = regra.id
+        despesa.prevista = True
+        return despesa
+    
+    def obter_despesas_previstas(self, mes: int, ano: int) -> List[Despesa]:
+        """Ocorrências previstas das despesas fixas no mês (ainda não gravadas)"""
+        return [self._despesa_prevista(regra, mes, ano) for regra in self.regras_recorrencia.values()
+                if regra.ocorre_em(mes, ano)]
+    
+    def calcular_total_previsto(self, mes: int, ano: int) -> float:
+        """Total das despesas fixas previstas no mês"""
+        return sum(regra.valor for regra in self.regras_recorrencia.values() if regra.ocorre_em(mes, ano))
+    
+    @staticmethod
+    def _ocorrencias_regra(regra: RegraRecorrencia, inicio: Optional[date], fim: date):
+        for vencimento, mes, ano in regra.ocorrencias(inicio, fim):
+            yield vencimento, regra.id, mes, ano
+    
+    def iterar_despesas_previstas(self, inicio: Optional[date], fim: date) -> Iterator[Tuple[Despesa, int, int]]:
+        """
+        Ocorrências previstas (despesa, mes, ano) com vencimento de inicio (ou
+        desde o começo de cada regra) até fim, em ordem de vencimento. As
+        ocorrências são geradas conforme consumidas, então horizontes longos
+        não custam nada além do que for lido.
+        """
+        sequencias = [self._ocorrencias_regra(regra, inicio, fim) for regra in self.regras_recorrencia.values()]
+        for _, regra_id, mes, ano in heapq.merge(*sequencias):
+            yield self._despesa_prevista(self.regras_recorrencia[regra_id], mes, ano), mes, ano
+    
+    def materializar_despesa_prevista(self, despesa: Despesa) -> Despesa:
+        """Grava como despesa real uma ocorrência prevista (ao pagar ou editar); outras despesas voltam inalteradas"""
+        if not despesa.prevista:
+            return despesa
+        mes, ano = despesa.data_vencimento.month, despesa.data_vencimento.year
+        mes_ano = self.obter_mes_ano(mes, ano)
+        regra = self.regras_recorrencia.get(despesa.regra_id)
+        if regra:
+            regra.excecoes.add(mes_ano)
+        despesa.prevista = False
+        self.adicionar_despesa(despesa, mes, ano)
+        if self.localizar_mes(despesa) is None:
+            despesa.prevista = True
+            if regra:
+                regra.excecoes.discard(mes_ano)
+            raise ValueError(f"Não foi possível gravar a despesa '{despesa.descricao}'")
+        if regra:
+            self._salvar_excecao_regra(regra)
+        return despesa
+    
+    def ignorar_despesa_prevista(self, despesa: Despesa) -> bool:
+        """Remove uma ocorrência prevista do seu mês sem alterar a regra nos demais"""
+        regra = self.regras_recorrencia.get(despesa.regra_id)
+        if not despesa.prevista or regra is None:
+            return False
+        regra.excecoes.add(self.obter_mes_ano(despesa.data_vencimento.month, despesa.data_vencimento.year))
+        self._salvar_regra_recorrencia(regra)
+        return True
+    
+    def iterar_despesas(self, filtros: Optional[Dict] = None) -> Iterator[Tuple[Despesa, int, int]]:
+        """
+        Itera sob demanda sobre as despesas (despesa, mes, ano), mês a mês.
+        filtros: termo, categoria, valor_min, valor_max, apenas_pagas (ou pago),
+        data_inicio/data_fim (DD/MM/AAAA), mes e ano; ausentes não filtram.
+        """
+        return self._iterar_registros('despesa', filtros)
+    
+    def iterar_receitas(self, filtros: Optional[Dict] = None) -> Iterator[Tuple[Receita, int, int]]:
+        """Itera sob demanda sobre as receitas (receita, mes, ano), com os filtros de iterar_despesas exceto pago"""
+        return self._iterar_registros('receita', filtros)
+    
+    def iterar_movimentacoes(self, conta: Optional[str] = None) -> Iterator[Dict]:
+        """Itera sobre as movimentações do saldo em ordem cronológica (o controle básico não tem contas)"""
+        yield from self.historico_saldo
+    
+    def exportar_indices_textuais(self) -> Dict:
+        """Índices invertidos serializados, para salvar junto com os dados"""
+        return {
+            'despesas': self.indice_despesas.exportar(),
+            'receitas': self.indice_receitas.exportar()
+        }
+    
+    def restaurar_indices_textuais(self, dados: Optional[Dict]):
+        """Restaura os índices salvos (ou os deixa para reconstrução se não baterem)"""
+        dados = dados or {}
+        self.indice_despesas.restaurar(dados.get('despesas'))
+        self.indice_receitas.restaurar(dados.get('receitas'))
+    
     def obter_historico_saldo(self) -> List[Dict]:
         """Obtém o histórico completo de movimentações do saldo"""
         return self.historico_saldo.copy()
     
+    @staticmethod
+    def carregar_regras_recorrencia(lista_regras: List[Dict]) -> Dict[int, RegraRecorrencia]:
+        """Regras de recorrência salvas, indexadas pelo id"""
+        regras = {}
+        for dados_regra in lista_regras:
+            regra = RegraRecorrencia.from_dict(dados_regra)
+            regras[regra.id] = regra
+        return regras
+    
     def salvar_dados(self):
         """Salva os dados em arquivo JSON"""
         dados = {
@@ -466,7 +930,9 @@ class ControleFinanceiro:
             'receitas': {},
             'saldo_banco': self.saldo_banco,
             'saldo_atual': self.saldo_atual,
-            'historico_saldo': self.historico_saldo
+            'historico_saldo': self.historico_saldo,
+            'regras_recorrencia': [regra.to_dict() for regra in self.regras_recorrencia.values()],
+            'indice_textual': self.exportar_indices_textuais()
         }
         
         # Converter despesas para dicionário
@@ -504,6 +970,14 @@ class ControleFinanceiro:
             self.saldo_atual = dados.get('saldo_atual', 0.0)
             self.historico_saldo = dados.get('historico_saldo', [])
             
+            # Carregar regras de despesas fixas
+            self.regras_recorrencia = self.carregar_regras_recorrencia(dados.get('regras_recorrencia', []))
+            
+            # Dados recarregados: estruturas derivadas precisam ser refeitas
+            self.notificar_alteracao('despesa')
+            self.notificar_alteracao('receita')
+            self.restaurar_indices_textuais(dados.get('indice_textual'))
+            
         except (json.JSONDecodeError, KeyError) as e:
             print(f"Erro ao carregar dados: {e}")
             print("Iniciando com dados vazios.")
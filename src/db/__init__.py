@@ -1,10 +1,13 @@
 """
 Módulo de banco de dados e conexões MySQL
 """
-from .db_config import DB_CONFIG
+from .db_config import DB_CONFIG, POOL_CONFIG
 from .db_connection import DatabaseConnection, DatabaseManager, db_manager
+from .metricas_pool import MetricasPool
+from .consultas_preparadas import CacheConsultasPreparadas
 
-__all__ = ['DB_CONFIG', 'DatabaseConnection', 'DatabaseManager', 'db_manager']
+__all__ = ['DB_CONFIG', 'POOL_CONFIG', 'DatabaseConnection', 'DatabaseManager', 'MetricasPool',
+           'CacheConsultasPreparadas', 'db_manager']
 
 
 
@@ -0,0 +1,101 @@
+"""
+Registro das consultas mais frequentes e cache dos cursores preparados de cada conexão do pool
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict
+
+# Consultas executadas como prepared statements (protocolo binário). O conector
+# só reaproveita a preparação quando recebe o mesmo objeto de texto, por isso
+# o SQL sai sempre daqui.
+CONSULTAS_PREPARADAS = {
+    'conta_por_id': "SELECT * FROM contas_bancarias WHERE id = %s",
+    'conta_por_nome': "SELECT * FROM contas_bancarias WHERE nome = %s",
+    'atualizar_saldo_conta': "UPDATE contas_bancarias SET saldo_atual = %s WHERE id = %s",
+    'adicionar_historico_saldo': (
+        "INSERT INTO historico_saldo "
+        "(conta_id, saldo_anterior, saldo_novo, valor_movimentacao, operacao) "
+        "VALUES (%s, %s, %s, %s, %s)"
+    ),
+    'despesas_mes': "SELECT * FROM despesas WHERE mes = %s AND ano = %s ORDER BY data_vencimento",
+    'despesas_pendentes_mes': (
+        "SELECT id, descricao, valor, data_vencimento FROM despesas "
+        "WHERE mes = %s AND ano = %s AND pago = FALSE"
+    ),
+    'marcar_despesa_paga': (
+        "UPDATE despesas SET pago = TRUE, data_pagamento = %s, "
+        "conta_id = COALESCE(%s, conta_id) WHERE id = %s"
+    ),
+    'marcar_despesa_nao_paga': "UPDATE despesas SET pago = FALSE, data_pagamento = NULL WHERE id = %s",
+    'receitas_mes': "SELECT * FROM receitas WHERE mes = %s AND ano = %s ORDER BY data_recebimento",
+    'metas_mes': "SELECT * FROM metas_gastos WHERE mes = %s AND ano = %s",
+    'configuracao': "SELECT valor FROM configuracoes WHERE chave = %s",
+}
+
+
+class CacheConsultasPreparadas:
+    """
+    Cursores preparados por conexão do pool, identificada pelo connection_id do
+    servidor (que muda numa reconexão, quando as preparações se perdem). Cada
+    consulta é preparada uma vez por conexão e depois só executada. Guarda as
+    conexões usadas mais recentemente, até `max_conexoes`.
+    """
+
+    def __init__(self, max_conexoes: int = 128):
+        self.max_conexoes = max_conexoes
+        self._lock = threading.Lock()
+        self._cursores: 'OrderedDict[int, Dict[str, object]]' = OrderedDict()
+        self._acertos: Dict[str, int] = {}
+        self._preparos: Dict[str, int] = {}
+
+    def cursor(self, conexao, nome: str):
+        """Cursor preparado da consulta nesta conexão (criado na primeira vez)"""
+        if nome not in CONSULTAS_PREPARADAS:
+            raise KeyError(f"Consulta preparada desconhecida: {nome}")
+        chave = conexao.connection_id
+        with self._lock:
+            cursores = self._cursores.get(chave)
+            if cursores is None:
+                cursores = self._cursores[chave] = {}
+                while len(self._cursores) > self.max_conexoes:
+                    self._cursores.popitem(last=False)
+            else:
+                self._cursores.move_to_end(chave)
+            cursor = cursores.get(nome)
+            if cursor is not None:
+                self._acertos[nome] = self._acertos.get(nome, 0) + 1
+                return cursor
+            self._preparos[nome] = self._preparos.get(nome, 0) + 1
+        # Cursor preparado de tuplas: o de dicionários só existe nas versões mais novas do conector
+        cursor = conexao.cursor(prepared=True)
+        with self._lock:
+            cursores[nome] = cursor
+        return cursor
+
+    def descartar(self, conexao):
+        """Esquece os cursores da conexão (após erro ou reset da sessão, que libera as preparações)"""
+        with self._lock:
+            self._cursores.pop(conexao.connection_id, None)
+
+    def limpar(self):
+        with self._lock:
+            self._cursores.clear()
+            self._acertos.clear()
+            self._preparos.clear()
+
+    def estatisticas(self) -> Dict:
+        """Execuções reaproveitando a preparação (acertos) e preparações, no total e por consulta"""
+        with self._lock:
+            acertos = sum(self._acertos.values())
+            preparos = sum(self._preparos.values())
+            por_consulta = {}
+            for nome in sorted(set(self._acertos) | set(self._preparos)):
+                a, p = self._acertos.get(nome, 0), self._preparos.get(nome, 0)
+                por_consulta[nome] = {'acertos': a, 'preparos': p, 'taxa_acerto': a / (a + p)}
+            return {
+                'conexoes': len(self._cursores),
+                'acertos': acertos,
+                'preparos': preparos,
+                'taxa_acerto': acertos / (acertos + preparos) if acertos + preparos else 0.0,
+                'por_consulta': por_consulta
+            }
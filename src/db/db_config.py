@@ -14,6 +14,17 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# Configurações do pool de conexões
+POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    # O reset da sessão libera os prepared statements da conexão: o cache de consultas
+    # preparadas só tem efeito com DB_POOL_RESET_SESSION=false
+    'pool_reset_session': os.getenv('DB_POOL_RESET_SESSION', 'true').lower() in ('1', 'true', 'sim'),
+    'timeout_aquisicao': float(os.getenv('DB_POOL_TIMEOUT', 10)),  # segundos esperando uma conexão livre
+    'aquecer': os.getenv('DB_POOL_AQUECER', 'true').lower() in ('1', 'true', 'sim'),
+    'cache_consultas': os.getenv('DB_CACHE_CONSULTAS', 'false').lower() in ('1', 'true', 'sim')
+}
+
 # Criar arquivo .env de exemplo se não existir
 ENV_EXAMPLE = """# Configurações do Banco de Dados MySQL
 DB_HOST=localhost
@@ -3,56 +3,199 @@ Classe de conexão e operações com o banco de dados MySQL
 """
 import mysql.connector
 from mysql.connector import Error, pooling
-from typing import List, Dict, Optional, Tuple, Any
+from mysql.connector.errors import PoolError
+from typing import List, Dict, Iterator, Optional, Tuple, Any
 from contextlib import contextmanager
-from src.db.db_config import DB_CONFIG
+from src.db.db_config import DB_CONFIG, POOL_CONFIG
+from src.db.metricas_pool import MetricasPool
+from src.db.consultas_preparadas import CONSULTAS_PREPARADAS, CacheConsultasPreparadas
 import json
+import re
+import threading
+import time
+from src.busca.indice_trigramas import trigramas
+
+# Palavras menores que innodb_ft_min_token_size não entram no índice FULLTEXT
+FULLTEXT_TAMANHO_MINIMO = 3
+MODOS_BUSCA = ('natural', 'booleano', 'expressao', 'like')
+# Campo de data que ordena as buscas de cada tabela (e a chave da paginação)
+CAMPO_DATA_BUSCA = {'despesas': 'data_vencimento', 'receitas': 'data_recebimento'}
+# Tabela de trigramas (busca aproximada) e coluna com o id do registro
+TABELAS_TRIGRAMAS = {'despesas': ('despesas_trigramas', 'despesa_id'),
+                     'receitas': ('receitas_trigramas', 'receita_id')}
 
 class DatabaseConnection:
     """Gerenciador de conexão com MySQL usando connection pooling"""
     
     _pool = None
+    # Vagas do pool: quem não acha conexão livre espera aqui até timeout_aquisicao
+    _vagas: Optional[threading.BoundedSemaphore] = None
+    metricas = MetricasPool()
+    consultas_preparadas = CacheConsultasPreparadas()
+    # Unidade de trabalho ativa em cada thread (conexão fixada e primeiro erro)
+    _local = threading.local()
     
     @classmethod
     def initialize_pool(cls):
-        """Inicializa o pool de conexões"""
+        """Inicializa o pool de conexões (tamanho, reset de sessão e aquecimento em POOL_CONFIG)"""
         if cls._pool is None:
+            tamanho = POOL_CONFIG['pool_size']
+            if not 1 <= tamanho <= pooling.CNX_POOL_MAXSIZE:
+                raise ValueError(f"DB_POOL_SIZE deve estar entre 1 e {pooling.CNX_POOL_MAXSIZE}")
             try:
                 cls._pool = pooling.MySQLConnectionPool(
                     pool_name="cli_gastos_pool",
-                    pool_size=5,
-                    pool_reset_session=True,
+                    pool_size=tamanho,
+                    pool_reset_session=POOL_CONFIG['pool_reset_session'],
                     **DB_CONFIG
                 )
-                print("✅ Pool de conexões MySQL inicializado com sucesso!")
+                cls._vagas = threading.BoundedSemaphore(tamanho)
+                print(f"✅ Pool de conexões MySQL inicializado com sucesso! ({tamanho} conexões)")
             except Error as e:
                 print(f"❌ Erro ao inicializar pool de conexões: {e}")
                 raise
+            if POOL_CONFIG['aquecer']:
+                cls.aquecer_pool()
     
     @classmethod
-    @contextmanager
-    def get_connection(cls):
-        """Context manager para obter conexão do pool"""
+    def aquecer_pool(cls) -> float:
+        """
+        Retira todas as conexões do pool de uma vez e valida cada uma (reconectando
+        as caídas), para que a primeira operação não pague o custo. Retorna o tempo gasto.
+        """
+        inicio = time.perf_counter()
+        conexoes = []
+        try:
+            for _ in range(cls._pool.pool_size):
+                conexoes.append(cls._retirar_conexao())
+            for conexao in conexoes:
+                conexao.ping(reconnect=True, attempts=2, delay=0)
+        except Error as e:
+            print(f"⚠️ Aquecimento do pool incompleto: {e}")
+        finally:
+            for conexao in conexoes:
+                cls._devolver_conexao(conexao)
+        return time.perf_counter() - inicio
+    
+    @classmethod
+    def _retirar_conexao(cls):
+        """Retira uma conexão do pool, esperando até timeout_aquisicao por uma livre"""
         if cls._pool is None:
             cls.initialize_pool()
         
-        connection = None
+        inicio = time.perf_counter()
+        timeout = POOL_CONFIG['timeout_aquisicao']
+        if not cls._vagas.acquire(timeout=timeout):
+            cls.metricas.registrar_erro(timeout=True)
+            raise PoolError(f"Nenhuma conexão livre após {timeout:g}s (pool de {cls._pool.pool_size})")
         try:
             connection = cls._pool.get_connection()
+        except Error:
+            cls._vagas.release()
+            cls.metricas.registrar_erro()
+            raise
+        cls.metricas.registrar_retirada(time.perf_counter() - inicio)
+        return connection
+    
+    @classmethod
+    def _devolver_conexao(cls, connection):
+        """Devolve a conexão ao pool (mesmo caída: o pool a reconecta na próxima retirada)"""
+        try:
+            if POOL_CONFIG['pool_reset_session']:
+                cls.consultas_preparadas.descartar(connection)
+            connection.close()
+        except Error:
+            cls.metricas.registrar_erro()
+        finally:
+            cls._vagas.release()
+            cls.metricas.registrar_devolucao()
+    
+    @classmethod
+    @contextmanager
+    def get_connection(cls):
+        """Context manager para obter conexão do pool (a da unidade de trabalho, se houver uma ativa)"""
+        transacao = cls._transacao_atual()
+        if transacao is not None:
+            yield transacao['conexao']
+            return
+        
+        connection = cls._retirar_conexao()
+        try:
             yield connection
         except Error as e:
             print(f"❌ Erro na conexão: {e}")
-            if connection:
+            if connection.is_connected():
                 connection.rollback()
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
+            cls._devolver_conexao(connection)
+    
+    @classmethod
+    def _transacao_atual(cls) -> Optional[Dict]:
+        return getattr(cls._local, 'transacao', None)
+    
+    @classmethod
+    def em_transacao(cls) -> bool:
+        """Indica se a thread está dentro de uma unidade de trabalho"""
+        return cls._transacao_atual() is not None
+    
+    @classmethod
+    @contextmanager
+    def unidade_de_trabalho(cls):
+        """
+        Fixa uma conexão do pool na thread e executa todas as consultas do bloco em
+        uma única transação, com um commit no fim. Blocos aninhados participam da
+        transação de fora. Se o bloco falhar, ou se alguma consulta falhar (mesmo com
+        o erro tratado por quem chamou), tudo é desfeito e o erro é propagado.
+        """
+        if cls._transacao_atual() is not None:
+            yield
+            return
+        
+        with cls.get_connection() as conn:
+            transacao = {'conexao': conn, 'erro': None}
+            conn.start_transaction()
+            cls._local.transacao = transacao
+            try:
+                yield
+                if transacao['erro'] is not None:
+                    raise transacao['erro']
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cls._local.transacao = None
+    
+    @classmethod
+    def _confirmar(cls, conn):
+        """Commit da consulta isolada; dentro de uma unidade de trabalho o commit fica para o fim"""
+        if cls._transacao_atual() is None:
+            conn.commit()
+    
+    @classmethod
+    def _desfazer(cls, conn, erro: Error):
+        """Rollback da consulta isolada; dentro de uma unidade de trabalho o erro marca a transação"""
+        transacao = cls._transacao_atual()
+        if transacao is None:
+            conn.rollback()
+        elif transacao['erro'] is None:
+            transacao['erro'] = erro
+    
+    @classmethod
+    def estatisticas_pool(cls) -> Dict:
+        """Métricas do pool: retiradas, histograma de espera, pico de uso, erros e configuração"""
+        estatisticas = cls.metricas.resumo(cls._pool.pool_size if cls._pool else None)
+        estatisticas['reset_sessao'] = POOL_CONFIG['pool_reset_session']
+        estatisticas['timeout_aquisicao'] = POOL_CONFIG['timeout_aquisicao']
+        estatisticas['cache_consultas'] = POOL_CONFIG['cache_consultas']
+        return estatisticas
     
     @classmethod
     def execute_query(cls, query: str, params: Tuple = None, fetch: bool = False) -> Optional[List]:
         """Executa uma query SQL"""
         with cls.get_connection() as conn:
+            cls.metricas.registrar_consulta()
             cursor = conn.cursor(dictionary=True)
             try:
                 cursor.execute(query, params or ())
@@ -61,13 +204,67 @@ class DatabaseConnection:
                     result = cursor.fetchall()
                     return result
                 else:
-                    conn.commit()
+                    cls._confirmar(conn)
                     return cursor.lastrowid
             except Error as e:
                 print(f"❌ Erro ao executar query: {e}")
                 print(f"Query: {query}")
                 print(f"Params: {params}")
-                conn.rollback()
+                cls._desfazer(conn, e)
+                raise
+            finally:
+                cursor.close()
+    
+    @classmethod
+    def execute_preparada(cls, nome: str, params: Tuple = None, fetch: bool = False) -> Optional[List]:
+        """Executa uma consulta de CONSULTAS_PREPARADAS reaproveitando a preparação da conexão"""
+        if not POOL_CONFIG['cache_consultas']:
+            return cls.execute_query(CONSULTAS_PREPARADAS[nome], params, fetch)
+        
+        with cls.get_connection() as conn:
+            cls.metricas.registrar_consulta()
+            try:
+                cursor = cls.consultas_preparadas.cursor(conn, nome)
+                cursor.execute(CONSULTAS_PREPARADAS[nome], params or ())
+                
+                if fetch:
+                    # Mesmo formato de execute_query (dicionários por coluna)
+                    colunas = cursor.column_names
+                    return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+                else:
+                    cls._confirmar(conn)
+                    return cursor.lastrowid
+            except Error as e:
+                print(f"❌ Erro ao executar query: {e}")
+                print(f"Query: {CONSULTAS_PREPARADAS[nome]}")
+                print(f"Params: {params}")
+                # A preparação pode ter se perdido (ex.: reconexão): prepara de novo na próxima vez
+                cls.consultas_preparadas.descartar(conn)
+                cls._desfazer(conn, e)
+                raise
+    
+    @classmethod
+    def estatisticas_consultas_preparadas(cls) -> Dict:
+        """Acertos e preparações do cache de consultas preparadas"""
+        return cls.consultas_preparadas.estatisticas()
+    
+    @classmethod
+    def execute_procedure(cls, chamada: str, params: Tuple = None) -> List[Dict]:
+        """Executa um CALL e retorna as linhas do primeiro resultado (o status final da procedure é descartado)"""
+        with cls.get_connection() as conn:
+            cls.metricas.registrar_consulta()
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(chamada, params or ())
+                resultado = cursor.fetchall()
+                while cursor.nextset():
+                    pass
+                return resultado
+            except Error as e:
+                print(f"❌ Erro ao executar procedure: {e}")
+                print(f"Query: {chamada}")
+                print(f"Params: {params}")
+                cls._desfazer(conn, e)
                 raise
             finally:
                 cursor.close()
@@ -76,14 +273,15 @@ class DatabaseConnection:
     def execute_many(cls, query: str, data: List[Tuple]) -> bool:
         """Executa múltiplas queries de uma vez"""
         with cls.get_connection() as conn:
+            cls.metricas.registrar_consulta()
             cursor = conn.cursor()
             try:
                 cursor.executemany(query, data)
-                conn.commit()
+                cls._confirmar(conn)
                 return True
             except Error as e:
                 print(f"❌ Erro ao executar queries múltiplas: {e}")
-                conn.rollback()
+                cls._desfazer(conn, e)
                 return False
             finally:
                 cursor.close()
@@ -113,6 +311,18 @@ class DatabaseManager:
         self.db = DatabaseConnection
         self.db.initialize_pool()
     
+    def estatisticas_pool(self) -> Dict:
+        """Métricas do pool de conexões"""
+        return self.db.estatisticas_pool()
+    
+    def estatisticas_consultas_preparadas(self) -> Dict:
+        """Taxa de acerto do cache de consultas preparadas"""
+        return self.db.estatisticas_consultas_preparadas()
+    
+    def unidade_de_trabalho(self):
+        """Transação única, numa só conexão, para várias operações (ver DatabaseConnection.unidade_de_trabalho)"""
+        return self.db.unidade_de_trabalho()
+    
     # ==================== CONTAS BANCÁRIAS ====================
     
     def criar_conta_bancaria(self, nome: str, banco: str, saldo_inicial: float = 0.0) -> Optional[int]:
@@ -122,13 +332,14 @@ class DatabaseManager:
             VALUES (%s, %s, %s)
         """
         try:
-            conta_id = self.db.execute_query(query, (nome, banco, saldo_inicial))
-            
-            # Registrar saldo inicial no histórico
-            if conta_id and saldo_inicial != 0:
-                self.adicionar_historico_saldo(
-                    conta_id, 0.0, saldo_inicial, saldo_inicial, "Saldo inicial"
-                )
+            with self.db.unidade_de_trabalho():
+                conta_id = self.db.execute_query(query, (nome, banco, saldo_inicial))
+                
+                # Registrar saldo inicial no histórico
+                if conta_id and saldo_inicial != 0:
+                    self.adicionar_historico_saldo(
+                        conta_id, 0.0, saldo_inicial, saldo_inicial, "Saldo inicial"
+                    )
             
             return conta_id
         except Error:
@@ -136,14 +347,12 @@ class DatabaseManager:
     
     def obter_conta_por_nome(self, nome: str) -> Optional[Dict]:
         """Obtém informações de uma conta pelo nome"""
-        query = "SELECT * FROM contas_bancarias WHERE nome = %s"
-        result = self.db.execute_query(query, (nome,), fetch=True)
+        result = self.db.execute_preparada('conta_por_nome', (nome,), fetch=True)
         return result[0] if result else None
     
     def obter_conta_por_id(self, conta_id: int) -> Optional[Dict]:
         """Obtém informações de uma conta pelo ID"""
-        query = "SELECT * FROM contas_bancarias WHERE id = %s"
-        result = self.db.execute_query(query, (conta_id,), fetch=True)
+        result = self.db.execute_preparada('conta_por_id', (conta_id,), fetch=True)
         return result[0] if result else None
     
     def listar_contas_bancarias(self) -> List[Dict]:
@@ -153,19 +362,19 @@ class DatabaseManager:
     
     def atualizar_saldo_conta(self, conta_id: int, novo_saldo: float, operacao: str, valor: float = 0.0) -> bool:
         """Atualiza o saldo de uma conta"""
-        # Obter saldo anterior
-        conta = self.obter_conta_por_id(conta_id)
-        if not conta:
-            return False
-        
-        saldo_anterior = float(conta['saldo_atual'])
-        
-        # Atualizar saldo
-        query = "UPDATE contas_bancarias SET saldo_atual = %s WHERE id = %s"
-        self.db.execute_query(query, (novo_saldo, conta_id))
-        
-        # Adicionar ao histórico
-        self.adicionar_historico_saldo(conta_id, saldo_anterior, novo_saldo, valor, operacao)
+        with self.db.unidade_de_trabalho():
+            # Obter saldo anterior
+            conta = self.obter_conta_por_id(conta_id)
+            if not conta:
+                return False
+            
+            saldo_anterior = float(conta['saldo_atual'])
+            
+            # Atualizar saldo
+            self.db.execute_preparada('atualizar_saldo_conta', (novo_saldo, conta_id))
+            
+            # Adicionar ao histórico
+            self.adicionar_historico_saldo(conta_id, saldo_anterior, novo_saldo, valor, operacao)
         
         return True
     
@@ -204,17 +413,44 @@ class DatabaseManager:
         except Error:
             return False
     
+    # ==================== OPERAÇÕES ATÔMICAS (PROCEDURES) ====================
+    # Cada operação é um único CALL que aplica saldo_atual + delta, grava o
+    # histórico e atualiza a despesa/receita. Fora de uma unidade de trabalho a
+    # procedure abre e confirma a própria transação; dentro, participa dela.
+    
+    def pagar_despesa(self, despesa_id: int, conta_id: int, data_pagamento: Optional[str] = None) -> float:
+        """Paga a despesa pela conta (sp_pagar_despesa); retorna o novo saldo da conta"""
+        resultado = self.db.execute_procedure(
+            "CALL sp_pagar_despesa(%s, %s, %s, %s)",
+            (despesa_id, conta_id, data_pagamento, not self.db.em_transacao())
+        )
+        return float(resultado[0]['saldo_novo'])
+    
+    def registrar_receita(self, receita_id: int, conta_id: int) -> float:
+        """Credita a receita na conta (sp_registrar_receita); retorna o novo saldo da conta"""
+        resultado = self.db.execute_procedure(
+            "CALL sp_registrar_receita(%s, %s, %s)",
+            (receita_id, conta_id, not self.db.em_transacao())
+        )
+        return float(resultado[0]['saldo_novo'])
+    
+    def transferir(self, conta_origem_id: int, conta_destino_id: int, valor: float,
+                   operacao_origem: str, operacao_destino: str) -> Tuple[float, float]:
+        """Transfere entre contas (sp_transferir); retorna os novos saldos de origem e destino"""
+        resultado = self.db.execute_procedure(
+            "CALL sp_transferir(%s, %s, %s, %s, %s, %s)",
+            (conta_origem_id, conta_destino_id, valor, operacao_origem, operacao_destino,
+             not self.db.em_transacao())
+        )
+        return float(resultado[0]['saldo_origem']), float(resultado[0]['saldo_destino'])
+    
     # ==================== HISTÓRICO DE SALDO ====================
     
     def adicionar_historico_saldo(self, conta_id: int, saldo_anterior: float, 
                                   saldo_novo: float, valor: float, operacao: str) -> Optional[int]:
         """Adiciona um registro ao histórico de saldo"""
-        query = """
-            INSERT INTO historico_saldo 
-            (conta_id, saldo_anterior, saldo_novo, valor_movimentacao, operacao)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        return self.db.execute_query(query, (conta_id, saldo_anterior, saldo_novo, valor, operacao))
+        return self.db.execute_preparada('adicionar_historico_saldo',
+                                         (conta_id, saldo_anterior, saldo_novo, valor, operacao))
     
     def obter_historico_conta(self, conta_id: int, limite: int = 10) -> List[Dict]:
         """Obtém o histórico de uma conta"""
@@ -226,6 +462,44 @@ class DatabaseManager:
         """
         return self.db.execute_query(query, (conta_id, limite), fetch=True) or []
     
+    def obter_historico_contas(self, limite: int = 10) -> Dict[int, List[Dict]]:
+        """Últimas `limite` movimentações de cada conta numa só consulta (ROW_NUMBER por conta), por conta_id"""
+        query = """
+            SELECT * FROM (
+                SELECT h.*, ROW_NUMBER() OVER (
+                    PARTITION BY h.conta_id ORDER BY h.data_movimentacao DESC, h.id DESC
+                ) AS posicao
+                FROM historico_saldo h
+            ) AS ultimas
+            WHERE posicao <= %s
+            ORDER BY conta_id, posicao
+        """
+        historicos: Dict[int, List[Dict]] = {}
+        for linha in self.db.execute_query(query, (int(limite),), fetch=True) or []:
+            del linha['posicao']
+            historicos.setdefault(linha['conta_id'], []).append(linha)
+        return historicos
+    
+    def iterar_historico_conta(self, conta_id: int, tamanho_pagina: int = 100) -> Iterator[Dict]:
+        """
+        Percorre o histórico de uma conta do mais antigo para o mais recente,
+        uma página por vez (keyset em (data_movimentacao, id), sobre idx_conta_data)
+        """
+        apos = None
+        while True:
+            condicao, params = "conta_id = %s", [conta_id]
+            if apos is not None:
+                condicao += " AND (data_movimentacao > %s OR (data_movimentacao = %s AND id > %s))"
+                params.extend([apos[0], apos[0], apos[1]])
+            query = (f"SELECT * FROM historico_saldo WHERE {condicao} "
+                     f"ORDER BY data_movimentacao, id LIMIT %s")
+            params.append(int(tamanho_pagina))
+            pagina = self.db.execute_query(query, tuple(params), fetch=True) or []
+            yield from pagina
+            if len(pagina) < tamanho_pagina:
+                return
+            apos = (pagina[-1]['data_movimentacao'], pagina[-1]['id'])
+    
     # ==================== DESPESAS ====================
     
     def adicionar_despesa(self, descricao: str, valor: float, categoria: str, 
@@ -237,33 +511,83 @@ class DatabaseManager:
             (descricao, valor, categoria, data_vencimento, mes, ano, conta_id)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
-        return self.db.execute_query(
-            query, (descricao, valor, categoria, data_vencimento, mes, ano, conta_id)
-        )
+        with self.db.unidade_de_trabalho():
+            registro_id = self.db.execute_query(
+                query, (descricao, valor, categoria, data_vencimento, mes, ano, conta_id)
+            )
+            if registro_id:
+                self.salvar_trigramas('despesas', registro_id, descricao)
+        return registro_id
     
     def obter_despesas_mes(self, mes: int, ano: int) -> List[Dict]:
         """Obtém todas as despesas de um mês"""
-        query = "SELECT * FROM despesas WHERE mes = %s AND ano = %s ORDER BY data_vencimento"
-        return self.db.execute_query(query, (mes, ano), fetch=True) or []
+        return self.db.execute_preparada('despesas_mes', (mes, ano), fetch=True) or []
+    
+    def _condicao_periodo(self, inicio: Tuple[int, int], fim: Tuple[int, int]) -> Tuple[str, list]:
+        """
+        Condição dos meses de inicio a fim, inclusive (cada um como (mes, ano)),
+        escrita por extenso para o otimizador usar faixas no índice (ano, mes)
+        """
+        (mes_inicio, ano_inicio), (mes_fim, ano_fim) = inicio, fim
+        condicao = ("(ano > %s OR (ano = %s AND mes >= %s)) "
+                    "AND (ano < %s OR (ano = %s AND mes <= %s))")
+        return condicao, [ano_inicio, ano_inicio, mes_inicio, ano_fim, ano_fim, mes_fim]
+    
+    def obter_despesas_periodo(self, inicio: Tuple[int, int], fim: Tuple[int, int]) -> List[Dict]:
+        """Despesas dos meses de inicio a fim ((mes, ano)) numa só consulta, por mês e vencimento"""
+        condicao, params = self._condicao_periodo(inicio, fim)
+        query = f"SELECT * FROM despesas WHERE {condicao} ORDER BY ano, mes, data_vencimento"
+        return self.db.execute_query(query, tuple(params), fetch=True) or []
     
-    def marcar_despesa_paga(self, despesa_id: int, data_pagamento: Optional[str] = None) -> bool:
-        """Marca uma despesa como paga"""
+    def obter_despesas_vencendo(self, dias: int = 7) -> List[Dict]:
+        """Despesas não pagas que vencem de hoje até daqui a `dias` dias, por vencimento"""
+        query = """
+            SELECT * FROM v_despesas_vencendo 
+            WHERE data_vencimento BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL %s DAY) 
+            ORDER BY data_vencimento, id
+        """
+        return self.db.execute_query(query, (int(dias),), fetch=True) or []
+    
+    def obter_despesas_vencidas(self) -> List[Dict]:
+        """Despesas não pagas com vencimento anterior a hoje, da mais antiga para a mais recente"""
+        query = """
+            SELECT * FROM v_despesas_vencendo 
+            WHERE data_vencimento < CURDATE() 
+            ORDER BY data_vencimento, id
+        """
+        return self.db.execute_query(query, fetch=True) or []
+
+    def assinaturas_meses_despesas(self) -> List[Dict]:
+        """Resumo por mês (quantidade, pagas, soma dos ids e última alteração) para detectar meses alterados"""
+        query = """
+            SELECT mes, ano, COUNT(*) AS quantidade, SUM(pago) AS pagas, SUM(id) AS soma_ids,
+                   MAX(data_atualizacao) AS atualizacao
+            FROM despesas
+            GROUP BY ano, mes
+        """
+        return self.db.execute_query(query, fetch=True) or []
+
+    def obter_despesas_pendentes_mes(self, mes: int, ano: int) -> List[Dict]:
+        """Despesas não pagas de um mês (só as colunas usadas pelos lembretes)"""
+        return self.db.execute_preparada('despesas_pendentes_mes', (mes, ano), fetch=True) or []
+
+    def marcar_despesa_paga(self, despesa_id: int, data_pagamento: Optional[str] = None,
+                            conta_id: Optional[int] = None) -> bool:
+        """Marca uma despesa como paga (e registra a conta usada, se informada)"""
         if data_pagamento is None:
             from datetime import datetime
             data_pagamento = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        query = "UPDATE despesas SET pago = TRUE, data_pagamento = %s WHERE id = %s"
         try:
-            self.db.execute_query(query, (data_pagamento, despesa_id))
+            self.db.execute_preparada('marcar_despesa_paga', (data_pagamento, conta_id, despesa_id))
             return True
         except Error:
             return False
     
     def marcar_despesa_nao_paga(self, despesa_id: int) -> bool:
         """Marca uma despesa como não paga"""
-        query = "UPDATE despesas SET pago = FALSE, data_pagamento = NULL WHERE id = %s"
         try:
-            self.db.execute_query(query, (despesa_id,))
+            self.db.execute_preparada('marcar_despesa_nao_paga', (despesa_id,))
             return True
         except Error:
             return False
@@ -298,153 +622,227 @@ class DatabaseManager:
         query = f"UPDATE despesas SET {', '.join(updates)} WHERE id = %s"
         
         try:
-            self.db.execute_query(query, tuple(params))
-            return True
+            with self.db.unidade_de_trabalho():
+                self.db.execute_query(query, tuple(params))
+                if descricao is not None:
+                    self.salvar_trigramas('despesas', despesa_id, descricao)
         except Error:
             return False
+        return True
     
     def remover_despesa(self, despesa_id: int) -> bool:
-        """Remove uma despesa"""
-        query = "DELETE FROM despesas WHERE id = %s"
+        """Remove uma despesa (False se ela não existir ou se o DELETE falhar)"""
         try:
-            # Executar DELETE com verificação detalhada
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor(dictionary=True)
-                try:
-                    # Desabilitar autocommit para controle manual da transação
-                    conn.autocommit = False
-                    
-                    # Primeiro, verificar se a despesa existe
-                    check_query = "SELECT id, descricao FROM despesas WHERE id = %s"
-                    cursor.execute(check_query, (despesa_id,))
-                    existe = cursor.fetchone()
-                    
-                    if not existe:
-                        conn.rollback()
-                        return False
-                    
-                    # Executar DELETE
-                    cursor.execute(query, (despesa_id,))
-                    rows_affected = cursor.rowcount
-                    
-                    if rows_affected == 0:
-                        conn.rollback()
-                        return False
-                    
-                    # Commit da transação
-                    conn.commit()
-                    
-                    # Verificar se realmente removeu
-                    cursor.execute(check_query, (despesa_id,))
-                    ainda_existe = cursor.fetchone()
-                    
-                    if ainda_existe:
-                        return False
-                    else:
-                        return True
-                        
-                except Exception as e:
-                    conn.rollback()
+            with self.db.unidade_de_trabalho():
+                existe = self.db.execute_query(
+                    "SELECT id FROM despesas WHERE id = %s FOR UPDATE", (despesa_id,), fetch=True)
+                if not existe:
                     return False
-                finally:
-                    # Reabilitar autocommit
-                    conn.autocommit = True
-                    cursor.close()
-                    
-        except Exception as e:
+                self.db.execute_query("DELETE FROM despesas WHERE id = %s", (despesa_id,))
+        except Error:
             return False
+        return True
     
-    def buscar_despesas(self, filtros: Dict[str, Any]) -> List[Dict]:
-        """Busca despesas com filtros"""
-        query = "SELECT * FROM despesas WHERE 1=1"
-        params = []
-        
-        if 'termo' in filtros and filtros['termo']:
-            query += " AND descricao LIKE %s"
-            params.append(f"%{filtros['termo']}%")
+    def agregar_despesas(self, meses: List[Tuple[int, int]]) -> List[Dict]:
+        """Agrega despesas por mês, categoria, status e conta (alimenta o cubo de gastos)"""
+        if not meses:
+            return []
         
-        if 'categoria' in filtros and filtros['categoria']:
-            query += " AND categoria = %s"
-            params.append(filtros['categoria'])
+        condicoes = " OR ".join(["(d.mes = %s AND d.ano = %s)"] * len(meses))
+        params = [valor for mes_ano in meses for valor in mes_ano]
+        query = f"""
+            SELECT d.ano, d.mes, d.categoria, d.pago, cb.nome AS conta,
+                   SUM(d.valor) AS total, COUNT(*) AS quantidade
+            FROM despesas d
+            LEFT JOIN contas_bancarias cb ON cb.id = d.conta_id
+            WHERE {condicoes}
+            GROUP BY d.ano, d.mes, d.categoria, d.pago, cb.nome
+        """
+        return self.db.execute_query(query, tuple(params), fetch=True) or []
+    
+    def listar_meses_despesas(self) -> List[Dict]:
+        """Lista os meses/anos que possuem despesas"""
+        query = "SELECT DISTINCT mes, ano FROM despesas ORDER BY ano, mes"
+        return self.db.execute_query(query, fetch=True) or []
+    
+    def _filtro_descricao(self, termo: str, modo: str = 'booleano') -> Tuple[str, list, str, list]:
+        """
+        Monta o filtro de texto sobre `descricao`.
         
-        if 'valor_min' in filtros and filtros['valor_min'] > 0:
-            query += " AND valor >= %s"
-            params.append(filtros['valor_min'])
+        Modos:
+            natural: MATCH ... AGAINST em linguagem natural
+            booleano: MATCH ... AGAINST IN BOOLEAN MODE com '+palavra*' para cada palavra
+                      do termo (todas, por prefixo); hífens, aspas e parênteses são só separadores
+            expressao: o termo vai sem alteração como expressão IN BOOLEAN MODE
+                       (operadores +, -, aspas etc. escritos de propósito por quem chama)
+            like: LIKE '%termo%' (também usado para palavras curtas demais para o FULLTEXT)
         
-        if 'valor_max' in filtros and filtros['valor_max'] != float('inf'):
-            query += " AND valor <= %s"
-            params.append(filtros['valor_max'])
+        Retorna (condição, parâmetros, expressão de relevância, parâmetros da relevância).
+        """
+        if modo not in MODOS_BUSCA:
+            raise ValueError(f"Modo de busca inválido: '{modo}'")
         
-        if 'pago' in filtros and filtros['pago'] is not None:
-            query += " AND pago = %s"
-            params.append(filtros['pago'])
+        palavras = re.findall(r'\w+', termo)
+        if modo == 'like' or not palavras or min(len(p) for p in palavras) < FULLTEXT_TAMANHO_MINIMO:
+            return "descricao LIKE %s", [f"%{termo}%"], "0", []
         
-        if 'data_inicio' in filtros and filtros['data_inicio']:
-            query += " AND data_vencimento >= %s"
-            # Converter de DD/MM/YYYY para YYYY-MM-DD
-            data_inicio = filtros['data_inicio']
-            if '/' in data_inicio:
-                partes = data_inicio.split('/')
-                data_inicio = f"{partes[2]}-{partes[1]}-{partes[0]}"
-            params.append(data_inicio)
-        
-        if 'data_fim' in filtros and filtros['data_fim']:
-            query += " AND data_vencimento <= %s"
-            # Converter de DD/MM/YYYY para YYYY-MM-DD
-            data_fim = filtros['data_fim']
-            if '/' in data_fim:
-                partes = data_fim.split('/')
-                data_fim = f"{partes[2]}-{partes[1]}-{partes[0]}"
-            params.append(data_fim)
-        
-        query += " ORDER BY data_vencimento DESC"
+        if modo == 'natural':
+            match = "MATCH(descricao) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+            expressao = termo
+        else:
+            match = "MATCH(descricao) AGAINST (%s IN BOOLEAN MODE)"
+            expressao = termo if modo == 'expressao' else ' '.join(f"+{p}*" for p in palavras)
         
-        return self.db.execute_query(query, tuple(params), fetch=True) or []
-    
-    # ==================== RECEITAS ====================
+        return match, [expressao], match, [expressao]
     
-    def buscar_receitas(self, filtros: Dict[str, Any]) -> List[Dict]:
-        """Busca receitas com filtros"""
-        query = "SELECT * FROM receitas WHERE 1=1"
-        params = []
+    def _condicoes_busca(self, tabela: str, filtros: Dict[str, Any]) -> Tuple[str, list, str, list]:
+        """
+        Monta o WHERE comum às buscas de despesas e receitas (receitas não têm `pago`).
+        Retorna (condições, parâmetros, expressão de relevância, parâmetros da relevância).
+        """
+        campo_data = CAMPO_DATA_BUSCA[tabela]
+        relevancia, params_relevancia = "0", []
+        condicoes, params = ["1=1"], []
         
         if 'termo' in filtros and filtros['termo']:
-            query += " AND descricao LIKE %s"
-            params.append(f"%{filtros['termo']}%")
+            condicao_texto, params_texto, relevancia, params_relevancia = self._filtro_descricao(
+                filtros['termo'], filtros.get('modo_busca') or 'booleano')
+            condicoes.append(condicao_texto)
+            params.extend(params_texto)
         
         if 'categoria' in filtros and filtros['categoria']:
-            query += " AND categoria = %s"
+            condicoes.append("categoria = %s")
             params.append(filtros['categoria'])
         
         if 'valor_min' in filtros and filtros['valor_min'] > 0:
-            query += " AND valor >= %s"
+            condicoes.append("valor >= %s")
             params.append(filtros['valor_min'])
         
         if 'valor_max' in filtros and filtros['valor_max'] != float('inf'):
-            query += " AND valor <= %s"
+            condicoes.append("valor <= %s")
             params.append(filtros['valor_max'])
         
-        if 'data_inicio' in filtros and filtros['data_inicio']:
-            query += " AND data_recebimento >= %s"
-            # Converter de DD/MM/YYYY para YYYY-MM-DD
-            data_inicio = filtros['data_inicio']
-            if '/' in data_inicio:
-                partes = data_inicio.split('/')
-                data_inicio = f"{partes[2]}-{partes[1]}-{partes[0]}"
-            params.append(data_inicio)
-        
-        if 'data_fim' in filtros and filtros['data_fim']:
-            query += " AND data_recebimento <= %s"
-            # Converter de DD/MM/YYYY para YYYY-MM-DD
-            data_fim = filtros['data_fim']
-            if '/' in data_fim:
-                partes = data_fim.split('/')
-                data_fim = f"{partes[2]}-{partes[1]}-{partes[0]}"
-            params.append(data_fim)
-        
-        query += " ORDER BY data_recebimento DESC"
+        if tabela == 'despesas' and 'pago' in filtros and filtros['pago'] is not None:
+            condicoes.append("pago = %s")
+            params.append(filtros['pago'])
         
-        return self.db.execute_query(query, tuple(params), fetch=True) or []
+        for chave in ('mes', 'ano'):
+            if filtros.get(chave) is not None:
+                condicoes.append(f"{chave} = %s")
+                params.append(filtros[chave])
+        
+        for chave, operador in (('data_inicio', '>='), ('data_fim', '<=')):
+            if chave in filtros and filtros[chave]:
+                condicoes.append(f"{campo_data} {operador} %s")
+                # Converter de DD/MM/YYYY para YYYY-MM-DD
+                data = filtros[chave]
+                if '/' in data:
+                    partes = data.split('/')
+                    data = f"{partes[2]}-{partes[1]}-{partes[0]}"
+                params.append(data)
+        
+        return " AND ".join(condicoes), params, relevancia, params_relevancia
+    
+    def sql_busca_pagina(self, tabela: str, filtros: Dict[str, Any], limite: int = 50,
+                         apos: Optional[Tuple[Any, int]] = None,
+                         crescente: bool = False) -> Tuple[str, tuple]:
+        """
+        SQL parametrizado de uma página da busca em ordem (data DESC, id DESC), por
+        keyset: a página seguinte começa depois da chave (data, id) do último
+        registro recebido, sem OFFSET, e o custo de cada página não cresce com a posição.
+        Com crescente=True a ordem é (data ASC, id ASC).
+        """
+        campo_data = CAMPO_DATA_BUSCA[tabela]
+        where, params, _, _ = self._condicoes_busca(tabela, filtros)
+        operador, ordem = ('>', 'ASC') if crescente else ('<', 'DESC')
+        
+        if apos is not None:
+            data, id_registro = apos
+            # Forma expandida de (data, id) < (%s, %s) (ou >), que usa o índice da data
+            # (o InnoDB guarda o id junto de cada entrada do índice secundário)
+            where += f" AND ({campo_data} {operador} %s OR ({campo_data} = %s AND id {operador} %s))"
+            params.extend([data, data, id_registro])
+        
+        query = (f"SELECT * FROM {tabela} WHERE {where} "
+                 f"ORDER BY {campo_data} {ordem}, id {ordem} LIMIT %s")
+        params.append(int(limite))
+        return query, tuple(params)
+    
+    def _buscar_pagina(self, tabela: str, filtros: Dict[str, Any], limite: int,
+                       apos: Optional[Tuple[Any, int]], crescente: bool = False) -> List[Dict]:
+        """Executa uma página da busca (ver sql_busca_pagina)"""
+        query, params = self.sql_busca_pagina(tabela, filtros, limite, apos, crescente)
+        return self.db.execute_query(query, params, fetch=True) or []
+    
+    def explicar_sql(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Plano de execução do MySQL (EXPLAIN) para uma consulta"""
+        return self.db.execute_query(f"EXPLAIN {query}", params, fetch=True) or []
+    
+    def _iterar_busca(self, tabela: str, filtros: Dict[str, Any], tamanho_pagina: int,
+                      crescente: bool = False) -> Iterator[Dict]:
+        """Percorre a busca página a página, buscando a próxima só quando necessário"""
+        campo_data = CAMPO_DATA_BUSCA[tabela]
+        apos = None
+        while True:
+            pagina = self._buscar_pagina(tabela, filtros, tamanho_pagina, apos, crescente)
+            yield from pagina
+            if len(pagina) < tamanho_pagina:
+                return
+            ultimo = pagina[-1]
+            apos = (ultimo[campo_data], ultimo['id'])
+    
+    def _resumir_busca(self, tabela: str, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """Quantidade e valor total dos registros da busca, calculados no banco"""
+        where, params, _, _ = self._condicoes_busca(tabela, filtros)
+        query = f"SELECT COUNT(*) AS quantidade, COALESCE(SUM(valor), 0) AS total FROM {tabela} WHERE {where}"
+        resultado = self.db.execute_query(query, tuple(params), fetch=True)
+        if not resultado:
+            return {'quantidade': 0, 'total': 0.0}
+        return {'quantidade': int(resultado[0]['quantidade']), 'total': float(resultado[0]['total'])}
+    
+    def buscar_despesas(self, filtros: Dict[str, Any]) -> List[Dict]:
+        """Busca despesas com filtros (ordenadas por relevância quando há termo)"""
+        where, params, relevancia, params_relevancia = self._condicoes_busca('despesas', filtros)
+        query = (f"SELECT *, {relevancia} AS relevancia FROM despesas WHERE {where} "
+                 f"ORDER BY relevancia DESC, data_vencimento DESC")
+        return self.db.execute_query(query, tuple(params_relevancia + params), fetch=True) or []
+    
+    def buscar_despesas_pagina(self, filtros: Dict[str, Any], limite: int = 50,
+                               apos: Optional[Tuple[Any, int]] = None) -> List[Dict]:
+        """Página de despesas da busca, da mais recente para a mais antiga, após a chave (data_vencimento, id)"""
+        return self._buscar_pagina('despesas', filtros, limite, apos)
+    
+    def iterar_busca_despesas(self, filtros: Dict[str, Any], tamanho_pagina: int = 50,
+                              crescente: bool = False) -> Iterator[Dict]:
+        """Itera sobre as despesas da busca carregando uma página por vez"""
+        return self._iterar_busca('despesas', filtros, tamanho_pagina, crescente)
+    
+    def resumir_busca_despesas(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """Quantidade e total das despesas da busca"""
+        return self._resumir_busca('despesas', filtros)
+    
+    # ==================== RECEITAS ====================
+    
+    def buscar_receitas(self, filtros: Dict[str, Any]) -> List[Dict]:
+        """Busca receitas com filtros (ordenadas por relevância quando há termo)"""
+        where, params, relevancia, params_relevancia = self._condicoes_busca('receitas', filtros)
+        query = (f"SELECT *, {relevancia} AS relevancia FROM receitas WHERE {where} "
+                 f"ORDER BY relevancia DESC, data_recebimento DESC")
+        return self.db.execute_query(query, tuple(params_relevancia + params), fetch=True) or []
+    
+    def buscar_receitas_pagina(self, filtros: Dict[str, Any], limite: int = 50,
+                               apos: Optional[Tuple[Any, int]] = None) -> List[Dict]:
+        """Página de receitas da busca, da mais recente para a mais antiga, após a chave (data_recebimento, id)"""
+        return self._buscar_pagina('receitas', filtros, limite, apos)
+    
+    def iterar_busca_receitas(self, filtros: Dict[str, Any], tamanho_pagina: int = 50,
+                              crescente: bool = False) -> Iterator[Dict]:
+        """Itera sobre as receitas da busca carregando uma página por vez"""
+        return self._iterar_busca('receitas', filtros, tamanho_pagina, crescente)
+    
+    def resumir_busca_receitas(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """Quantidade e total das receitas da busca"""
+        return self._resumir_busca('receitas', filtros)
     
     def adicionar_receita(self, descricao: str, valor: float, categoria: str, 
                          data_recebimento: str, mes: int, ano: int,
@@ -455,14 +853,23 @@ class DatabaseManager:
             (descricao, valor, categoria, data_recebimento, mes, ano, conta_id)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
-        return self.db.execute_query(
-            query, (descricao, valor, categoria, data_recebimento, mes, ano, conta_id)
-        )
+        with self.db.unidade_de_trabalho():
+            registro_id = self.db.execute_query(
+                query, (descricao, valor, categoria, data_recebimento, mes, ano, conta_id)
+            )
+            if registro_id:
+                self.salvar_trigramas('receitas', registro_id, descricao)
+        return registro_id
     
     def obter_receitas_mes(self, mes: int, ano: int) -> List[Dict]:
         """Obtém todas as receitas de um mês"""
-        query = "SELECT * FROM receitas WHERE mes = %s AND ano = %s ORDER BY data_recebimento"
-        return self.db.execute_query(query, (mes, ano), fetch=True) or []
+        return self.db.execute_preparada('receitas_mes', (mes, ano), fetch=True) or []
+    
+    def obter_receitas_periodo(self, inicio: Tuple[int, int], fim: Tuple[int, int]) -> List[Dict]:
+        """Receitas dos meses de inicio a fim ((mes, ano)) numa só consulta, por mês e recebimento"""
+        condicao, params = self._condicao_periodo(inicio, fim)
+        query = f"SELECT * FROM receitas WHERE {condicao} ORDER BY ano, mes, data_recebimento"
+        return self.db.execute_query(query, tuple(params), fetch=True) or []
     
     def editar_receita(self, receita_id: int, descricao: Optional[str] = None,
                        valor: Optional[float] = None, categoria: Optional[str] = None,
@@ -494,61 +901,90 @@ class DatabaseManager:
         query = f"UPDATE receitas SET {', '.join(updates)} WHERE id = %s"
         
         try:
-            self.db.execute_query(query, tuple(params))
-            return True
+            with self.db.unidade_de_trabalho():
+                self.db.execute_query(query, tuple(params))
+                if descricao is not None:
+                    self.salvar_trigramas('receitas', receita_id, descricao)
         except Error:
             return False
+        return True
     
     def remover_receita(self, receita_id: int) -> bool:
-        """Remove uma receita"""
-        query = "DELETE FROM receitas WHERE id = %s"
+        """Remove uma receita (False se ela não existir ou se o DELETE falhar)"""
         try:
-            # Executar DELETE com verificação detalhada
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor(dictionary=True)
-                try:
-                    # Desabilitar autocommit para controle manual da transação
-                    conn.autocommit = False
-                    
-                    # Primeiro, verificar se a receita existe
-                    check_query = "SELECT id, descricao FROM receitas WHERE id = %s"
-                    cursor.execute(check_query, (receita_id,))
-                    existe = cursor.fetchone()
-                    
-                    if not existe:
-                        conn.rollback()
-                        return False
-                    
-                    # Executar DELETE
-                    cursor.execute(query, (receita_id,))
-                    rows_affected = cursor.rowcount
-                    
-                    if rows_affected == 0:
-                        conn.rollback()
-                        return False
-                    
-                    # Commit da transação
-                    conn.commit()
-                    
-                    # Verificar se realmente removeu
-                    cursor.execute(check_query, (receita_id,))
-                    ainda_existe = cursor.fetchone()
-                    
-                    if ainda_existe:
-                        return False
-                    else:
-                        return True
-                        
-                except Exception as e:
-                    conn.rollback()
+            with self.db.unidade_de_trabalho():
+                existe = self.db.execute_query(
+                    "SELECT id FROM receitas WHERE id = %s FOR UPDATE", (receita_id,), fetch=True)
+                if not existe:
                     return False
-                finally:
-                    # Reabilitar autocommit
-                    conn.autocommit = True
-                    cursor.close()
-                    
-        except Exception as e:
+                self.db.execute_query("DELETE FROM receitas WHERE id = %s", (receita_id,))
+        except Error:
+            return False
+        return True
+    
+    # ==================== TRIGRAMAS (BUSCA APROXIMADA) ====================
+    
+    def salvar_trigramas(self, tabela: str, registro_id: int, descricao: str) -> bool:
+        """Regrava os trigramas da descrição de uma despesa ou receita"""
+        tabela_trigramas, coluna = TABELAS_TRIGRAMAS[tabela]
+        try:
+            self.db.execute_query(f"DELETE FROM {tabela_trigramas} WHERE {coluna} = %s", (registro_id,))
+        except Error:
             return False
+        
+        linhas = [(trigrama, registro_id) for trigrama in sorted(trigramas(descricao))]
+        if not linhas:
+            return True
+        return self.db.execute_many(
+            f"INSERT IGNORE INTO {tabela_trigramas} (trigrama, {coluna}) VALUES (%s, %s)", linhas
+        )
+    
+    def candidatos_trigramas(self, tabela: str, termo: str, minimo: int = 1,
+                             limite: Optional[int] = None) -> List[Dict]:
+        """
+        Registros que compartilham pelo menos `minimo` trigramas com o termo,
+        com a contagem em `comuns`, dos que mais compartilham para os que menos.
+        A seleção usa a chave (trigrama, id) da tabela de trigramas, sem varrer a tabela principal.
+        """
+        tabela_trigramas, coluna = TABELAS_TRIGRAMAS[tabela]
+        consulta = sorted(trigramas(termo))
+        if not consulta:
+            return []
+        
+        marcadores = ', '.join(['%s'] * len(consulta))
+        query = f"""
+            SELECT r.*, COUNT(*) AS comuns
+            FROM {tabela_trigramas} t
+            JOIN {tabela} r ON r.id = t.{coluna}
+            WHERE t.trigrama IN ({marcadores})
+            GROUP BY r.id
+            HAVING comuns >= %s
+            ORDER BY comuns DESC, r.id DESC
+        """
+        params = consulta + [minimo]
+        if limite is not None:
+            query += " LIMIT %s"
+            params.append(int(limite))
+        
+        return self.db.execute_query(query, tuple(params), fetch=True) or []
+    
+    def reindexar_trigramas(self, tabela: str, tamanho_lote: int = 1000) -> int:
+        """Recalcula a tabela de trigramas inteira (bancos com dados anteriores a ela); retorna os registros indexados"""
+        tabela_trigramas, coluna = TABELAS_TRIGRAMAS[tabela]
+        registros = self.db.execute_query(f"SELECT id, descricao FROM {tabela}", fetch=True) or []
+        self.db.execute_query(f"DELETE FROM {tabela_trigramas}")
+        
+        insercao = f"INSERT IGNORE INTO {tabela_trigramas} (trigrama, {coluna}) VALUES (%s, %s)"
+        lote = []
+        for registro in registros:
+            lote.extend((trigrama, registro['id']) for trigrama in trigramas(registro['descricao']))
+            if len(lote) >= tamanho_lote:
+                self.db.execute_many(insercao, lote)
+                lote = []
+        if lote:
+            self.db.execute_many(insercao, lote)
+        
+        return len(registros)
     
     # ==================== METAS DE GASTOS ====================
     
@@ -563,8 +999,13 @@ class DatabaseManager:
     
     def obter_metas_mes(self, mes: int, ano: int) -> List[Dict]:
         """Obtém todas as metas de um mês"""
-        query = "SELECT * FROM metas_gastos WHERE mes = %s AND ano = %s"
-        return self.db.execute_query(query, (mes, ano), fetch=True) or []
+        return self.db.execute_preparada('metas_mes', (mes, ano), fetch=True) or []
+    
+    def obter_metas_periodo(self, inicio: Tuple[int, int], fim: Tuple[int, int]) -> List[Dict]:
+        """Metas dos meses de inicio a fim ((mes, ano)) numa só consulta"""
+        condicao, params = self._condicao_periodo(inicio, fim)
+        query = f"SELECT * FROM metas_gastos WHERE {condicao} ORDER BY ano, mes"
+        return self.db.execute_query(query, tuple(params), fetch=True) or []
     
     def atualizar_gastos_metas(self, mes: int, ano: int) -> bool:
         """Atualiza os gastos atuais das metas (chama stored procedure)"""
@@ -596,12 +1037,49 @@ class DatabaseManager:
         except Error:
             return False
     
+    # ==================== REGRAS DE RECORRÊNCIA ====================
+
+    def listar_regras_recorrencia(self) -> List[Dict]:
+        """Lista as regras de despesas fixas"""
+        query = "SELECT * FROM regras_recorrencia ORDER BY id"
+        return self.db.execute_query(query, fetch=True) or []
+
+    def adicionar_regra_recorrencia(self, descricao: str, valor: float, categoria: str, dia: int,
+                                    intervalo_meses: int, mes_inicio: int, ano_inicio: int,
+                                    data_fim: Optional[str] = None) -> Optional[int]:
+        """Cadastra uma regra de despesa fixa"""
+        query = """
+            INSERT INTO regras_recorrencia
+                (descricao, valor, categoria, dia, intervalo_meses, mes_inicio, ano_inicio, data_fim, excecoes)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, JSON_ARRAY())
+        """
+        return self.db.execute_query(
+            query, (descricao, valor, categoria, dia, intervalo_meses, mes_inicio, ano_inicio, data_fim)
+        )
+
+    def atualizar_regra_recorrencia(self, regra_id: int, data_fim: Optional[str], excecoes: List[str]) -> bool:
+        """Atualiza a data final e os meses de exceção de uma regra"""
+        query = "UPDATE regras_recorrencia SET data_fim = %s, excecoes = %s WHERE id = %s"
+        try:
+            self.db.execute_query(query, (data_fim, json.dumps(sorted(excecoes)), regra_id))
+            return True
+        except Error:
+            return False
+
+    def remover_regra_recorrencia(self, regra_id: int) -> bool:
+        """Remove uma regra de despesa fixa (as despesas já gravadas permanecem)"""
+        query = "DELETE FROM regras_recorrencia WHERE id = %s"
+        try:
+            self.db.execute_query(query, (regra_id,))
+            return True
+        except Error:
+            return False
+
     # ==================== CONFIGURAÇÕES ====================
     
     def obter_configuracao(self, chave: str) -> Optional[str]:
         """Obtém uma configuração"""
-        query = "SELECT valor FROM configuracoes WHERE chave = %s"
-        result = self.db.execute_query(query, (chave,), fetch=True)
+        result = self.db.execute_preparada('configuracao', (chave,), fetch=True)
         return result[0]['valor'] if result else None
     
     def salvar_configuracao(self, chave: str, valor: str, descricao: Optional[str] = None) -> bool:
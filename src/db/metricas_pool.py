@@ -0,0 +1,75 @@
+"""
+Métricas do pool de conexões MySQL (retiradas, espera, uso simultâneo e erros)
+"""
+import threading
+from typing import Dict, Optional
+
+# Limites (ms) das faixas do histograma de espera por uma conexão; a última faixa não tem limite
+FAIXAS_ESPERA_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class MetricasPool:
+    """Contadores do pool, atualizados por várias threads sob um lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zerar()
+
+    def zerar(self):
+        """Zera os contadores (as conexões em uso continuam contadas)"""
+        with self._lock:
+            self.retiradas = 0
+            self.consultas = 0
+            self.erros = 0
+            self.timeouts = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+            self.histograma = [0] * (len(FAIXAS_ESPERA_MS) + 1)
+            self.em_uso = getattr(self, 'em_uso', 0)
+            self.pico_em_uso = self.em_uso
+
+    def registrar_retirada(self, espera: float):
+        """Conexão entregue após `espera` segundos"""
+        espera_ms = espera * 1000
+        faixa = next((i for i, limite in enumerate(FAIXAS_ESPERA_MS) if espera_ms <= limite),
+                     len(FAIXAS_ESPERA_MS))
+        with self._lock:
+            self.retiradas += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+            self.histograma[faixa] += 1
+            self.em_uso += 1
+            self.pico_em_uso = max(self.pico_em_uso, self.em_uso)
+
+    def registrar_consulta(self):
+        """Comando enviado ao servidor (com ou sem retirada própria do pool)"""
+        with self._lock:
+            self.consultas += 1
+    
+    def registrar_devolucao(self):
+        with self._lock:
+            self.em_uso -= 1
+
+    def registrar_erro(self, timeout: bool = False):
+        """Falha ao obter uma conexão (timeout = pool esgotado até o limite de espera)"""
+        with self._lock:
+            self.erros += 1
+            if timeout:
+                self.timeouts += 1
+
+    def resumo(self, tamanho_pool: Optional[int] = None) -> Dict:
+        """Cópia consistente dos contadores, com o histograma rotulado por faixa"""
+        with self._lock:
+            rotulos = [f"<= {limite} ms" for limite in FAIXAS_ESPERA_MS] + [f"> {FAIXAS_ESPERA_MS[-1]} ms"]
+            return {
+                'tamanho_pool': tamanho_pool,
+                'retiradas': self.retiradas,
+                'consultas': self.consultas,
+                'em_uso': self.em_uso,
+                'pico_em_uso': self.pico_em_uso,
+                'erros': self.erros,
+                'timeouts': self.timeouts,
+                'espera_media_ms': self.espera_total * 1000 / self.retiradas if self.retiradas else 0.0,
+                'espera_maxima_ms': self.espera_maxima * 1000,
+                'histograma_espera': dict(zip(rotulos, self.histograma))
+            }
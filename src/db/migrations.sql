@@ -61,7 +61,8 @@ CREATE TABLE IF NOT EXISTS `despesas` (
     INDEX `idx_mes_ano` (`mes`, `ano`),
     INDEX `idx_categoria` (`categoria`),
     INDEX `idx_pago` (`pago`),
-    INDEX `idx_data_vencimento` (`data_vencimento`)
+    INDEX `idx_data_vencimento` (`data_vencimento`),
+    FULLTEXT INDEX `ft_despesas_descricao` (`descricao`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =====================================================
@@ -82,7 +83,29 @@ CREATE TABLE IF NOT EXISTS `receitas` (
     FOREIGN KEY (`conta_id`) REFERENCES `contas_bancarias`(`id`) ON DELETE SET NULL,
     INDEX `idx_mes_ano` (`mes`, `ano`),
     INDEX `idx_categoria` (`categoria`),
-    INDEX `idx_data_recebimento` (`data_recebimento`)
+    INDEX `idx_data_recebimento` (`data_recebimento`),
+    FULLTEXT INDEX `ft_receitas_descricao` (`descricao`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =====================================================
+-- TABELAS: despesas_trigramas / receitas_trigramas
+-- Trigramas das descrições (sem acentos, minúsculas) para a busca
+-- aproximada; mantidas pela aplicação a cada inclusão/edição
+-- =====================================================
+CREATE TABLE IF NOT EXISTS `despesas_trigramas` (
+    `trigrama` CHAR(3) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    `despesa_id` INT NOT NULL,
+    PRIMARY KEY (`trigrama`, `despesa_id`),
+    INDEX `idx_despesa` (`despesa_id`),
+    FOREIGN KEY (`despesa_id`) REFERENCES `despesas`(`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `receitas_trigramas` (
+    `trigrama` CHAR(3) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+    `receita_id` INT NOT NULL,
+    PRIMARY KEY (`trigrama`, `receita_id`),
+    INDEX `idx_receita` (`receita_id`),
+    FOREIGN KEY (`receita_id`) REFERENCES `receitas`(`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =====================================================
@@ -103,6 +126,28 @@ CREATE TABLE IF NOT EXISTS `metas_gastos` (
     INDEX `idx_mes_ano` (`mes`, `ano`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- =====================================================
+-- TABELA: regras_recorrencia
+-- Regras das despesas fixas (dia do vencimento, intervalo em meses e
+-- data final opcional). As ocorrências são geradas pela aplicação e só
+-- viram linhas em `despesas` quando pagas ou editadas; esses meses ficam
+-- em `excecoes` (lista JSON de 'MM/AAAA')
+-- =====================================================
+CREATE TABLE IF NOT EXISTS `regras_recorrencia` (
+    `id` INT AUTO_INCREMENT PRIMARY KEY,
+    `descricao` VARCHAR(255) NOT NULL,
+    `valor` DECIMAL(15, 2) NOT NULL,
+    `categoria` VARCHAR(100) NOT NULL,
+    `dia` TINYINT NOT NULL,
+    `intervalo_meses` INT NOT NULL DEFAULT 1,
+    `mes_inicio` INT NOT NULL,
+    `ano_inicio` INT NOT NULL,
+    `data_fim` DATE NULL,
+    `excecoes` JSON NULL,
+    `data_criacao` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `data_atualizacao` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- =====================================================
 -- TABELA: configuracoes
 -- Armazena configurações do sistema
@@ -191,7 +236,9 @@ FROM `despesas`
 GROUP BY categoria, mes, ano
 ORDER BY ano DESC, mes DESC, valor_total DESC;
 
--- View: Despesas vencendo (próximos 7 dias)
+-- View: Despesas pendentes e dias até o vencimento
+-- A janela (próximos N dias, vencidas) vem da consulta; sem ORDER BY nem
+-- agregação a view é mesclada na consulta e usa idx_pago_vencimento
 CREATE OR REPLACE VIEW `v_despesas_vencendo` AS
 SELECT 
     id,
@@ -200,12 +247,12 @@ SELECT
     categoria,
     data_vencimento,
     DATEDIFF(data_vencimento, CURDATE()) as dias_para_vencimento,
+    pago,
+    data_pagamento,
     mes,
     ano
 FROM `despesas`
-WHERE pago = FALSE 
-    AND data_vencimento BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL 7 DAY)
-ORDER BY data_vencimento ASC;
+WHERE pago = FALSE;
 
 -- View: Metas e gastos atuais
 CREATE OR REPLACE VIEW `v_metas_status` AS
@@ -252,6 +299,208 @@ END$$
 
 DELIMITER ;
 
+-- Procedure: Movimentar o saldo de uma conta (saldo_atual + delta) e
+-- registrar o histórico; usada pelas procedures abaixo, dentro da
+-- transação delas. A linha da conta fica travada até o fim da transação.
+DELIMITER $$
+
+CREATE PROCEDURE IF NOT EXISTS `sp_movimentar_saldo`(
+    IN p_conta_id INT,
+    IN p_valor DECIMAL(15, 2),
+    IN p_operacao VARCHAR(255),
+    OUT p_saldo_novo DECIMAL(15, 2)
+)
+BEGIN
+    DECLARE v_saldo_anterior DECIMAL(15, 2) DEFAULT NULL;
+    
+    SELECT saldo_atual INTO v_saldo_anterior
+    FROM `contas_bancarias`
+    WHERE id = p_conta_id
+    FOR UPDATE;
+    
+    IF v_saldo_anterior IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Conta bancária não encontrada';
+    END IF;
+    
+    UPDATE `contas_bancarias`
+    SET saldo_atual = saldo_atual + p_valor
+    WHERE id = p_conta_id;
+    
+    SET p_saldo_novo = v_saldo_anterior + p_valor;
+    
+    INSERT INTO `historico_saldo`
+        (conta_id, saldo_anterior, saldo_novo, valor_movimentacao, operacao)
+    VALUES (p_conta_id, v_saldo_anterior, p_saldo_novo, p_valor, p_operacao);
+END$$
+
+DELIMITER ;
+
+-- Procedure: Pagar uma despesa por uma conta (débito, histórico e
+-- marcação como paga). Retorna o novo saldo da conta. Com p_transacao
+-- a procedure abre e confirma a própria transação; sem ele participa da
+-- transação de quem chamou.
+DELIMITER $$
+
+CREATE PROCEDURE IF NOT EXISTS `sp_pagar_despesa`(
+    IN p_despesa_id INT,
+    IN p_conta_id INT,
+    IN p_data_pagamento DATETIME,
+    IN p_transacao BOOLEAN
+)
+BEGIN
+    DECLARE v_valor DECIMAL(15, 2) DEFAULT NULL;
+    DECLARE v_descricao VARCHAR(255);
+    DECLARE v_saldo_novo DECIMAL(15, 2);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        IF p_transacao THEN
+            ROLLBACK;
+        END IF;
+        RESIGNAL;
+    END;
+    
+    IF p_transacao THEN
+        START TRANSACTION;
+    END IF;
+    
+    SELECT valor, descricao INTO v_valor, v_descricao
+    FROM `despesas`
+    WHERE id = p_despesa_id AND pago = FALSE
+    FOR UPDATE;
+    
+    IF v_valor IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Despesa não encontrada ou já paga';
+    END IF;
+    
+    CALL sp_movimentar_saldo(p_conta_id, -v_valor, CONCAT('Pagamento: ', v_descricao), v_saldo_novo);
+    
+    UPDATE `despesas`
+    SET pago = TRUE,
+        data_pagamento = COALESCE(p_data_pagamento, NOW()),
+        conta_id = p_conta_id
+    WHERE id = p_despesa_id;
+    
+    IF p_transacao THEN
+        COMMIT;
+    END IF;
+    
+    SELECT v_saldo_novo AS saldo_novo;
+END$$
+
+DELIMITER ;
+
+-- Procedure: Creditar uma receita em uma conta (crédito, histórico e
+-- conta da receita). Retorna o novo saldo da conta.
+DELIMITER $$
+
+CREATE PROCEDURE IF NOT EXISTS `sp_registrar_receita`(
+    IN p_receita_id INT,
+    IN p_conta_id INT,
+    IN p_transacao BOOLEAN
+)
+BEGIN
+    DECLARE v_valor DECIMAL(15, 2) DEFAULT NULL;
+    DECLARE v_descricao VARCHAR(255);
+    DECLARE v_saldo_novo DECIMAL(15, 2);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        IF p_transacao THEN
+            ROLLBACK;
+        END IF;
+        RESIGNAL;
+    END;
+    
+    IF p_transacao THEN
+        START TRANSACTION;
+    END IF;
+    
+    SELECT valor, descricao INTO v_valor, v_descricao
+    FROM `receitas`
+    WHERE id = p_receita_id
+    FOR UPDATE;
+    
+    IF v_valor IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Receita não encontrada';
+    END IF;
+    
+    CALL sp_movimentar_saldo(p_conta_id, v_valor, CONCAT('Receita: ', v_descricao), v_saldo_novo);
+    
+    UPDATE `receitas`
+    SET conta_id = p_conta_id
+    WHERE id = p_receita_id;
+    
+    IF p_transacao THEN
+        COMMIT;
+    END IF;
+    
+    SELECT v_saldo_novo AS saldo_novo;
+END$$
+
+DELIMITER ;
+
+-- Procedure: Transferir entre duas contas (débito e crédito com os
+-- históricos). Recusa a transferência se a origem não tiver saldo.
+-- Trava as duas contas em ordem de id para não haver deadlock entre
+-- transferências opostas. Retorna os novos saldos de origem e destino.
+DELIMITER $$
+
+CREATE PROCEDURE IF NOT EXISTS `sp_transferir`(
+    IN p_conta_origem_id INT,
+    IN p_conta_destino_id INT,
+    IN p_valor DECIMAL(15, 2),
+    IN p_operacao_origem VARCHAR(255),
+    IN p_operacao_destino VARCHAR(255),
+    IN p_transacao BOOLEAN
+)
+BEGIN
+    DECLARE v_saldo_origem DECIMAL(15, 2) DEFAULT NULL;
+    DECLARE v_saldo_destino DECIMAL(15, 2);
+    DECLARE v_travada INT;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        IF p_transacao THEN
+            ROLLBACK;
+        END IF;
+        RESIGNAL;
+    END;
+    
+    IF p_valor <= 0 OR p_conta_origem_id = p_conta_destino_id THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Transferência inválida';
+    END IF;
+    
+    IF p_transacao THEN
+        START TRANSACTION;
+    END IF;
+    
+    SELECT id INTO v_travada FROM `contas_bancarias`
+    WHERE id = LEAST(p_conta_origem_id, p_conta_destino_id) FOR UPDATE;
+    SELECT id INTO v_travada FROM `contas_bancarias`
+    WHERE id = GREATEST(p_conta_origem_id, p_conta_destino_id) FOR UPDATE;
+    
+    SELECT saldo_atual INTO v_saldo_origem
+    FROM `contas_bancarias`
+    WHERE id = p_conta_origem_id;
+    
+    IF v_saldo_origem IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Conta de origem não encontrada';
+    END IF;
+    
+    IF v_saldo_origem < p_valor THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Saldo insuficiente na conta de origem';
+    END IF;
+    
+    CALL sp_movimentar_saldo(p_conta_origem_id, -p_valor, p_operacao_origem, v_saldo_origem);
+    CALL sp_movimentar_saldo(p_conta_destino_id, p_valor, p_operacao_destino, v_saldo_destino);
+    
+    IF p_transacao THEN
+        COMMIT;
+    END IF;
+    
+    SELECT v_saldo_origem AS saldo_origem, v_saldo_destino AS saldo_destino;
+END$$
+
+DELIMITER ;
+
 -- =====================================================
 -- TRIGGERS
 -- =====================================================
@@ -286,6 +535,28 @@ CREATE INDEX IF NOT EXISTS `idx_despesas_busca`
 CREATE INDEX IF NOT EXISTS `idx_receitas_busca` 
     ON `receitas` (`categoria`, `mes`, `ano`);
 
+-- Despesas pendentes por vencimento (v_despesas_vencendo): igualdade em
+-- `pago` e faixa em `data_vencimento`, já na ordem do resultado
+-- (ALTER TABLE em vez de CREATE INDEX IF NOT EXISTS, que o MySQL não aceita;
+-- ao rodar de novo, o erro de nome de índice duplicado é ignorado pelo init)
+ALTER TABLE `despesas` ADD INDEX `idx_pago_vencimento` (`pago`, `data_vencimento`);
+
+-- Carga inicial por faixa de meses (ano, mes) BETWEEN ...: ano na frente
+-- para a faixa e a data no fim para devolver já na ordem do resultado
+ALTER TABLE `despesas` ADD INDEX `idx_despesas_periodo` (`ano`, `mes`, `data_vencimento`);
+
+ALTER TABLE `receitas` ADD INDEX `idx_receitas_periodo` (`ano`, `mes`, `data_recebimento`);
+
+-- A paginação das buscas por (data, id) usa idx_data_vencimento e
+-- idx_data_recebimento: no InnoDB toda entrada de índice secundário já
+-- carrega a chave primária, então eles equivalem a (data, id)
+
+-- Busca textual na descrição (MATCH ... AGAINST) para bancos criados antes
+-- do índice FULLTEXT existir nas tabelas
+ALTER TABLE `despesas` ADD FULLTEXT INDEX `ft_despesas_descricao` (`descricao`);
+
+ALTER TABLE `receitas` ADD FULLTEXT INDEX `ft_receitas_descricao` (`descricao`);
+
 -- =====================================================
 -- COMENTÁRIOS NAS TABELAS
 -- =====================================================
@@ -305,6 +576,9 @@ ALTER TABLE `receitas`
 ALTER TABLE `metas_gastos` 
     COMMENT = 'Metas de gastos por categoria e período';
 
+ALTER TABLE `regras_recorrencia` 
+    COMMENT = 'Regras de despesas fixas expandidas sob demanda';
+
 ALTER TABLE `configuracoes` 
     COMMENT = 'Configurações gerais do sistema';
 
@@ -0,0 +1,12 @@
+"""
+Módulo de lembretes de vencimento de despesas
+"""
+from .roda_temporizacao import Agendamento, RodaTemporizacao
+from .notificacoes import Lembrete, notificar_terminal, NotificadorArquivo, NotificadorComando
+from .fontes import FonteArquivoJson, FonteMySQL
+from .agendador import LembretesVencimento, ANTECEDENCIAS_PADRAO, HORA_AVISO_PADRAO
+
+__all__ = ['Agendamento', 'RodaTemporizacao',
+           'Lembrete', 'notificar_terminal', 'NotificadorArquivo', 'NotificadorComando',
+           'FonteArquivoJson', 'FonteMySQL',
+           'LembretesVencimento', 'ANTECEDENCIAS_PADRAO', 'HORA_AVISO_PADRAO']
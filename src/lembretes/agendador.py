@@ -0,0 +1,136 @@
+"""
+Processo de lembretes: agenda os vencimentos pendentes na roda de temporização e dispara os avisos
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as horario
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .roda_temporizacao import Agendamento, RodaTemporizacao
+from .notificacoes import Lembrete
+
+# Dias de antecedência dos avisos (0 = no dia do vencimento)
+ANTECEDENCIAS_PADRAO = (3, 1, 0)
+
+# Hora do dia em que os avisos são disparados
+HORA_AVISO_PADRAO = horario(9, 0)
+
+# Segundos entre verificações de mudança na fonte
+INTERVALO_VERIFICACAO = 60.0
+
+
+class LembretesVencimento:
+    """
+    Mantém um aviso agendado para cada antecedência de cada despesa pendente.
+
+    A primeira sincronização lê todos os meses; as seguintes só releem os meses
+    cuja assinatura mudou na fonte, cancelando os agendamentos antigos desses
+    meses. Entre um evento e outro o processo dorme até a próxima posição
+    ocupada da roda ou a próxima verificação, então fica praticamente parado
+    mesmo com milhares de despesas pendentes.
+
+    Avisos cujo horário já passou quando a despesa é lida disparam na hora,
+    apenas o mais próximo do vencimento; despesas já vencidas geram um único
+    aviso. Cada aviso dispara uma vez por execução, mesmo se o mês for relido.
+    """
+
+    def __init__(self, fonte, notificadores: Sequence[Callable[[Lembrete], None]],
+                 antecedencias: Sequence[int] = ANTECEDENCIAS_PADRAO,
+                 hora_aviso: horario = HORA_AVISO_PADRAO,
+                 intervalo_verificacao: float = INTERVALO_VERIFICACAO,
+                 avisar_vencidas: bool = True, relogio: Callable[[], float] = time.time,
+                 resolucao: float = 60.0):
+        self.fonte = fonte
+        self.notificadores = list(notificadores)
+        self.antecedencias = sorted(set(antecedencias), reverse=True)
+        self.hora_aviso = hora_aviso
+        self.intervalo_verificacao = intervalo_verificacao
+        self.avisar_vencidas = avisar_vencidas
+        self.relogio = relogio
+        self.roda = RodaTemporizacao(relogio(), resolucao)
+        self._assinaturas: Dict[str, str] = {}
+        self._agendados: Dict[str, List[Agendamento]] = {}  # mes_ano -> agendamentos ativos
+        self._disparados: Dict[str, Set[Tuple[str, Optional[int]]]] = {}  # mes_ano -> (chave, antecedência)
+
+    def _instante_aviso(self, vencimento: date, antecedencia: int) -> float:
+        return datetime.combine(vencimento - timedelta(days=antecedencia), self.hora_aviso).timestamp()
+
+    def _reagendar_mes(self, mes_ano: str, agora: float):
+        for agendamento in self._agendados.pop(mes_ano, []):
+            agendamento.cancelar()
+        pendentes = self.fonte.pendentes(mes_ano) if mes_ano in self._assinaturas else []
+        chaves = {chave for chave, _, _, _ in pendentes}
+        # Esquece os avisos de despesas pagas ou removidas (o conjunto não cresce sem limite)
+        disparados = {aviso for aviso in self._disparados.pop(mes_ano, set()) if aviso[0] in chaves}
+        self._disparados[mes_ano] = disparados
+        hoje = datetime.fromtimestamp(agora).date()
+
+        agendados = []
+        for chave, descricao, valor, vencimento in pendentes:
+            if vencimento < hoje:
+                avisos = [(None, agora)] if self.avisar_vencidas else []
+            else:
+                avisos = [(dias, self._instante_aviso(vencimento, dias)) for dias in self.antecedencias]
+                passados = [aviso for aviso in avisos if aviso[1] <= agora]
+                # Dos avisos atrasados, só o mais próximo do vencimento dispara
+                for dias, _ in passados[:-1]:
+                    disparados.add((chave, dias))
+                avisos = [aviso for aviso in avisos if aviso[1] > agora] + passados[-1:]
+
+            for dias, instante in avisos:
+                if (chave, dias) in disparados:
+                    continue
+                lembrete = Lembrete(chave, descricao, valor, vencimento, dias)
+                agendados.append(self.roda.agendar(instante, (mes_ano, lembrete)))
+        if agendados:
+            self._agendados[mes_ano] = agendados
+        if not disparados:
+            del self._disparados[mes_ano]
+
+    def sincronizar(self) -> List[str]:
+        """Relê e reagenda os meses alterados na fonte; retorna esses meses"""
+        assinaturas = self.fonte.assinaturas()
+        if assinaturas is None:
+            return []
+        alterados = [mes_ano for mes_ano in set(assinaturas) | set(self._assinaturas)
+                     if assinaturas.get(mes_ano) != self._assinaturas.get(mes_ano)]
+        self._assinaturas = assinaturas
+        agora = self.relogio()
+        for mes_ano in alterados:
+            self._reagendar_mes(mes_ano, agora)
+        return alterados
+
+    def disparar_vencidos(self) -> List[Lembrete]:
+        """Avança a roda até agora e envia os avisos que chegaram na hora"""
+        disparados = []
+        for mes_ano, lembrete in self.roda.avancar(self.relogio()):
+            self._disparados.setdefault(mes_ano, set()).add((lembrete.chave, lembrete.antecedencia))
+            for notificar in self.notificadores:
+                try:
+                    notificar(lembrete)
+                except Exception as e:
+                    print(f"⚠️ Falha ao enviar o aviso de '{lembrete.descricao}': {e}", flush=True)
+            disparados.append(lembrete)
+        return disparados
+
+    def quantidade_agendada(self) -> int:
+        """Avisos ainda agendados"""
+        return sum(len([a for a in agendados if not a.cancelado]) for agendados in self._agendados.values())
+
+    def executar(self, parar: Optional[threading.Event] = None):
+        """Laço do processo: sincroniza, dispara e dorme até o próximo evento (até `parar` ser sinalizado)"""
+        parar = parar or threading.Event()
+        proxima_verificacao = 0.0
+        while not parar.is_set():
+            agora = self.relogio()
+            if agora >= proxima_verificacao:
+                try:
+                    self.sincronizar()
+                except Exception as e:
+                    print(f"⚠️ Erro ao ler as despesas: {e}", flush=True)
+                proxima_verificacao = agora + self.intervalo_verificacao
+            self.disparar_vencidos()
+            agora = self.relogio()
+            espera = min(self.roda.segundos_ate_proximo_evento(agora), proxima_verificacao - agora)
+            parar.wait(max(espera, 0.1))
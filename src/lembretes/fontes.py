@@ -0,0 +1,135 @@
+"""
+Fontes das despesas pendentes para os lembretes (arquivo JSON ou banco MySQL)
+"""
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.analise.recorrencia import RegraRecorrencia
+
+# (chave única, descrição, valor, vencimento) de uma despesa pendente
+Pendente = Tuple[str, str, float, date]
+
+# Até quantos dias à frente as ocorrências previstas das despesas fixas são agendadas
+HORIZONTE_PREVISTAS_DIAS = 366
+
+
+def pendentes_previstos(regras) -> Dict[str, List[Pendente]]:
+    """Ocorrências previstas (não gravadas) das regras de despesas fixas, por mês, até o horizonte"""
+    fim = date.today() + timedelta(days=HORIZONTE_PREVISTAS_DIAS)
+    por_mes: Dict[str, List[Pendente]] = {}
+    for regra in regras:
+        for vencimento, mes, ano in regra.ocorrencias(None, fim):
+            mes_ano = f"{mes:02d}/{ano}"
+            por_mes.setdefault(mes_ano, []).append(
+                (f"regra|{regra.id}|{mes_ano}", regra.descricao, float(regra.valor), vencimento))
+    return por_mes
+
+
+def assinar(pendentes: List[Pendente]) -> str:
+    return hashlib.sha1(repr(pendentes).encode('utf-8')).hexdigest()
+
+
+class FonteArquivoJson:
+    """
+    Despesas do arquivo salvo pelas versões JSON. Mudanças são detectadas pela
+    data de modificação do arquivo (um stat por verificação); só quando ela
+    muda o arquivo é lido, e cada mês ganha uma assinatura das suas despesas
+    pendentes para que apenas os meses alterados sejam reagendados.
+    """
+
+    def __init__(self, arquivo: str = "dados_financeiros.json"):
+        self.arquivo = arquivo
+        self._modificado: Optional[float] = None
+        self._pendentes: Dict[str, List[Pendente]] = {}
+        self._assinaturas: Dict[str, str] = {}
+        self._ausente = False
+
+    def descricao(self) -> str:
+        return f"arquivo {self.arquivo}"
+
+    def _ler(self):
+        with open(self.arquivo, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+
+        pendentes, assinaturas = {}, {}
+        for mes_ano, despesas in dados.get('despesas', {}).items():
+            lista, repeticoes = [], {}
+            for despesa in despesas:
+                if despesa.get('pago') or not despesa.get('data_vencimento'):
+                    continue
+                vencimento = datetime.strptime(despesa['data_vencimento'], "%d/%m/%Y").date()
+                # O arquivo não tem ids: a chave é descrição e vencimento (com um contador para
+                # despesas repetidas), estável quando o valor ou outras despesas do mês mudam
+                conteudo = f"{mes_ano}|{despesa['descricao']}|{vencimento.isoformat()}"
+                repeticoes[conteudo] = repeticoes.get(conteudo, 0) + 1
+                lista.append((f"{conteudo}|{repeticoes[conteudo]}", despesa['descricao'],
+                              float(despesa['valor']), vencimento))
+            pendentes[mes_ano] = lista
+
+        if dados.get('regras_recorrencia'):
+            regras = [RegraRecorrencia.from_dict(regra) for regra in dados['regras_recorrencia']]
+            for mes_ano, previstos in pendentes_previstos(regras).items():
+                pendentes.setdefault(mes_ano, []).extend(previstos)
+
+        for mes_ano, lista in pendentes.items():
+            assinaturas[mes_ano] = assinar(lista)
+        self._pendentes, self._assinaturas = pendentes, assinaturas
+
+    def assinaturas(self) -> Optional[Dict[str, str]]:
+        """Assinatura de cada mês, ou None se o arquivo não mudou desde a última leitura"""
+        try:
+            modificado = os.path.getmtime(self.arquivo)
+        except OSError:
+            if not self._ausente:
+                print(f"⚠️ Arquivo '{self.arquivo}' não encontrado: nenhuma despesa para avisar", flush=True)
+            self._ausente = True
+            self._modificado = None
+            return {}
+        self._ausente = False
+        if modificado == self._modificado:
+            return None
+        self._ler()
+        self._modificado = modificado
+        return dict(self._assinaturas)
+
+    def pendentes(self, mes_ano: str) -> List[Pendente]:
+        """Despesas não pagas do mês"""
+        return list(self._pendentes.get(mes_ano, []))
+
+
+class FonteMySQL:
+    """
+    Despesas do banco MySQL. A assinatura de cada mês (quantidade, pagas, soma
+    dos ids e última data_atualizacao) sai de uma única consulta agregada; só
+    os meses cuja assinatura mudou têm as despesas pendentes relidas. As
+    ocorrências previstas das despesas fixas vêm da tabela de regras (pequena)
+    e entram na assinatura do mês.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._previstos: Dict[str, List[Pendente]] = {}
+
+    def descricao(self) -> str:
+        return "banco MySQL"
+
+    def assinaturas(self) -> Optional[Dict[str, str]]:
+        linhas = self.db.assinaturas_meses_despesas()
+        assinaturas = {f"{linha['mes']:02d}/{linha['ano']}":
+                       f"{linha['quantidade']}|{linha['pagas']}|{linha['soma_ids']}|{linha['atualizacao']}"
+                       for linha in linhas}
+
+        regras = [RegraRecorrencia.from_db(linha) for linha in self.db.listar_regras_recorrencia()]
+        self._previstos = pendentes_previstos(regras)
+        for mes_ano, previstos in self._previstos.items():
+            assinaturas[mes_ano] = f"{assinaturas.get(mes_ano, '')}|{assinar(previstos)}"
+        return assinaturas
+
+    def pendentes(self, mes_ano: str) -> List[Pendente]:
+        mes, ano = mes_ano.split('/')
+        return [(str(linha['id']), linha['descricao'], float(linha['valor']), linha['data_vencimento'])
+                for linha in self.db.obter_despesas_pendentes_mes(int(mes), int(ano))] + \
+            list(self._previstos.get(mes_ano, []))
@@ -0,0 +1,66 @@
+"""
+Lembretes de vencimento e os destinos das notificações (terminal, arquivo de log, comando)
+"""
+import shlex
+import subprocess
+from datetime import date, datetime
+from typing import Optional
+
+
+class Lembrete:
+    """Aviso de uma despesa pendente; antecedencia é em dias (None = despesa já vencida)"""
+
+    def __init__(self, chave: str, descricao: str, valor: float, data_vencimento: date,
+                 antecedencia: Optional[int]):
+        self.chave = chave
+        self.descricao = descricao
+        self.valor = valor
+        self.data_vencimento = data_vencimento
+        self.antecedencia = antecedencia
+
+    def mensagem(self, hoje: Optional[date] = None) -> str:
+        """Texto do aviso, com os dias contados a partir de hoje"""
+        dias = (self.data_vencimento - (hoje or date.today())).days
+        vencimento = self.data_vencimento.strftime('%d/%m/%Y')
+        if dias < 0:
+            prazo = f"venceu há {-dias} dia(s) ({vencimento})"
+        elif dias == 0:
+            prazo = "vence HOJE"
+        elif dias == 1:
+            prazo = f"vence amanhã ({vencimento})"
+        else:
+            prazo = f"vence em {dias} dias ({vencimento})"
+        return f"{self.descricao} - R$ {self.valor:.2f} {prazo}"
+
+
+def notificar_terminal(lembrete: Lembrete):
+    """Escreve o aviso na saída padrão"""
+    icone = "❗" if lembrete.antecedencia is None else "⏰"
+    print(f"{icone} [{datetime.now().strftime('%d/%m/%Y %H:%M')}] {lembrete.mensagem()}", flush=True)
+
+
+class NotificadorArquivo:
+    """Acrescenta cada aviso em um arquivo de log"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+
+    def __call__(self, lembrete: Lembrete):
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().strftime('%d/%m/%Y %H:%M:%S')} {lembrete.mensagem()}\n")
+
+
+class NotificadorComando:
+    """
+    Executa um comando com o título e o texto do aviso como argumentos finais
+    (ex.: 'notify-send' no Linux, 'terminal-notifier -message' no macOS)
+    """
+
+    def __init__(self, comando: str, titulo: str = "Contas a pagar", tempo_limite: float = 10.0):
+        self.comando = shlex.split(comando)
+        self.titulo = titulo
+        self.tempo_limite = tempo_limite
+
+    def __call__(self, lembrete: Lembrete):
+        subprocess.run(self.comando + [self.titulo, lembrete.mensagem()], timeout=self.tempo_limite,
+                       check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -0,0 +1,112 @@
+"""
+Roda de temporização hierárquica para agendar milhares de lembretes com custo constante
+"""
+from typing import Any, List, Optional
+
+
+class Agendamento:
+    """Item agendado na roda; cancelar() o descarta sem procurar a posição dele"""
+
+    def __init__(self, tick: int, item: Any):
+        self.tick = tick
+        self.item = item
+        self.cancelado = False
+
+    def cancelar(self):
+        self.cancelado = True
+
+
+class RodaTemporizacao:
+    """
+    Roda de temporização hierárquica (como a dos temporizadores do kernel).
+
+    O tempo anda em ticks de `resolucao` segundos. O nível 0 tem uma posição
+    por tick; cada posição do nível seguinte cobre uma volta inteira do
+    anterior. Agendar e cancelar custam O(1): o item vai para a posição do
+    nível que alcança o seu tick. Quando um nível completa a volta, a próxima
+    posição do nível acima é redistribuída para baixo, e os itens só são
+    tocados uma vez por nível até dispararem. Instantes além do último nível
+    esperam em uma lista de transbordo.
+    """
+
+    def __init__(self, inicio: float, resolucao: float = 60.0, posicoes: int = 64, niveis: int = 4):
+        self.resolucao = resolucao
+        self.posicoes = posicoes
+        self.niveis = niveis
+        self.tick = int(inicio // resolucao)
+        self._rodas: List[List[List[Agendamento]]] = [[[] for _ in range(posicoes)] for _ in range(niveis)]
+        self._transbordo: List[Agendamento] = []
+        self._quantidade = 0
+
+    def __len__(self) -> int:
+        """Itens agendados (inclui cancelados ainda não descartados)"""
+        return self._quantidade
+
+    def _posicionar(self, agendamento: Agendamento):
+        distancia = agendamento.tick - self.tick
+        alcance = self.posicoes
+        for nivel in range(self.niveis):
+            if distancia < alcance:
+                posicao = (agendamento.tick // (alcance // self.posicoes)) % self.posicoes
+                self._rodas[nivel][posicao].append(agendamento)
+                return
+            alcance *= self.posicoes
+        self._transbordo.append(agendamento)
+
+    def agendar(self, instante: float, item: Any) -> Agendamento:
+        """Agenda o item para o instante (timestamp); instantes passados disparam no próximo avanço"""
+        agendamento = Agendamento(max(int(instante // self.resolucao), self.tick + 1), item)
+        self._posicionar(agendamento)
+        self._quantidade += 1
+        return agendamento
+
+    def _redistribuir(self, nivel: int):
+        """Desce a posição atual do nível (e, em cascata, dos níveis acima quando eles também viram)"""
+        if nivel >= self.niveis:
+            transbordo, self._transbordo = self._transbordo, []
+            for agendamento in transbordo:
+                self._posicionar(agendamento)
+            return
+        tamanho_tick = self.posicoes ** nivel
+        posicao = (self.tick // tamanho_tick) % self.posicoes
+        if posicao == 0:
+            self._redistribuir(nivel + 1)
+        itens, self._rodas[nivel][posicao] = self._rodas[nivel][posicao], []
+        for agendamento in itens:
+            if agendamento.cancelado:
+                self._quantidade -= 1
+            else:
+                self._posicionar(agendamento)
+
+    def avancar(self, agora: float) -> List[Any]:
+        """Avança até o instante atual e retorna os itens vencidos, em ordem de tick"""
+        alvo = int(agora // self.resolucao)
+        disparados = []
+        while self.tick < alvo:
+            self.tick += 1
+            posicao = self.tick % self.posicoes
+            if posicao == 0:
+                self._redistribuir(1)
+            itens, self._rodas[0][posicao] = self._rodas[0][posicao], []
+            for agendamento in itens:
+                self._quantidade -= 1
+                if not agendamento.cancelado:
+                    disparados.append(agendamento.item)
+        return disparados
+
+    def proximo_tick(self) -> Optional[int]:
+        """
+        Tick da próxima posição ocupada do nível 0 nesta volta, ou None se não
+        houver (aí o próximo evento possível é a virada da volta).
+        """
+        for passo in range(1, self.posicoes - self.tick % self.posicoes):
+            if self._rodas[0][(self.tick + passo) % self.posicoes]:
+                return self.tick + passo
+        return None
+
+    def segundos_ate_proximo_evento(self, agora: float) -> float:
+        """Quanto se pode dormir sem perder um disparo nem uma redistribuição"""
+        proximo = self.proximo_tick()
+        if proximo is None:
+            proximo = (self.tick // self.posicoes + 1) * self.posicoes
+        return max(0.0, proximo * self.resolucao - agora)
@@ -1,7 +1,7 @@
 from datetime import datetime, date
 import os
 from typing import List, Dict
-from controle_avancado import ControleFinanceiroAvancado
+from controle_avancado import ControleFinanceiroAvancado, escrever_aba_excel
 
 try:
     import pandas as pd
@@ -301,22 +301,19 @@ class ExportadorRelatorios:
             if nome_arquivo is None:
                 nome_arquivo = f"historico_{nome_conta.replace(' ', '_')}.xlsx"
             
-            conta = self.controle.contas_bancarias[nome_conta]
-            
-            dados_historico = []
-            for movimento in conta.historico_saldo:
-                data = datetime.fromisoformat(movimento['data'])
-                dados_historico.append({
-                    'Data': data.strftime('%d/%m/%Y %H:%M'),
-                    'Operação': movimento['operacao'],
-                    'Saldo Anterior': movimento['saldo_anterior'],
-                    'Saldo Novo': movimento['saldo_novo'],
-                    'Variação': movimento['valor']
-                })
+            dados_historico = ({
+                'Data': datetime.fromisoformat(movimento['data']).strftime('%d/%m/%Y %H:%M'),
+                'Operação': movimento['operacao'],
+                'Saldo Anterior': movimento['saldo_anterior'],
+                'Saldo Novo': movimento['saldo_novo'],
+                'Variação': movimento['valor']
+            } for movimento in self.controle.iterar_movimentacoes(nome_conta))
             
-            # Criar DataFrame e exportar
-            df = pd.DataFrame(dados_historico)
-            df.to_excel(nome_arquivo, index=False, sheet_name=f'Histórico {nome_conta}')
+            # Exportar em blocos
+            nome_aba = f'Histórico {nome_conta}'[:31]
+            with pd.ExcelWriter(nome_arquivo, engine='openpyxl') as writer:
+                if not escrever_aba_excel(writer, nome_aba, dados_historico):
+                    pd.DataFrame().to_excel(writer, sheet_name=nome_aba, index=False)
             
             print(f"✅ Histórico da conta exportado para: {nome_arquivo}")
             return True
@@ -352,15 +349,8 @@ class ExportadorRelatorios:
                         'Saldo Líquido': receitas - despesas_pagas
                     })
             
-            # Dados por categoria (despesas)
-            categorias_despesas = {}
-            for mes in range(1, 13):
-                despesas = self.controle.obter_despesas_mes(mes, ano)
-                for despesa in despesas:
-                    if despesa.pago:
-                        if despesa.categoria not in categorias_despesas:
-                            categorias_despesas[despesa.categoria] = 0
-                        categorias_despesas[despesa.categoria] += despesa.valor
+            # Dados por categoria (despesas), consolidados pelo cubo de gastos
+            categorias_despesas = self.controle.cubo_gastos.agrupar('categoria', ano=ano, pago=True)
             
             dados_categorias_despesas = []
             for categoria, valor in categorias_despesas.items():
@@ -371,12 +361,10 @@ class ExportadorRelatorios:
             
             # Dados por categoria (receitas)
             categorias_receitas = {}
-            for mes in range(1, 13):
-                receitas = self.controle.obter_receitas_mes(mes, ano)
-                for receita in receitas:
-                    if receita.categoria not in categorias_receitas:
-                        categorias_receitas[receita.categoria] = 0
-                    categorias_receitas[receita.categoria] += receita.valor
+            for receita, _, _ in self.controle.iterar_receitas({'ano': ano}):
+                if receita.categoria not in categorias_receitas:
+                    categorias_receitas[receita.categoria] = 0
+                categorias_receitas[receita.categoria] += receita.valor
             
             dados_categorias_receitas = []
             for categoria, valor in categorias_receitas.items():
@@ -385,12 +373,33 @@ class ExportadorRelatorios:
                     'Total Recebido': valor
                 })
             
+            # Médias móveis e taxa de poupança dos meses do ano
+            dados_medias_moveis = []
+            janelas = self.controle.obter_janelas_moveis()
+            for coluna, (mes, ano_coluna) in enumerate(janelas['meses']):
+                if ano_coluna != ano:
+                    continue
+                linha = {
+                    'Mês': self.obter_mes_nome(mes),
+                    'Gastos': float(janelas['gastos_total'][coluna])
+                }
+                for tamanho, dados in janelas['janelas'].items():
+                    linha[f'Média {tamanho} meses'] = float(dados['media_total'][coluna])
+                for tamanho, dados in janelas['janelas'].items():
+                    taxa = dados['taxa_poupanca'][coluna]
+                    linha[f'Poupança {tamanho} meses (%)'] = None if taxa != taxa else round(float(taxa) * 100, 2)
+                dados_medias_moveis.append(linha)
+            
             # Criar arquivo Excel
             with pd.ExcelWriter(nome_arquivo, engine='openpyxl') as writer:
                 # Aba mensal
                 if dados_mensais:
                     pd.DataFrame(dados_mensais).to_excel(writer, sheet_name='Resumo Mensal', index=False)
                 
+                # Aba médias móveis
+                if dados_medias_moveis:
+                    pd.DataFrame(dados_medias_moveis).to_excel(writer, sheet_name='Médias Móveis', index=False)
+                
                 # Aba categorias despesas
                 if dados_categorias_despesas:
                     pd.DataFrame(dados_categorias_despesas).to_excel(writer, sheet_name='Despesas por Categoria', index=False)
@@ -418,37 +427,27 @@ class ExportadorRelatorios:
                 nome_arquivo = f"backup_completo_{timestamp}.xlsx"
             
             with pd.ExcelWriter(nome_arquivo, engine='openpyxl') as writer:
-                # Exportar todas as despesas
-                todas_despesas = []
-                for mes_ano, despesas in self.controle.despesas.items():
-                    for despesa in despesas:
-                        todas_despesas.append({
-                            'Mês/Ano': mes_ano,
-                            'Descrição': despesa.descricao,
-                            'Valor': despesa.valor,
-                            'Categoria': despesa.categoria,
-                            'Vencimento': despesa.data_vencimento.strftime('%d/%m/%Y'),
-                            'Pago': 'Sim' if despesa.pago else 'Não',
-                            'Data Pagamento': despesa.data_pagamento.strftime('%d/%m/%Y') if despesa.data_pagamento else ''
-                        })
-                
-                if todas_despesas:
-                    pd.DataFrame(todas_despesas).to_excel(writer, sheet_name='Todas as Despesas', index=False)
+                # Exportar todas as despesas (geradas mês a mês e escritas em blocos)
+                todas_despesas = ({
+                    'Mês/Ano': self.controle.obter_mes_ano(mes, ano),
+                    'Descrição': despesa.descricao,
+                    'Valor': despesa.valor,
+                    'Categoria': despesa.categoria,
+                    'Vencimento': despesa.data_vencimento.strftime('%d/%m/%Y') if despesa.data_vencimento else '',
+                    'Pago': 'Sim' if despesa.pago else 'Não',
+                    'Data Pagamento': despesa.data_pagamento.strftime('%d/%m/%Y') if despesa.data_pagamento else ''
+                } for despesa, mes, ano in self.controle.iterar_despesas())
+                escrever_aba_excel(writer, 'Todas as Despesas', todas_despesas)
                 
                 # Exportar todas as receitas
-                todas_receitas = []
-                for mes_ano, receitas in self.controle.receitas.items():
-                    for receita in receitas:
-                        todas_receitas.append({
-                            'Mês/Ano': mes_ano,
-                            'Descrição': receita.descricao,
-                            'Valor': receita.valor,
-                            'Categoria': receita.categoria,
-                            'Data Recebimento': receita.data_recebimento.strftime('%d/%m/%Y')
-                        })
-                
-                if todas_receitas:
-                    pd.DataFrame(todas_receitas).to_excel(writer, sheet_name='Todas as Receitas', index=False)
+                todas_receitas = ({
+                    'Mês/Ano': self.controle.obter_mes_ano(mes, ano),
+                    'Descrição': receita.descricao,
+                    'Valor': receita.valor,
+                    'Categoria': receita.categoria,
+                    'Data Recebimento': receita.data_recebimento.strftime('%d/%m/%Y')
+                } for receita, mes, ano in self.controle.iterar_receitas())
+                escrever_aba_excel(writer, 'Todas as Receitas', todas_receitas)
                 
                 # Exportar contas
                 dados_contas = []